@@ -1,17 +1,34 @@
 import os
+import json
 import time
+import threading
 import logging
+import click
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify, render_template, send_file, abort
+from flask import Flask, request, jsonify, render_template, send_file, abort, Response
 from apscheduler.schedulers.background import BackgroundScheduler
 from dotenv import load_dotenv
 from config import Config
 from utils.validator import Validator, ValidationError
 from utils.github_handler import GitHubHandler, GitHubError
 from utils.file_processor import FileProcessor
+from utils.rate_limiter import RateLimiter
+from utils.token_pool import TokenPool
+from utils.file_records import is_error_record
+from utils.export_cache import ExportCache
+from utils.sources import open_local_source, SourceError
+from utils.content_spool import ContentSpool
+from utils.blob_cache import BlobCache
+from utils.memory_cache import MemoryCache
+from utils.cache_codec import CACHE_FILE_SUFFIX
+from utils.cache_policy import CachePolicy
+from utils.cache_gc import CacheCollector
+from utils.single_flight import SingleFlight
+from utils.export_queue import ExportQueue, QueueFullError
+from utils.memory_budget import MemoryBudget, estimate_export_memory, fetch_window, current_rss
+from utils.task_store import TaskStore, TERMINAL_STATUSES
 import requests
 import uuid
-from threading import Thread
 import shutil
 
 # 加载.env文件
@@ -37,125 +54,250 @@ logger = logging.getLogger(__name__)
 scheduler = BackgroundScheduler()
 scheduler.start()
 
-# 任务存储
-tasks = {}
+# 任务存储（多个工作进程共享，进度批量写入）
+tasks = TaskStore.shared()
 
-def process_export_task(task_id, params, logger):
-    """在后台线程中处理导出任务"""
-    try:
-        tasks[task_id]['status'] = 'processing'
-        tasks[task_id]['progress'] = 0
-        tasks[task_id]['stage'] = '初始化'
+# 按提交固定的导出结果缓存（含进行中任务的去重）
+export_cache = ExportCache()
+
+# 导出执行器：同时执行的任务数和排队长度有限
+export_queue = ExportQueue.shared()
+
+# 导出任务的进程级内存预算
+memory_budget = MemoryBudget.shared()
+
+# 进度推送连接数上限（每个连接占用一个处理线程）
+status_streams = threading.BoundedSemaphore(Config.STATUS_STREAM_MAX)
+
+def write_export(file_processor, files_content, repo_name, output_format, output_mode='single', on_stage=None):
+    """合并或切分文件记录并保存到下载目录，返回导出结果"""
+    def _stage(stage):
+        if on_stage:
+            on_stage(stage)
+    
+    failed_files = sum(1 for record in files_content if is_error_record(record))
+    
+    if output_mode == 'split' and output_format == 'md':
+        _stage('切分并保存文件')
+        saved_file_info = file_processor.save_split_files(files_content, repo_name, output_format)
         
-        github_handler = GitHubHandler()
+        # 将文件夹打包成zip
+        _stage('压缩文件')
+        folder_to_zip = saved_file_info['file_path']
+        zip_filename = f"{saved_file_info['file_name']}.zip"
+        zip_filepath = os.path.join(Config.DOWNLOAD_FOLDER, zip_filename)
         
-        def progress_callback(processed, total):
-            progress = int((processed / total) * 100)
-            tasks[task_id]['progress'] = progress
-            if progress < 100:
-                tasks[task_id]['stage'] = f'下载文件 {processed}/{total}'
-            else:
-                tasks[task_id]['stage'] = '合并文件'
+        shutil.make_archive(os.path.join(Config.DOWNLOAD_FOLDER, saved_file_info['file_name']), 'zip', folder_to_zip)
+        
+        # 删除原文件夹
+        shutil.rmtree(folder_to_zip)
+        
+        return {
+            'file_count': saved_file_info['file_count'],
+            'download_url': f'/download_folder/{zip_filename}',
+            'file_size': os.path.getsize(zip_filepath),
+            'failed_files': failed_files,
+            'output_mode': 'split'
+        }
+    
+    # 合并并逐段写入文件
+    _stage('合并并保存文件')
+    output_filename = file_processor.generate_output_filename(repo_name, output_format)
+    saved_file_info = file_processor.write_merged_file(files_content, output_format, repo_name, output_filename)
+    
+    return {
+        'download_url': f'/files/{output_filename}',
+        'file_size': saved_file_info['file_size'],
+        'file_count': len(files_content),
+        'failed_files': failed_files,
+        'output_mode': 'single'
+    }
 
-        # 获取文件列表
-        tasks[task_id]['stage'] = '获取文件列表'
-        files = github_handler.list_repository_contents(
-            params['owner'], params['repo'], params['branch']
-        )
+def process_export_task(task_id, params, logger, github_handler=None):
+    """在导出执行器中处理导出任务的第一阶段：获取并规划文件列表，估计内存峰值
+
+    获取内容的阶段（fetch_export_task）交回导出执行器，内存预算足够时才开始执行，等待期间不占用工作线程。
+    github_handler 为提交请求时已解析过仓库信息的导出上下文，复用其仓库对象和默认分支
+    """
+    try:
+        tasks.update(task_id, status='processing', progress=0, stage='初始化')
         
-        # 过滤
+        github_handler = github_handler or GitHubHandler()
+        # 按解析出的提交获取，保证同一缓存键对应的内容不变
+        ref = params.get('commit_sha') or params['branch']
+
         file_processor = FileProcessor(
             file_types=params['file_types'],
             exclude_names=params['exclude_names'],
             exclude_dirs=params['exclude_dirs'],
             use_default_filters=params.get('use_default_filters', False)
         )
+        
+        # 获取文件列表（大型仓库遍历子树时跳过排除目录）
+        tasks.update(task_id, stage='获取文件列表')
+        files = github_handler.list_repository_contents(
+            params['owner'], params['repo'], ref, file_processor
+        )
+        
+        # 过滤
         filtered_files = file_processor.filter_files(files)
         
         if not filtered_files:
             raise Exception("没有符合条件的文件")
 
-        # 获取文件内容
-        file_paths = [f['path'] for f in filtered_files]
-        files_content = github_handler.get_file_content_batch(
-            params['owner'], params['repo'], file_paths, params['branch'], progress_callback
-        )
+        # 规划获取：超大文件和二进制文件直接使用占位，不发起请求
+        fetch_plan = file_processor.plan_fetch(filtered_files)
+        tasks.update(task_id, fetch_plan=fetch_plan['stats'])
+        logger.info(f"任务 {task_id} 获取规划: {fetch_plan['stats']}")
+
+        # 按文件树中的blob大小和获取方式的并发数估计内存峰值，内存配额足够时才开始获取（小任务可以先执行）
+        window = fetch_window(params.get('fetch_mode', 'api'), github_handler.engine)
+        memory = {'estimated_bytes': estimate_export_memory(fetch_plan['fetch'], window)}
+        tasks.update(task_id, memory=dict(memory),
+                     stage=f"等待内存配额（预计 {memory['estimated_bytes'] / (1024 * 1024):.1f}MB）")
+        export_queue.defer(task_id, memory['estimated_bytes'], fetch_export_task, task_id, params, logger,
+                           github_handler, file_processor, fetch_plan, time.monotonic())
+    except Exception as e:
+        fail_export_task(task_id, params, logger, e)
+
+def fetch_export_task(task_id, params, logger, github_handler, file_processor, fetch_plan, deferred_at):
+    """导出任务的第二阶段：已占用内存配额，获取文件内容并生成导出文件"""
+    try:
+        ref = params.get('commit_sha') or params['branch']
+        memory = dict(tasks[task_id]['memory'])
+        memory['wait_seconds'] = round(time.monotonic() - deferred_at, 3)
+        memory['start_rss_bytes'] = current_rss()
         
-        output_mode = params.get('output_mode', 'single')
+        def sample_memory():
+            """记录任务执行期间进程常驻内存的峰值"""
+            rss = current_rss()
+            if rss is not None and rss > memory.get('peak_rss_bytes', 0):
+                memory['peak_rss_bytes'] = rss
+        
+        def progress_callback(processed, total):
+            sample_memory()
+            progress = int((processed / total) * 100)
+            stage = f'下载文件 {processed}/{total}' if progress < 100 else '合并文件'
+            tasks.update(task_id, progress=progress, stage=stage, memory=dict(memory))
 
-        if output_mode == 'split' and params['output_format'] == 'md':
-            tasks[task_id]['stage'] = '切分并保存文件'
-            saved_file_info = file_processor.save_split_files(
-                files_content, params['repo'], params['output_format']
-            )
+        sample_memory()
+        tasks.update(task_id, stage='获取文件内容', memory=dict(memory))
+
+        # 增量导出：内容（按blob SHA）已缓存的文件直接复用，只获取新增或修改的文件
+        filter_key = ExportCache.make_filter_key(params)
+        reused_files, files_to_fetch, base_commit = github_handler.plan_incremental(
+            params['owner'], params['repo'], filter_key, fetch_plan['fetch']
+        )
+
+        # 获取文件内容：记录写入磁盘暂存区，合并时逐个读取，内存占用与仓库大小无关
+        with ContentSpool() as files_content:
+            # 规划后被淘汰的缓存条目改为重新获取
+            files_to_fetch += github_handler.load_cached_records(reused_files, files_content)
+            if reused_files:
+                incremental = {
+                    'base_commit': base_commit,
+                    'reused_files': len(files_content),
+                    'fetched_files': len(files_to_fetch)
+                }
+                tasks.update(task_id, incremental=incremental)
+                logger.info(f"任务 {task_id} 增量导出: {incremental}")
             
-            # 将文件夹打包成zip
-            tasks[task_id]['stage'] = '压缩文件'
-            folder_to_zip = saved_file_info['file_path']
-            zip_filename = f"{saved_file_info['file_name']}.zip"
-            zip_filepath = os.path.join(Config.DOWNLOAD_FOLDER, zip_filename)
+            file_paths = [f['path'] for f in files_to_fetch]
+            if not file_paths:
+                pass
+            elif params.get('fetch_mode', 'api') == 'archive':
+                tasks.update(task_id, stage='下载仓库归档')
+                github_handler.get_file_content_archive(
+                    params['owner'], params['repo'], file_processor, ref,
+                    file_paths, progress_callback, files_content
+                )
+            elif params.get('fetch_mode') == 'git':
+                tasks.update(task_id, stage='通过git获取文件')
+                github_handler.get_file_content_git(
+                    params['owner'], params['repo'], file_processor, ref,
+                    file_paths, progress_callback, files_content
+                )
+            else:
+                github_handler.get_file_content_batch(
+                    params['owner'], params['repo'], file_paths, ref, progress_callback, files_content
+                )
+            github_handler.save_export_snapshot(
+                params['owner'], params['repo'], filter_key, ref, fetch_plan['fetch'], files_content
+            )
+            files_content.extend(fetch_plan['placeholders'])
             
-            shutil.make_archive(os.path.join(Config.DOWNLOAD_FOLDER, saved_file_info['file_name']), 'zip', folder_to_zip)
+            def on_stage(stage):
+                sample_memory()
+                tasks.update(task_id, stage=stage, memory=dict(memory))
             
-            # 删除原文件夹
-            shutil.rmtree(folder_to_zip)
-
-            tasks[task_id]['status'] = 'success'
-            tasks[task_id]['result'] = {
-                'file_count': saved_file_info['file_count'],
-                'download_url': f'/download_folder/{zip_filename}',
-                'file_size': os.path.getsize(zip_filepath),
-                'output_mode': 'split'
-            }
-        else:
-            # 合并
-            tasks[task_id]['stage'] = '合并内容'
-            merged_content, total_size = file_processor.merge_files_content(
-                files_content, params['output_format'], params['repo']
-            )
-
-            # 保存
-            tasks[task_id]['stage'] = '保存文件'
-            output_filename = file_processor.generate_output_filename(
-                params['repo'], params['output_format']
+            result = write_export(
+                file_processor, files_content, params['repo'], params['output_format'],
+                params.get('output_mode', 'single'), on_stage
             )
-            saved_file_info = file_processor.save_merged_file(merged_content, output_filename)
-            
-            tasks[task_id]['status'] = 'success'
-            tasks[task_id]['result'] = {
-                'download_url': f'/files/{output_filename}',
-                'file_size': saved_file_info['file_size'],
-                'file_count': len(files_content),
-                'output_mode': 'single'
-            }
+        
+        # 重试后仍然失败的文件会以占位形式保留在结果中，这里记录数量供前端展示
+        if result['failed_files']:
+            logger.warning(f"任务 {task_id} 有 {result['failed_files']} 个文件获取失败")
+        
+        sample_memory()
+        if memory.get('start_rss_bytes') is not None and memory.get('peak_rss_bytes') is not None:
+            memory['rss_growth_bytes'] = memory['peak_rss_bytes'] - memory['start_rss_bytes']
+        tasks.update(task_id, result=result, status='success', memory=dict(memory))
+        
+        if params.get('export_key'):
+            export_cache.complete(params['export_key'], task_id, result)
 
     except Exception as e:
-        logger.exception(f"任务 {task_id} 失败")
-        tasks[task_id]['status'] = 'error'
-        tasks[task_id]['message'] = str(e)
+        fail_export_task(task_id, params, logger, e)
+
+def fail_export_task(task_id, params, logger, error):
+    """记录任务失败，释放相同导出的去重占用"""
+    logger.exception(f"任务 {task_id} 失败")
+    tasks.update(task_id, status='error', message=str(error))
+    if params.get('export_key'):
+        export_cache.release(params['export_key'], task_id)
 
 
 def cleanup_old_files():
-    """清理过期的下载文件"""
+    """清理过期的下载文件和任务状态"""
     try:
-        if not os.path.exists(Config.DOWNLOAD_FOLDER):
-            return
-        
-        cutoff_time = datetime.now() - timedelta(minutes=Config.FILE_RETENTION_MINUTES)
+        expired = tasks.expire()
+        if expired:
+            logger.info(f"清理过期任务状态: {expired} 个")
+    except Exception as e:
+        logger.error(f"清理任务状态失败: {str(e)}")
+
+    try:
+        if os.path.exists(Config.DOWNLOAD_FOLDER):
+            cutoff_time = datetime.now() - timedelta(minutes=Config.FILE_RETENTION_MINUTES)
+            
+            for filename in os.listdir(Config.DOWNLOAD_FOLDER):
+                file_path = os.path.join(Config.DOWNLOAD_FOLDER, filename)
+                if os.path.isfile(file_path):
+                    file_time = datetime.fromtimestamp(os.path.getmtime(file_path))
+                    if file_time < cutoff_time:
+                        try:
+                            os.remove(file_path)
+                            logger.info(f"清理过期文件: {filename}")
+                        except Exception as e:
+                            logger.error(f"清理文件失败 {filename}: {str(e)}")
         
-        for filename in os.listdir(Config.DOWNLOAD_FOLDER):
-            file_path = os.path.join(Config.DOWNLOAD_FOLDER, filename)
-            if os.path.isfile(file_path):
-                file_time = datetime.fromtimestamp(os.path.getmtime(file_path))
-                if file_time < cutoff_time:
-                    try:
-                        os.remove(file_path)
-                        logger.info(f"清理过期文件: {filename}")
-                    except Exception as e:
-                        logger.error(f"清理文件失败 {filename}: {str(e)}")
+        # 产物已被清理的导出结果不再保留
+        expired = export_cache.expire()
+        if expired:
+            logger.info(f"清理过期导出结果: {expired} 个")
     except Exception as e:
         logger.error(f"清理任务执行失败: {str(e)}")
 
+def collect_cache():
+    """缓存垃圾回收：维持缓存总大小预算，删除损坏条目并回收数据库空间"""
+    try:
+        stats = CacheCollector().run()
+        if any(stats.values()):
+            logger.info(f"缓存垃圾回收: {stats}")
+    except Exception as e:
+        logger.error(f"缓存垃圾回收失败: {str(e)}")
+
 # 添加定时清理任务（每5分钟执行一次）
 scheduler.add_job(
     func=cleanup_old_files,
@@ -163,6 +305,12 @@ scheduler.add_job(
     minutes=5,
     id='cleanup_files'
 )
+scheduler.add_job(
+    func=collect_cache,
+    trigger="interval",
+    minutes=Config.CACHE_GC_INTERVAL_MINUTES,
+    id='collect_cache'
+)
 
 @app.route('/')
 def index():
@@ -188,7 +336,11 @@ def download():
             logger.warning(f"参数校验失败: {str(e)}")
             return jsonify({'status': 'error', 'message': str(e)}), 400
 
-        # 获取仓库信息以确定默认分支
+        # 队列已满时不再请求GitHub
+        if export_queue.is_full():
+            return queue_full_response(export_queue.retry_after())
+
+        # 获取仓库信息以确定默认分支（该处理器作为本次导出的上下文传给后台任务）
         github_handler = GitHubHandler()
         try:
             repo_info = github_handler.get_repo_info(validated_params['owner'], validated_params['repo'])
@@ -200,15 +352,41 @@ def download():
                     'message': '不支持私有仓库'
                 }), 400
 
+            # 固定到当前提交，相同提交和参数的导出可以复用
+            validated_params['commit_sha'] = github_handler.get_commit_sha(
+                validated_params['owner'], validated_params['repo'], validated_params['branch']
+            )
+
         except GitHubError as e:
             logger.error(f"获取仓库信息失败: {str(e)}")
             return jsonify({'status': 'error', 'message': str(e)}), 400
 
+        export_key = ExportCache.make_key(validated_params['commit_sha'], validated_params)
+        validated_params['export_key'] = export_key
         task_id = str(uuid.uuid4())
+        
+        cached_result = export_cache.lookup(export_key)
+        if cached_result:
+            logger.info(f"复用提交 {validated_params['commit_sha'][:7]} 的导出结果")
+            tasks[task_id] = {'status': 'success', 'progress': 100, 'stage': '完成',
+                              'result': dict(cached_result, reused=True)}
+            return jsonify({'status': 'processing', 'task_id': task_id})
+        
         tasks[task_id] = {'status': 'pending'}
+        existing_task_id = export_cache.claim(export_key, task_id)
+        if existing_task_id:
+            tasks.pop(task_id, None)
+            logger.info(f"相同导出正在进行，关联到任务 {existing_task_id}")
+            return jsonify({'status': 'processing', 'task_id': existing_task_id})
         
-        thread = Thread(target=process_export_task, args=(task_id, validated_params, logger))
-        thread.start()
+        # 提交到固定大小的导出执行器，队列已满时拒绝
+        tasks[task_id] = {'status': 'queued', 'progress': 0, 'stage': '排队中'}
+        try:
+            export_queue.submit(task_id, process_export_task, task_id, validated_params, logger, github_handler)
+        except QueueFullError as e:
+            tasks.pop(task_id, None)
+            export_cache.release(export_key, task_id)
+            return queue_full_response(e.retry_after)
         
         return jsonify({'status': 'processing', 'task_id': task_id})
 
@@ -219,15 +397,83 @@ def download():
             'message': '启动任务失败'
         }), 500
 
+def queue_full_response(retry_after):
+    """导出队列已满：返回429并通过 Retry-After 告知重试时间"""
+    logger.warning(f"导出队列已满，建议 {retry_after} 秒后重试")
+    response = jsonify({
+        'status': 'error',
+        'message': f'服务器繁忙，请在 {retry_after} 秒后重试',
+        'retry_after': retry_after
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def task_status_payload(task_id):
+    """任务状态（排队中的任务附带排队位置），任务不存在时返回None"""
+    task = tasks.get(task_id)
+    if not task:
+        return None
+    
+    if task.get('status') == 'queued':
+        position = export_queue.position(task_id)
+        if position:
+            return dict(task, queue_position=position, stage=f'排队中（第 {position} 位）')
+    return task
+
 @app.route('/status/<task_id>')
 def task_status(task_id):
     """获取任务状态"""
-    task = tasks.get(task_id)
+    task = task_status_payload(task_id)
     if not task:
         return jsonify({'status': 'error', 'message': '任务不存在'}), 404
-    
     return jsonify(task)
 
+@app.route('/status/<task_id>/stream')
+def task_status_stream(task_id):
+    """以Server-Sent Events推送任务状态
+
+    状态变化时推送，两次推送至少间隔 STATUS_STREAM_INTERVAL 秒（期间的变化合并为一次），
+    任务结束后关闭连接。连接保持 STATUS_STREAM_TIMEOUT 秒后关闭，由浏览器自动重新连接；
+    连接数达到上限时返回503，前端改为轮询 /status/<task_id>。
+    """
+    if task_status_payload(task_id) is None:
+        return jsonify({'status': 'error', 'message': '任务不存在'}), 404
+    if not status_streams.acquire(blocking=False):
+        return jsonify({'status': 'error', 'message': '推送连接过多，请改用轮询'}), 503
+
+    def events():
+        yield f'retry: {int(Config.STATUS_STREAM_INTERVAL * 1000)}\n\n'
+        deadline = time.monotonic() + Config.STATUS_STREAM_TIMEOUT
+        last_data = None
+        last_event = time.monotonic()
+        while time.monotonic() < deadline:
+            version = tasks.version(task_id)
+            task = task_status_payload(task_id)
+            if task is None:
+                yield 'event: gone\ndata: {}\n\n'
+                return
+            data = json.dumps(task, ensure_ascii=False, default=str)
+            if data != last_data:
+                yield f'data: {data}\n\n'
+                last_data = data
+                last_event = time.monotonic()
+                if task.get('status') in TERMINAL_STATUSES:
+                    return
+                # 合并推送间隔内的变化
+                time.sleep(Config.STATUS_STREAM_INTERVAL)
+                continue
+            if time.monotonic() - last_event >= Config.STATUS_STREAM_KEEPALIVE:
+                yield ': keep-alive\n\n'
+                last_event = time.monotonic()
+            tasks.wait(task_id, version, min(Config.STATUS_STREAM_KEEPALIVE, max(deadline - time.monotonic(), 0)))
+
+    response = Response(events(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(status_streams.release)
+    return response
+
 @app.route('/files/<path:filename>')
 def download_file(filename):
     """下载单个文件"""
@@ -253,13 +499,18 @@ def admin():
     cache_stats = {
         'cache_size': 0,
         'cache_files': 0,
-        'github_token_set': bool(Config.get_github_token())
+        'blob_entries': 0,
+        'blob_size': 0,
+        'memory': MemoryCache.shared().stats(),
+        'tiers': CachePolicy.shared().stats(),
+        'single_flight': SingleFlight.shared().stats(),
+        'github_token_set': bool(Config.get_github_tokens())
     }
     
     try:
         cache_dir = Config.CACHE_FOLDER
         if os.path.exists(cache_dir):
-            cache_files = [f for f in os.listdir(cache_dir) if f.endswith('.json')]
+            cache_files = [f for f in os.listdir(cache_dir) if f.endswith((CACHE_FILE_SUFFIX, '.json'))]
             cache_stats['cache_files'] = len(cache_files)
             
             total_size = 0
@@ -267,10 +518,16 @@ def admin():
                 file_path = os.path.join(cache_dir, filename)
                 total_size += os.path.getsize(file_path)
             cache_stats['cache_size'] = total_size
+        
+        blob_stats = BlobCache.shared().stats()
+        cache_stats['blob_entries'] = blob_stats['entries']
+        cache_stats['blob_size'] = blob_stats['bytes']
+        cache_stats['memory'] = MemoryCache.shared().stats()
     except:
         pass
     
-    return render_template('admin.html', cache_stats=cache_stats)
+    return render_template('admin.html', cache_stats=cache_stats,
+                           token_budgets=TokenPool.shared().status())
 
 @app.route('/admin/clear-cache', methods=['POST'])
 def clear_cache():
@@ -278,6 +535,7 @@ def clear_cache():
     try:
         github_handler = GitHubHandler()
         github_handler.clear_cache()
+        export_cache.clear()
         
         logger.info("缓存清理成功")
         return jsonify({
@@ -298,7 +556,9 @@ def health_check():
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'version': '1.0.0',
-        'github_token_configured': bool(Config.get_github_token())
+        'github_token_configured': bool(Config.get_github_tokens()),
+        'export_queue': export_queue.stats(),
+        'memory_budget': memory_budget.stats()
     })
 
 @app.route('/settings')
@@ -330,6 +590,7 @@ def settings():
                          token_status_icon=token_status_icon,
                          token_status_message=token_status_message,
                          api_limits=api_limits,
+                         token_budgets=TokenPool.shared().status(),
                          system_stats=system_stats)
 
 @app.route('/settings/token', methods=['POST'])
@@ -495,7 +756,15 @@ def get_token_info(token):
         return {'valid': False, 'limit': 60, 'remaining': 0}
 
 def get_api_limits(token):
-    """获取API限制信息"""
+    """获取API限制信息（优先使用共享限制器中记录的额度，避免额外请求）"""
+    budget = RateLimiter.for_token(token).snapshot()
+    if budget['known'] and budget['reset'] and budget['reset'] > time.time():
+        return {
+            'current': budget['limit'],
+            'remaining': budget['remaining'],
+            'reset_time': datetime.fromtimestamp(budget['reset']).strftime('%H:%M')
+        }
+    
     token_info = get_token_info(token)
     
     if token_info['valid']:
@@ -523,13 +792,14 @@ def get_system_stats():
     try:
         # 缓存统计
         if os.path.exists(Config.CACHE_FOLDER):
-            cache_files = [f for f in os.listdir(Config.CACHE_FOLDER) if f.endswith('.json')]
+            cache_files = [f for f in os.listdir(Config.CACHE_FOLDER) if f.endswith((CACHE_FILE_SUFFIX, '.json'))]
             stats['cache_files'] = len(cache_files)
             
             total_size = 0
             for filename in cache_files:
                 file_path = os.path.join(Config.CACHE_FOLDER, filename)
                 total_size += os.path.getsize(file_path)
+            total_size += BlobCache.shared().stats()['bytes']
             stats['cache_size_mb'] = round(total_size / (1024 * 1024), 2)
         
         # 下载文件统计
@@ -558,5 +828,51 @@ def internal_error(error):
         'message': '服务器内部错误'
     }), 500
 
+@app.cli.command('export-local')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, file_okay=False))
+@click.option('--format', 'output_format', type=click.Choice(Config.SUPPORTED_OUTPUT_FORMATS), default='md', help='输出格式')
+@click.option('--mode', 'output_mode', type=click.Choice(['single', 'split']), default='single', help='输出模式')
+@click.option('--branch', default=None, help='裸仓库读取的分支或提交，默认HEAD')
+@click.option('--file-types', default='', help='文件类型，逗号分隔')
+@click.option('--exclude-names', default='', help='排除的文件名，逗号分隔')
+@click.option('--exclude-dirs', default='', help='排除的目录，逗号分隔')
+@click.option('--default-filters/--no-default-filters', default=True, help='是否应用默认过滤规则')
+def export_local(paths, output_format, output_mode, branch, file_types, exclude_names, exclude_dirs, default_filters):
+    """离线批量导出本地目录或裸仓库（如镜像仓库），不访问网络"""
+    def split_option(value):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    
+    os.makedirs(Config.DOWNLOAD_FOLDER, exist_ok=True)
+    for path in paths:
+        repo_name = os.path.basename(os.path.normpath(path))
+        if repo_name.endswith('.git'):
+            repo_name = repo_name[:-4]
+        try:
+            source = open_local_source(path)
+            file_processor = FileProcessor(
+                file_types=split_option(file_types),
+                exclude_names=split_option(exclude_names),
+                exclude_dirs=split_option(exclude_dirs),
+                use_default_filters=default_filters
+            )
+            files = file_processor.filter_files(
+                source.list_repository_contents('', repo_name, branch, file_processor)
+            )
+            if not files:
+                click.echo(f"{path}: 没有符合条件的文件", err=True)
+                continue
+            
+            fetch_plan = file_processor.plan_fetch(files)
+            with ContentSpool() as files_content:
+                files_content.extend(fetch_plan['placeholders'])
+                source.get_file_content_batch(
+                    '', repo_name, [f['path'] for f in fetch_plan['fetch']], branch, results=files_content
+                )
+                result = write_export(file_processor, files_content, repo_name, output_format, output_mode)
+            click.echo(f"{path}: {result['file_count']} 个文件 -> "
+                       f"{os.path.join(Config.DOWNLOAD_FOLDER, os.path.basename(result['download_url']))}")
+        except SourceError as e:
+            click.echo(f"{path}: {str(e)}", err=True)
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
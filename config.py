@@ -31,7 +31,30 @@ class Config:
         
         # 其次从环境变量读取
         return os.environ.get('GITHUB_TOKEN')
-    
+
+    @staticmethod
+    def get_github_tokens():
+        """获取全部GitHub Token（去重），配置文件中的在前，其次是环境变量 GITHUB_TOKENS（逗号分隔）和 GITHUB_TOKEN"""
+        candidates = []
+        try:
+            if os.path.exists(Config.TOKEN_CONFIG_FILE):
+                with open(Config.TOKEN_CONFIG_FILE, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+                    candidates.append(config.get('github_token'))
+                    candidates.extend(config.get('github_tokens') or [])
+        except Exception:
+            pass
+
+        candidates.extend(os.environ.get('GITHUB_TOKENS', '').split(','))
+        candidates.append(os.environ.get('GITHUB_TOKEN'))
+
+        tokens = []
+        for token in candidates:
+            token = (token or '').strip()
+            if token and token not in tokens:
+                tokens.append(token)
+        return tokens
+
     @staticmethod
     def save_token_to_file(token):
         """保存token到配置文件"""
@@ -55,9 +78,30 @@ class Config:
             return False
     
     # API请求优化配置
-    REQUEST_DELAY = float(os.environ.get('REQUEST_DELAY', 0.5))  # 请求间隔（秒）
+    RATE_LIMIT_PER_SECOND = float(os.environ.get('RATE_LIMIT_PER_SECOND', 10))  # 令牌补充速率（次/秒）
+    RATE_LIMIT_BURST = int(os.environ.get('RATE_LIMIT_BURST', 20))  # 允许的突发请求数
+    RATE_LIMIT_MAX_WAIT = int(os.environ.get('RATE_LIMIT_MAX_WAIT', 60))  # 额度耗尽时最长等待（秒）
     CACHE_DURATION = int(os.environ.get('CACHE_DURATION', 300))  # 缓存持续时间（秒）
-    MAX_RETRY_ATTEMPTS = int(os.environ.get('MAX_RETRY_ATTEMPTS', 3))  # 最大重试次数
+    CACHE_TTL_REPO = int(os.environ.get('CACHE_TTL_REPO', CACHE_DURATION))  # 仓库信息缓存时间（秒）
+    CACHE_TTL_COMMIT = int(os.environ.get('CACHE_TTL_COMMIT', 60))  # 分支到提交SHA解析结果的缓存时间（秒）
+    CACHE_TTL_TREE = int(os.environ.get('CACHE_TTL_TREE', CACHE_DURATION))  # 按分支获取的文件树缓存时间（秒），按提交SHA获取的永不过期
+    CACHE_TTL_BLOB = int(os.environ.get('CACHE_TTL_BLOB', 0))  # 文件内容缓存多久未访问视为过期（秒），0为永不过期
+    CACHE_STALE_WINDOW = int(os.environ.get('CACHE_STALE_WINDOW', 3600))  # 过期后仍直接返回旧值并在后台刷新的时长（秒），0为关闭；不适用于分支到提交的解析
+    CACHE_REFRESH_WORKERS = int(os.environ.get('CACHE_REFRESH_WORKERS', 2))  # 后台刷新缓存的线程数
+    CACHE_REVALIDATE_MAX_AGE = int(os.environ.get('CACHE_REVALIDATE_MAX_AGE', 7 * 24 * 3600))  # 带ETag的缓存可条件请求续期的最长时间（秒）
+    BLOB_CACHE_MAX_MB = float(os.environ.get('BLOB_CACHE_MAX_MB', 512))  # 按blob SHA索引的文件内容缓存大小上限（MB），超出后按最近访问淘汰
+    CACHE_COMPRESSION_LEVEL = int(os.environ.get('CACHE_COMPRESSION_LEVEL', 6))  # 缓存条目的zlib压缩级别（0不压缩，1最快，9最小）
+    CACHE_MAX_MB = float(os.environ.get('CACHE_MAX_MB', 1024))  # 缓存目录总大小预算（MB），由定时垃圾回收维持
+    CACHE_GC_INTERVAL_MINUTES = int(os.environ.get('CACHE_GC_INTERVAL_MINUTES', 10))  # 缓存垃圾回收间隔（分钟）
+    CACHE_GC_COST_WEIGHT = float(os.environ.get('CACHE_GC_COST_WEIGHT', 3600))  # 每KB一次请求的重新获取代价折算的保留时间（秒）
+    CACHE_GC_BATCH = int(os.environ.get('CACHE_GC_BATCH', 500))  # 每次垃圾回收校验的条目数
+    CACHE_GC_VACUUM_PAGES = int(os.environ.get('CACHE_GC_VACUUM_PAGES', 1000))  # 每次垃圾回收最多回收的数据库空闲页数
+    MEMORY_CACHE_MAX_ENTRIES = int(os.environ.get('MEMORY_CACHE_MAX_ENTRIES', 1024))  # 进程内LRU缓存的最大条目数
+    MEMORY_CACHE_MAX_MB = float(os.environ.get('MEMORY_CACHE_MAX_MB', 64))  # 进程内LRU缓存的最大占用（MB）
+    MAX_RETRY_ATTEMPTS = int(os.environ.get('MAX_RETRY_ATTEMPTS', 3))  # 最大尝试次数（含首次请求）
+    RETRY_BASE_DELAY = float(os.environ.get('RETRY_BASE_DELAY', 1.0))  # 指数退避基础间隔（秒）
+    RETRY_MAX_DELAY = float(os.environ.get('RETRY_MAX_DELAY', 60))  # 单次重试最长等待（秒），服务端要求更久时放弃
+    TASK_RETRY_BUDGET = int(os.environ.get('TASK_RETRY_BUDGET', 100))  # 单个导出任务的重试总次数
     
     # 文件处理限制
     MAX_REPO_SIZE_MB = int(os.environ.get('MAX_REPO_SIZE_MB', 100))  # 最大仓库大小（MB）
@@ -70,15 +114,42 @@ class Config:
     # 临时文件配置
     DOWNLOAD_FOLDER = 'downloads'
     CACHE_FOLDER = 'cache'
+    SPOOL_FOLDER = os.environ.get('SPOOL_FOLDER') or None  # 导出内容暂存目录，默认使用系统临时目录
     FILE_RETENTION_MINUTES = int(os.environ.get('FILE_RETENTION_MINUTES', 30))  # 文件保留时间（分钟）
+    TASK_STORE_PATH = os.environ.get('TASK_STORE_PATH', os.path.join(CACHE_FOLDER, 'tasks.sqlite3'))  # 任务状态数据库，多个工作进程共享
+    TASK_FLUSH_INTERVAL = float(os.environ.get('TASK_FLUSH_INTERVAL', 0.5))  # 任务进度批量写入数据库的间隔（秒）
+    STATUS_STREAM_INTERVAL = float(os.environ.get('STATUS_STREAM_INTERVAL', 1.0))  # 进度推送的最小间隔（秒），期间的变化合并为一次
+    STATUS_STREAM_KEEPALIVE = float(os.environ.get('STATUS_STREAM_KEEPALIVE', 15))  # 没有变化时发送保活注释的间隔（秒）
+    STATUS_STREAM_TIMEOUT = float(os.environ.get('STATUS_STREAM_TIMEOUT', 60))  # 单个推送连接的最长时间（秒），之后由浏览器重新连接
+    STATUS_STREAM_MAX = int(os.environ.get('STATUS_STREAM_MAX', 50))  # 每个进程同时保持的推送连接上限，超出时前端改为轮询
     CONCURRENT_REQUESTS = int(os.environ.get('CONCURRENT_REQUESTS', 10))  # 并发请求数量
+    EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 4))  # 同时执行的导出任务数
+    EXPORT_QUEUE_DEPTH = int(os.environ.get('EXPORT_QUEUE_DEPTH', 20))  # 等待执行的导出任务上限，超出时返回429
+    EXPORT_RETRY_AFTER = int(os.environ.get('EXPORT_RETRY_AFTER', 30))  # 尚无任务耗时数据时建议的重试等待时间（秒）
+    EXPORT_MEMORY_BUDGET_MB = float(os.environ.get('EXPORT_MEMORY_BUDGET_MB', 128))  # 同时获取内容的导出任务估计内存之和的上限（MB）
+    EXPORT_MEMORY_BASE_MB = float(os.environ.get('EXPORT_MEMORY_BASE_MB', 8))  # 每个导出任务的固定内存开销估计（MB）
+    EXPORT_MEMORY_FACTOR = float(os.environ.get('EXPORT_MEMORY_FACTOR', 3))  # 同时获取的文件内容（原始字节、解码文本和记录）相对文件大小的倍数
+    EXPORT_MEMORY_MAX_WAIT = int(os.environ.get('EXPORT_MEMORY_MAX_WAIT', 60))  # 等待内存配额超过该时间（秒）后不再允许其他任务插队
+    
+    # 获取引擎：thread（线程池 + PyGithub）或 async（asyncio + 长连接池，需要安装 aiohttp）
+    FETCH_ENGINE = os.environ.get('FETCH_ENGINE', 'thread')
+    ASYNC_CONCURRENCY = int(os.environ.get('ASYNC_CONCURRENCY', 200))  # 异步引擎同时进行的请求数
+    ASYNC_POOL_SIZE = int(os.environ.get('ASYNC_POOL_SIZE', 32))  # 异步引擎的长连接数量
     
     # 请求超时配置
     REQUEST_TIMEOUT = 30  # 秒
     
+    # GitHub API地址（测试时可指向本地模拟服务）
+    GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+    GIT_CLONE_URL = os.environ.get('GIT_CLONE_URL', 'https://github.com/{owner}/{repo}.git')  # git获取方式的仓库地址模板
+    GIT_FETCH_TIMEOUT = int(os.environ.get('GIT_FETCH_TIMEOUT', 300))  # 单个git命令超时（秒）
+    
     # 支持的文件格式
     SUPPORTED_OUTPUT_FORMATS = ['txt', 'md']
     
+    # 支持的内容获取方式：api 逐个文件调用 get_contents，archive 一次性流式下载仓库归档，git 通过部分克隆获取
+    SUPPORTED_FETCH_MODES = ['api', 'archive', 'git']
+    
     # 默认排除的目录
     DEFAULT_EXCLUDE_DIRS = [
         # 素材和资源目录
@@ -175,6 +246,28 @@ class Config:
         '.bin', '.dat', '.data'
     ]
     
+    # 获取规划时直接生成占位、不发起请求的已知二进制扩展名（不含 .svg、.lock、.log 等文本格式）
+    BINARY_EXTENSIONS = [
+        # 编译产物
+        '.pyc', '.pyo', '.pyd', '.class', '.o', '.obj',
+        '.exe', '.dll', '.so', '.dylib', '.a', '.lib',
+        
+        # 压缩文件
+        '.zip', '.rar', '.7z', '.tar', '.gz', '.bz2',
+        '.xz', '.tgz', '.tar.gz',
+        
+        # 图片文件
+        '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.ico',
+        '.webp', '.tiff', '.psd',
+        
+        # 视频和音频文件
+        '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm',
+        '.mp3', '.wav', '.ogg', '.m4a', '.aac',
+        
+        # 字体文件
+        '.ttf', '.otf', '.woff', '.woff2', '.eot'
+    ]
+    
     @staticmethod
     def init_app(app):
         # 确保下载目录存在
@@ -37,6 +37,9 @@ setup(
     python_requires=">=3.8",
     install_requires=requirements,
     extras_require={
+        "async": [
+            "aiohttp>=3.8.0",
+        ],
         "dev": [
             "pytest>=7.4.3",
             "pytest-cov>=4.1.0",
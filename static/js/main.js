@@ -37,7 +37,7 @@ class GitHubExporter {
                 const result = await response.json();
 
                 if (response.ok && result.task_id) {
-                    this.pollTaskStatus(result.task_id);
+                    this.watchTaskStatus(result.task_id);
                 } else {
                     this.showError(result.message || '启动任务失败');
                 }
@@ -77,6 +77,7 @@ class GitHubExporter {
             exclude_dirs: formData.get('exclude_dirs'),
             output_format: formData.get('output_format'),
             output_mode: formData.get('output_mode'),
+            fetch_mode: formData.get('fetch_mode'),
             use_default_filters: formData.get('use_default_filters') === 'on'
         };
         
@@ -108,6 +109,10 @@ class GitHubExporter {
                      this.showError(result.message || '启动任务失败');
                      this.enableForm();
                 }
+            } else if (response.status === 429) {
+                const retryAfter = response.headers.get('Retry-After') || result.retry_after;
+                this.showError(retryAfter ? `服务器繁忙，请在 ${retryAfter} 秒后重试` : (result.message || '服务器繁忙，请稍后重试'));
+                this.enableForm();
             } else {
                 this.showError(result.message || '处理失败，请稍后重试');
                 this.enableForm();
@@ -162,22 +167,59 @@ class GitHubExporter {
         this.progressInterval = interval;
     }
 
+    // 优先通过Server-Sent Events接收进度，浏览器不支持或服务器拒绝推送连接时改为轮询
+    watchTaskStatus(taskId) {
+        if (!window.EventSource) {
+            this.pollTaskStatus(taskId);
+            return;
+        }
+
+        const source = new EventSource(`/status/${taskId}/stream`);
+        source.onmessage = (event) => {
+            if (this.handleTaskStatus(JSON.parse(event.data))) {
+                source.close();
+            }
+        };
+        source.addEventListener('gone', () => {
+            source.close();
+            this.showError('任务不存在');
+            this.enableForm();
+        });
+        source.onerror = () => {
+            // 连接超时关闭后浏览器会自动重连（CONNECTING）；连接被拒绝时为CLOSED
+            if (source.readyState === EventSource.CLOSED) {
+                this.pollTaskStatus(taskId);
+            }
+        };
+    }
+
+    // 处理一次任务状态，任务结束时返回true
+    handleTaskStatus(result) {
+        if (result.status === 'queued' || result.status === 'pending') {
+            this.showLoading(result.stage || '排队中...');
+            return false;
+        }
+        if (result.status === 'processing') {
+            this.showLoading(result.stage, result.progress);
+            return false;
+        }
+        this.enableForm();
+        if (result.status === 'success') {
+            this.showSuccess(result.result);
+        } else {
+            this.showError(result.message);
+        }
+        return true;
+    }
+
     pollTaskStatus(taskId) {
         const interval = setInterval(async () => {
             try {
                 const response = await fetch(`/status/${taskId}`);
                 const result = await response.json();
 
-                if (result.status === 'processing') {
-                    this.showLoading(result.stage, result.progress);
-                } else {
+                if (this.handleTaskStatus(result)) {
                     clearInterval(interval);
-                    this.enableForm();
-                    if (result.status === 'success') {
-                        this.showSuccess(result.result);
-                    } else {
-                        this.showError(result.message);
-                    }
                 }
             } catch (error) {
                 clearInterval(interval);
@@ -198,11 +240,19 @@ class GitHubExporter {
     showSuccess(result) {
         let content;
         const fileSize = (result.file_size / (1024 * 1024)).toFixed(2);
+        const failedNote = result.failed_files
+            ? `<p class="help-text">其中 ${result.failed_files} 个文件多次重试后仍获取失败，已在结果中标注。</p>`
+            : '';
+        const reusedNote = result.reused
+            ? '<p class="help-text">该提交已用相同参数导出过，直接复用了已有结果。</p>'
+            : '';
 
         if (result.output_mode === 'split') {
             content = `
                 <h4><i class="fas fa-check-circle"></i> 多文件导出成功 (ZIP压缩包)</h4>
                 <p>共处理 ${result.file_count} 个文件，压缩包大小 ${fileSize} MB。</p>
+                ${failedNote}
+                ${reusedNote}
                 <a href="${result.download_url}" class="btn btn-success" download>
                     <i class="fas fa-download"></i> 下载ZIP压缩包
                 </a>
@@ -212,6 +262,8 @@ class GitHubExporter {
             content = `
                 <h4><i class="fas fa-check-circle"></i> 导出成功</h4>
                 <p>共处理 ${result.file_count} 个文件，合计 ${fileSize} MB。</p>
+                ${failedNote}
+                ${reusedNote}
                 <a href="${result.download_url}" class="btn btn-success" download>
                     <i class="fas fa-download"></i> 下载文件
                 </a>
@@ -0,0 +1,51 @@
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.rate_limiter import RateLimiter
+from utils.token_pool import TokenPool
+from utils.client_pool import ClientPool
+from utils.blob_cache import BlobCache
+from utils.memory_cache import MemoryCache
+from utils.cache_policy import CachePolicy
+from utils.cache_index import CacheIndex
+from utils.single_flight import SingleFlight
+
+
+def pytest_collection_modifyitems(config, items):
+    """依赖耗时的基准测试默认跳过，设置 RUN_BENCHMARKS=1 时执行"""
+    if os.environ.get('RUN_BENCHMARKS') == '1':
+        return
+    skip = pytest.mark.skip(reason='基准测试，设置 RUN_BENCHMARKS=1 执行')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    """在临时目录中运行，避免读写仓库内的缓存和Token配置，并放开速率限制"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv('GITHUB_TOKEN', raising=False)
+    monkeypatch.delenv('GITHUB_TOKENS', raising=False)
+    monkeypatch.setattr(Config, 'RATE_LIMIT_PER_SECOND', 1000)
+    monkeypatch.setattr(Config, 'RATE_LIMIT_BURST', 1000)
+    RateLimiter.reset_all()
+    TokenPool.reset_all()
+    ClientPool.reset_all()
+    BlobCache.reset_all()
+    MemoryCache.reset_all()
+    CachePolicy.reset_all()
+    CacheIndex.reset_all()
+    SingleFlight.reset_all()
+    yield tmp_path
+    RateLimiter.reset_all()
+    TokenPool.reset_all()
+    ClientPool.reset_all()
+    BlobCache.reset_all()
+    MemoryCache.reset_all()
+    CachePolicy.reset_all()
+    CacheIndex.reset_all()
+    SingleFlight.reset_all()
@@ -0,0 +1,208 @@
+"""用于测试和基准测试的本地GitHub API模拟服务"""
+import json
+import time
+import base64
+import hashlib
+import threading
+from urllib.parse import urlparse, parse_qs, unquote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # 并发建立大量连接时避免SYN重传
+
+
+class MockGitHubServer:
+    """模拟GitHub REST API的最小子集：仓库信息、递归树和文件内容
+
+    files: {路径: 字节内容}
+    latency: 每个请求额外的延迟（秒），用于模拟网络往返
+    """
+
+    def __init__(self, files, owner='user', repo='repo', branch='main', latency=0.0):
+        self.files = files
+        self.owner = owner
+        self.repo = repo
+        self.branch = branch
+        self.latency = latency
+        self.requests = []
+        self.not_modified = 0
+        self.rate_limit = 5000
+        self.rate_remaining = 5000
+        self.truncate_after = None  # 递归树条目数超过该值时返回截断结果
+        self.exhausted_tokens = set()  # 这些Token的请求返回403额度耗尽
+        self.tokens_seen = []
+        self.raw_requests = 0  # 以原始媒体类型请求文件内容的次数
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    @staticmethod
+    def blob_sha(data):
+        return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+    def _repo_payload(self):
+        base = f'{self.url}/repos/{self.owner}/{self.repo}'
+        return {
+            'id': 1,
+            'name': self.repo,
+            'full_name': f'{self.owner}/{self.repo}',
+            'owner': {'login': self.owner},
+            'private': False,
+            'size': sum(len(data) for data in self.files.values()) // 1024,
+            'default_branch': self.branch,
+            'url': base
+        }
+
+    @staticmethod
+    def tree_sha(dir_path):
+        return hashlib.sha1(f'tree {dir_path}'.encode('utf-8')).hexdigest()
+
+    def commit_sha(self):
+        """由文件内容推导的当前提交SHA，文件变化时随之变化"""
+        digest = hashlib.sha1()
+        for path in sorted(self.files):
+            digest.update(path.encode('utf-8') + b'\0' + self.blob_sha(self.files[path]).encode('ascii'))
+        return digest.hexdigest()
+
+    def _dirs(self):
+        """所有目录路径（根目录为空字符串）"""
+        dirs = {''}
+        for path in self.files:
+            parts = path.split('/')[:-1]
+            for i in range(1, len(parts) + 1):
+                dirs.add('/'.join(parts[:i]))
+        return dirs
+
+    def _tree_payload(self, dir_path='', recursive=True):
+        prefix = f'{dir_path}/' if dir_path else ''
+        entries = []
+        for sub_dir in sorted(self._dirs()):
+            if sub_dir and sub_dir.startswith(prefix):
+                rel = sub_dir[len(prefix):]
+                if recursive or '/' not in rel:
+                    entries.append({'path': rel, 'mode': '040000', 'type': 'tree', 'sha': self.tree_sha(sub_dir)})
+        for path, data in self.files.items():
+            if path.startswith(prefix):
+                rel = path[len(prefix):]
+                if recursive or '/' not in rel:
+                    entries.append({'path': rel, 'mode': '100644', 'type': 'blob',
+                                    'size': len(data), 'sha': self.blob_sha(data)})
+
+        truncated = bool(recursive and self.truncate_after is not None and len(entries) > self.truncate_after)
+        return {
+            'sha': self.tree_sha(dir_path),
+            'truncated': truncated,
+            'tree': entries[:self.truncate_after] if truncated else entries
+        }
+
+    def _content_payload(self, path):
+        data = self.files[path]
+        return {
+            'type': 'file',
+            'name': path.rsplit('/', 1)[-1],
+            'path': path,
+            'size': len(data),
+            'sha': self.blob_sha(data),
+            'encoding': 'base64',
+            'content': base64.b64encode(data).decode('ascii')
+        }
+
+    def route(self, handler):
+        """返回 (状态码, JSON内容或原始字节)；子类可扩展更多接口"""
+        parsed = urlparse(handler.path)
+        prefix = f'/repos/{self.owner}/{self.repo}'
+        path = unquote(parsed.path)
+
+        if path == prefix:
+            return 200, self._repo_payload()
+        if path == f'{prefix}/branches/{self.branch}':
+            return 200, {'name': self.branch, 'commit': {'sha': self.commit_sha(), 'url': ''}, 'protected': False}
+        if path.startswith(f'{prefix}/git/trees/'):
+            ref = path[len(f'{prefix}/git/trees/'):]
+            recursive = bool(parse_qs(parsed.query).get('recursive'))
+            if ref in (self.branch, self.commit_sha()):
+                return 200, self._tree_payload('', recursive)
+            for dir_path in self._dirs():
+                if self.tree_sha(dir_path) == ref:
+                    return 200, self._tree_payload(dir_path, recursive)
+            return 404, {'message': 'Not Found'}
+        if path.startswith(f'{prefix}/contents/'):
+            file_path = path[len(f'{prefix}/contents/'):]
+            if file_path not in self.files:
+                return 404, {'message': 'Not Found'}
+            ref = parse_qs(parsed.query).get('ref', [self.branch])[0]
+            if ref not in (self.branch, self.commit_sha()):
+                return 404, {'message': 'No commit found for the ref'}
+            if 'raw' in (handler.headers.get('Accept') or ''):
+                with self._lock:
+                    self.raw_requests += 1
+                return 200, self.files[file_path]
+            return 200, self._content_payload(file_path)
+        return 404, {'message': 'Not Found'}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+            wbufsize = 65536  # 响应头和正文合并发送
+
+            def do_GET(self):
+                token = (self.headers.get('Authorization') or '').replace('token ', '') or None
+                with server._lock:
+                    server.requests.append(self.path)
+                    server.tokens_seen.append(token)
+                    server.rate_remaining = max(server.rate_remaining - 1, 0)
+                    remaining = server.rate_remaining
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if token in server.exhausted_tokens:
+                    status, payload, remaining = 403, {'message': 'API rate limit exceeded'}, 0
+                else:
+                    status, payload = server.route(self)
+                raw = isinstance(payload, bytes)
+                body = payload if raw else json.dumps(payload).encode('utf-8')
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if status == 200 and self.headers.get('If-None-Match') == etag:
+                    with server._lock:
+                        server.not_modified += 1
+                    status, body = 304, b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/octet-stream' if raw else 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.send_header('X-RateLimit-Limit', str(server.rate_limit))
+                self.send_header('X-RateLimit-Remaining', str(remaining))
+                self.send_header('X-RateLimit-Reset', str(int(time.time()) + 3600))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._server = _Server(('127.0.0.1', 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
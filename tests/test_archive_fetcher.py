@@ -0,0 +1,119 @@
+import pytest
+import sys
+import os
+import io
+import tarfile
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.archive_fetcher import ArchiveFetcher, ArchiveError
+from utils.file_processor import FileProcessor
+from config import Config
+
+
+def build_tarball(files):
+    """构造与GitHub格式一致的tar.gz归档（带顶层目录）"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        root = tarfile.TarInfo('user-repo-abc123')
+        root.type = tarfile.DIRTYPE
+        archive.addfile(root)
+        for path, data in files.items():
+            info = tarfile.TarInfo(f'user-repo-abc123/{path}')
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def archive_server():
+    """在本地启动一个模拟GitHub tarball接口的HTTP服务"""
+    state = {'tarball': b'', 'requests': []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state['requests'].append(self.path)
+            if self.path != '/repos/user/repo/tarball/main':
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-gzip')
+            self.send_header('Content-Length', str(len(state['tarball'])))
+            self.end_headers()
+            self.wfile.write(state['tarball'])
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state['url'] = f'http://127.0.0.1:{server.server_port}'
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+class TestArchiveFetcher:
+    """测试归档获取引擎"""
+
+    def test_iter_files_applies_filters(self, archive_server):
+        """测试遍历归档时应用过滤规则"""
+        archive_server['tarball'] = build_tarball({
+            'main.py': b'print("Hello")',
+            'src/app.js': b'console.log(1)',
+            'tests/test_main.py': b'assert True',
+            'README.md': b'# Project'
+        })
+        fetcher = ArchiveFetcher(api_url=archive_server['url'])
+        processor = FileProcessor(file_types=['py', 'js'], exclude_dirs=['tests'])
+
+        records = list(fetcher.iter_files('user', 'repo', 'main', processor))
+
+        assert sorted(r['path'] for r in records) == ['main.py', 'src/app.js']
+        main = next(r for r in records if r['path'] == 'main.py')
+        assert main == {
+            'path': 'main.py',
+            'content': 'print("Hello")',
+            'size': 14,
+            'is_binary': False,
+            'is_oversized': False
+        }
+        assert archive_server['requests'] == ['/repos/user/repo/tarball/main']
+
+    def test_iter_files_placeholders(self, archive_server, monkeypatch):
+        """测试二进制文件和超大文件生成占位记录"""
+        monkeypatch.setattr(Config, 'MAX_SINGLE_FILE_SIZE_MB', 0.001)
+        archive_server['tarball'] = build_tarball({
+            'logo.bin': b'\xff\xfe\x00\x01',
+            'big.py': b'x' * 4096
+        })
+        fetcher = ArchiveFetcher(api_url=archive_server['url'])
+
+        records = {r['path']: r for r in fetcher.iter_files('user', 'repo', 'main')}
+
+        assert records['logo.bin']['is_binary'] is True
+        assert records['big.py']['is_oversized'] is True
+        assert records['big.py']['size'] == 4096
+
+    def test_iter_files_wanted_paths(self, archive_server):
+        """测试仅返回指定路径"""
+        archive_server['tarball'] = build_tarball({'a.py': b'a', 'b.py': b'b'})
+        fetcher = ArchiveFetcher(api_url=archive_server['url'])
+
+        records = list(fetcher.iter_files('user', 'repo', 'main', wanted_paths=['b.py']))
+
+        assert [r['path'] for r in records] == ['b.py']
+
+    def test_iter_files_not_found(self, archive_server):
+        """测试分支不存在"""
+        fetcher = ArchiveFetcher(api_url=archive_server['url'])
+
+        with pytest.raises(ArchiveError, match="仓库不存在或分支不存在"):
+            list(fetcher.iter_files('user', 'repo', 'missing'))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
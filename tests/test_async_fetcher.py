@@ -0,0 +1,140 @@
+import pytest
+import sys
+import os
+import time
+import asyncio
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('aiohttp')
+
+from utils.async_fetcher import AsyncFetcher, AsyncFetchError
+from utils.github_handler import GitHubHandler
+from utils.file_records import make_file_record
+from config import Config
+from tests.mock_github_server import MockGitHubServer
+
+
+FILES = {
+    'main.py': b'print("Hello")',
+    'src/app.js': b'console.log(1)',
+    'docs/readme.md': '# 中文说明'.encode('utf-8'),
+    'logo.bin': b'\xff\xfe\x00\x01'
+}
+
+
+@pytest.fixture
+def server(isolated, monkeypatch):
+    with MockGitHubServer(FILES) as mock:
+        monkeypatch.setattr(Config, 'GITHUB_API_URL', mock.url)
+        yield mock
+
+
+class TestAsyncFetcher:
+    """测试异步获取引擎"""
+
+    def test_get_repository_tree(self, server):
+        """测试获取文件树并解析默认分支"""
+        fetcher = AsyncFetcher(api_url=server.url)
+
+        files = fetcher.get_repository_tree('user', 'repo')
+
+        assert sorted(f['path'] for f in files) == sorted(FILES)
+        main = next(f for f in files if f['path'] == 'main.py')
+        assert main['size'] == 14
+        assert main['name'] == 'main.py'
+        assert main['type'] == 'file'
+        assert main['sha'] == MockGitHubServer.blob_sha(FILES['main.py'])
+
+    def test_get_repository_tree_missing_branch(self, server):
+        """测试分支不存在"""
+        fetcher = AsyncFetcher(api_url=server.url)
+
+        with pytest.raises(AsyncFetchError, match="仓库不存在或分支不存在"):
+            fetcher.get_repository_tree('user', 'repo', 'missing')
+
+    def test_get_file_content_batch(self, server):
+        """测试批量获取内容及进度回调"""
+        fetcher = AsyncFetcher(api_url=server.url, concurrency=2, pool_size=1)
+        progress = []
+
+        records = fetcher.get_file_content_batch(
+            'user', 'repo', list(FILES) + ['missing.py'], 'main',
+            lambda processed, total: progress.append((processed, total))
+        )
+
+        by_path = {r['path']: r for r in records}
+        assert by_path['main.py']['content'] == 'print("Hello")'
+        assert by_path['docs/readme.md']['content'] == '# 中文说明'
+        assert by_path['logo.bin']['is_binary'] is True
+        assert by_path['missing.py']['content'].startswith('[获取文件内容失败')
+        assert progress[-1] == (5, 5)
+        assert len(progress) == 5
+
+    def test_batch_memory_bounded_by_window(self, isolated):
+        """测试任务按窗口逐批创建，写入结果容器后即释放，内存峰值远小于内容总量"""
+        size = 128 * 1024
+        paths = [f'src/file_{i}.txt' for i in range(100)]
+        fetcher = AsyncFetcher(concurrency=4, pool_size=1)
+        records = []
+
+        async def fake_fetch(session, semaphore, owner, repo_name, path, branch):
+            async with semaphore:
+                await asyncio.sleep(0)
+                return make_file_record(path, 'x' * size, size)
+
+        class CountingSink:
+            """只计数不保留记录，模拟写入磁盘暂存区"""
+            def append(self, record):
+                records.append(record['path'])
+
+        fetcher._fetch_content = fake_fetch
+        tracemalloc.start()
+        try:
+            fetcher.get_file_content_batch('user', 'repo', paths, 'main', results=CountingSink())
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        assert sorted(records) == sorted(paths)
+        assert peak < size * len(paths) / 4
+
+    def test_handler_engines_return_same_records(self, server):
+        """测试线程池引擎与异步引擎的结果一致"""
+        thread_handler = GitHubHandler(engine='thread')
+        async_handler = GitHubHandler(engine='async')
+
+        thread_tree = thread_handler.get_repository_tree('user', 'repo', 'main')
+        thread_handler.clear_cache()
+        async_tree = async_handler.get_repository_tree('user', 'repo', 'main')
+        assert sorted(thread_tree, key=lambda f: f['path']) == sorted(async_tree, key=lambda f: f['path'])
+
+        paths = list(FILES)
+        thread_records = thread_handler.get_file_content_batch('user', 'repo', paths, 'main')
+        thread_handler.clear_cache()
+        async_records = async_handler.get_file_content_batch('user', 'repo', paths, 'main')
+        assert sorted(thread_records, key=lambda r: r['path']) == sorted(async_records, key=lambda r: r['path'])
+
+    @pytest.mark.benchmark
+    def test_benchmark_against_thread_engine(self, isolated, monkeypatch):
+        """基准测试：高延迟下异步引擎与线程池引擎的耗时对比"""
+        files = {f'src/file_{i}.py': f'value = {i}\n'.encode('utf-8') for i in range(200)}
+        with MockGitHubServer(files, latency=0.05) as mock:
+            monkeypatch.setattr(Config, 'GITHUB_API_URL', mock.url)
+            paths = list(files)
+
+            start = time.perf_counter()
+            GitHubHandler(engine='thread').get_file_content_batch('user', 'repo', paths, 'main')
+            thread_elapsed = time.perf_counter() - start
+            GitHubHandler().clear_cache()
+
+            start = time.perf_counter()
+            records = GitHubHandler(engine='async').get_file_content_batch('user', 'repo', paths, 'main')
+            async_elapsed = time.perf_counter() - start
+
+        assert len(records) == len(files)
+        assert async_elapsed < thread_elapsed, f"thread: {thread_elapsed:.2f}s, async: {async_elapsed:.2f}s"
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,70 @@
+import pytest
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.blob_cache import BlobCache
+from utils.file_records import (
+    make_file_record, make_binary_record, make_oversized_record, make_error_record, relabel_record
+)
+
+
+class TestBlobCache:
+    """测试按blob SHA索引的内容缓存"""
+
+    def test_put_and_get(self, tmp_path):
+        """测试按SHA保存，按任意路径读取"""
+        cache = BlobCache(str(tmp_path / 'blobs.sqlite3'))
+        cache.put('a' * 40, make_file_record('src/a.py', '中文 = 1', 10))
+        cache.put('b' * 40, make_binary_record('logo.png', 2048))
+
+        assert cache.get('a' * 40, 'lib/a.py') == make_file_record('lib/a.py', '中文 = 1', 10)
+        assert cache.get('b' * 40, 'logo.png') == make_binary_record('logo.png', 2048)
+        assert cache.get('c' * 40, 'x.py') is None
+        assert cache.contains(['a' * 40, 'c' * 40]) == {'a' * 40}
+
+    def test_placeholders_follow_requested_path(self, tmp_path):
+        """测试二进制和超大文件的占位内容按读取时的路径生成，不保留写入时的路径"""
+        cache = BlobCache(str(tmp_path / 'blobs.sqlite3'))
+        cache.put('b' * 40, make_binary_record('old/logo.png', 2048))
+        cache.put('c' * 40, make_oversized_record('old/big.bin', 5 * 1024 * 1024))
+
+        assert cache.get('b' * 40, 'new/icon.png') == make_binary_record('new/icon.png', 2048)
+        assert cache.get('c' * 40, 'new/big.bin') == make_oversized_record('new/big.bin', 5 * 1024 * 1024)
+        assert relabel_record(make_binary_record('old/logo.png', 1), 'new/icon.png') == \
+            make_binary_record('new/icon.png', 1)
+
+    def test_skips_error_records(self, tmp_path):
+        """测试获取失败的记录和缺少SHA的记录不保存"""
+        cache = BlobCache(str(tmp_path / 'blobs.sqlite3'))
+        cache.put('a' * 40, make_error_record('a.py', '[获取文件内容失败: HTTP 500]'))
+        cache.put(None, make_file_record('b.py', 'x', 1))
+
+        assert cache.stats()['entries'] == 0
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """测试超过大小预算时淘汰最久未访问的条目"""
+        cache = BlobCache(str(tmp_path / 'blobs.sqlite3'), max_bytes=3 * 150)
+        for sha in ('1', '2', '3'):
+            cache.put(sha * 40, make_file_record(f'{sha}.txt', 'x' * 100, 100))
+            time.sleep(0.01)
+        cache.get('1' * 40, '1.txt')
+
+        cache.put('4' * 40, make_file_record('4.txt', 'x' * 100, 100))
+
+        remaining = cache.contains(c * 40 for c in '1234')
+        assert '2' * 40 not in remaining
+        assert {'1' * 40, '4' * 40} <= remaining
+        assert cache.stats()['bytes'] <= int(3 * 150 * 0.9)
+
+    def test_persists_across_instances(self, tmp_path):
+        """测试数据库文件在实例（进程）之间共享"""
+        path = str(tmp_path / 'blobs.sqlite3')
+        BlobCache(path).put('a' * 40, make_file_record('a.py', 'x', 1))
+
+        assert BlobCache(path).get('a' * 40, 'a.py')['content'] == 'x'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
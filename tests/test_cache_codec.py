@@ -0,0 +1,91 @@
+import pytest
+import sys
+import os
+import json
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache_codec import (
+    compress, decompress, encode_entry, decode_entry, raw_size, CacheFormatError, HEADER_SIZE
+)
+from utils.blob_cache import BlobCache
+from utils.memory_cache import MemoryCache
+from utils.file_records import make_file_record
+from utils.github_handler import GitHubHandler
+
+
+class TestCacheCodec:
+    """测试缓存条目的压缩格式"""
+
+    def test_round_trip_compresses_code(self):
+        """测试条目往返不变，重复的源码被压缩"""
+        entry = {'timestamp': 1.5, 'content': [{'path': f'src/模块{i}.py', 'size': i} for i in range(200)]}
+        data = encode_entry(entry)
+
+        assert decode_entry(data) == entry
+        assert len(data) < len(json.dumps(entry)) / 3
+
+    def test_memory_tier_charged_uncompressed_size(self, isolated):
+        """测试内存缓存按未压缩的JSON长度计入，而不是压缩后的文件大小"""
+        handler = GitHubHandler()
+        tree = [{'path': f'src/module{i}.py', 'sha': 'a' * 40, 'size': i} for i in range(500)]
+        handler._save_to_cache('tree_user_repo_main', tree)
+        with open(handler._get_cache_path('tree_user_repo_main'), 'rb') as f:
+            data = f.read()
+
+        assert raw_size(data) > len(data) * 3
+        assert MemoryCache.shared().stats()['bytes'] == raw_size(data)
+        MemoryCache.shared().clear()
+        handler._get_cache_entry('tree_user_repo_main')
+        assert MemoryCache.shared().stats()['bytes'] == raw_size(data)
+
+    def test_level_zero_and_short_data_stored_plain(self):
+        """测试压缩级别为0或数据过短时原样存储"""
+        payload = b'x' * 1000
+        assert compress(payload, level=0)[HEADER_SIZE:] == payload
+        assert compress(b'short', level=9)[HEADER_SIZE:] == b'short'
+        assert decompress(compress(payload, level=0)) == payload
+
+    def test_rejects_unknown_format(self):
+        """测试无法识别的数据抛出格式异常"""
+        with pytest.raises(CacheFormatError):
+            decompress(b'{"timestamp": 1}')
+        with pytest.raises(CacheFormatError):
+            decompress(compress(b'abc')[:-1])
+
+    def test_migrates_legacy_json_files(self, isolated):
+        """测试旧版JSON缓存文件读取后转换为新格式"""
+        handler = GitHubHandler()
+        legacy_path = os.path.join(handler.cache_dir, 'repo_user_repo.json')
+        with open(legacy_path, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': time.time(), 'content': {'name': 'repo'}}, f)
+
+        assert handler._get_from_cache('repo', 'repo_user_repo') == {'name': 'repo'}
+        assert not os.path.exists(legacy_path)
+
+        MemoryCache.shared().clear()
+        with open(handler._get_cache_path('repo_user_repo'), 'rb') as f:
+            assert decode_entry(f.read())['content'] == {'name': 'repo'}
+
+    def test_corrupt_file_is_a_miss(self, isolated):
+        """测试损坏的缓存文件视为未命中"""
+        handler = GitHubHandler()
+        with open(handler._get_cache_path('repo_user_repo'), 'wb') as f:
+            f.write(b'garbage')
+        assert handler._get_cache_entry('repo_user_repo') is None
+
+    def test_blob_cache_compresses_and_reads_legacy_rows(self, tmp_path):
+        """测试blob内容压缩存储，旧版未压缩的条目仍可读取"""
+        cache = BlobCache(str(tmp_path / 'blobs.sqlite3'))
+        content = 'def handler():\n    return 1\n' * 200
+        cache.put('a' * 40, make_file_record('a.py', content, len(content)))
+        assert cache.get('a' * 40, 'a.py')['content'] == content
+        assert cache.stats()['bytes'] < len(content) / 4
+
+        cache._db.execute('INSERT INTO blobs VALUES (?, ?, ?, 0, ?, ?)',
+                          ('b' * 40, b'print(1)', 8, 48, time.time()))
+        assert cache.get('b' * 40, 'b.py') == make_file_record('b.py', 'print(1)', 8)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,106 @@
+import pytest
+import sys
+import os
+import time
+import sqlite3
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.cache_gc import CacheCollector
+from utils.cache_index import CacheIndex, compact_database
+from utils.blob_cache import BlobCache
+from utils.file_records import make_file_record
+from utils.github_handler import GitHubHandler
+
+
+class TestCacheCollector:
+    """测试缓存垃圾回收"""
+
+    def test_adopts_files_and_removes_broken_entries(self, isolated):
+        """测试登记索引之外的文件，删除丢失和损坏的条目以及遗留的临时文件"""
+        handler = GitHubHandler()
+        handler._save_to_cache('repo_user_repo', {'name': 'repo'})
+        handler._save_to_cache('repo_user_gone', {'name': 'gone'})
+        os.remove(handler._get_cache_path('repo_user_gone'))
+        with open(os.path.join('cache', 'tree_user_repo_main.cache'), 'wb') as f:
+            f.write(b'garbage')
+        with open(os.path.join('cache', 'repo_user_old.json'), 'w', encoding='utf-8') as f:
+            f.write('{"timestamp": 1, "content": {}}')
+        temp_path = os.path.join('cache', 'repo_user_repo.cache.1.tmp')
+        open(temp_path, 'wb').close()
+        os.utime(temp_path, (time.time() - 7200, time.time() - 7200))
+
+        stats = CacheCollector().run()
+
+        assert (stats['adopted'], stats['orphans'], stats['corrupt']) == (2, 1, 1)
+        assert CacheIndex.shared().keys() == {'repo_user_repo', 'repo_user_old'}
+        assert not os.path.exists(os.path.join('cache', 'tree_user_repo_main.cache'))
+        assert not os.path.exists(temp_path)
+
+        # 只在第一次执行时遍历目录
+        open(os.path.join('cache', 'repo_user_new.cache'), 'wb').close()
+        assert CacheCollector().run()['adopted'] == 0
+
+    def test_verifies_in_batches(self, isolated, monkeypatch):
+        """测试每次只校验一批条目，游标轮流覆盖全部条目"""
+        monkeypatch.setattr(Config, 'CACHE_GC_BATCH', 2)
+        handler = GitHubHandler()
+        for name in 'abc':
+            handler._save_to_cache(f'repo_user_{name}', {'name': name})
+        for name in 'abc':
+            os.remove(handler._get_cache_path(f'repo_user_{name}'))
+
+        collector = CacheCollector()
+        assert collector.run()['orphans'] == 2
+        assert collector.run()['orphans'] == 1
+        assert CacheIndex.shared().keys() == set()
+
+    def test_evicts_by_recency_and_refetch_cost(self, isolated, monkeypatch):
+        """测试超过预算时先淘汰久未访问、重新获取代价低的条目"""
+        monkeypatch.setattr(Config, 'CACHE_GC_COST_WEIGHT', 3600)
+        handler = GitHubHandler()
+        handler._save_to_cache('tree_user_big_main', [{'path': f'dir{i}/f.py'} for i in range(50)], cost=500)
+        handler._save_to_cache('repo_user_cheap', {'name': 'cheap'})
+        blobs = BlobCache.shared()
+        blobs.put('a' * 40, make_file_record('a.py', 'x' * 100, 100))
+        index = CacheIndex.shared()
+        old = time.time() - 600
+        for key in ('tree_user_big_main', 'repo_user_cheap'):
+            index.record(key, os.path.getsize(handler._get_cache_path(key)),
+                         500 if key.startswith('tree') else 1, last_access=old)
+        blobs._db.execute('UPDATE blobs SET last_access = ?', (old + 60,))
+        handler._save_to_cache('repo_user_recent', {'name': 'recent'})
+
+        total = index.total_bytes() + blobs.total_bytes()
+        stats = CacheCollector(max_bytes=total - 1).run()
+
+        assert stats['evicted'] == 1
+        assert 'repo_user_cheap' not in index.keys()
+        assert not os.path.exists(handler._get_cache_path('repo_user_cheap'))
+        assert {'tree_user_big_main', 'repo_user_recent'} <= index.keys()
+        assert blobs.contains(['a' * 40]) == {'a' * 40}
+
+    def test_compacts_blob_store(self, isolated):
+        """测试删除大量条目后回收数据库空闲页"""
+        blobs = BlobCache.shared()
+        for i in range(200):
+            blobs.put(f'{i:040d}', make_file_record('a.py', os.urandom(2000).hex(), 4000))
+        blobs.clear()
+
+        assert CacheCollector().run()['vacuumed_pages'] > 0
+
+
+    def test_legacy_database_not_rewritten(self, tmp_path):
+        """测试未启用增量清理的旧数据库不执行完整VACUUM（会阻塞读写）"""
+        db = sqlite3.connect(str(tmp_path / 'legacy.sqlite3'), isolation_level=None)
+        db.execute('CREATE TABLE t (data BLOB)')
+        db.executemany('INSERT INTO t VALUES (?)', [(os.urandom(4000),) for _ in range(50)])
+        db.execute('DELETE FROM t')
+        assert db.execute('PRAGMA freelist_count').fetchone()[0] > 0
+
+        assert compact_database(db, 1000) == 0
+        assert db.execute('PRAGMA auto_vacuum').fetchone()[0] == 0
+        db.close()
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
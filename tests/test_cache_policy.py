@@ -0,0 +1,122 @@
+import pytest
+import sys
+import os
+import time
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.cache_policy import CachePolicy, FRESH, STALE, EXPIRED
+from utils.blob_cache import BlobCache
+from utils.file_records import make_file_record
+from utils.github_handler import GitHubHandler
+from tests.mock_github_server import MockGitHubServer
+
+
+def age_entry(handler, key, seconds):
+    """将缓存条目的写入时间提前指定秒数"""
+    entry = handler._get_cache_entry(key)
+    handler._write_cache_entry(key, dict(entry, timestamp=entry['timestamp'] - seconds))
+
+
+@pytest.fixture
+def server(isolated, monkeypatch):
+    with MockGitHubServer({'main.py': b'print(1)'}) as mock:
+        monkeypatch.setattr(Config, 'GITHUB_API_URL', mock.url)
+        yield mock
+
+
+class TestCachePolicy:
+    """测试按种类的缓存过期策略"""
+
+    def test_classify(self):
+        """测试未过期、可返回旧值和已过期的判断"""
+        policy = CachePolicy(ttls={'repo': 10, 'blob': 0}, stale_window=20)
+        now = time.time()
+
+        assert policy.classify('repo', now - 5) == FRESH
+        assert policy.classify('repo', now - 15) == STALE
+        assert policy.classify('repo', now - 40) == EXPIRED
+        assert policy.classify('blob', 0) == FRESH
+        assert policy.classify('repo', now - 15, ttl=0) == FRESH
+        assert policy.classify('commit', now - 15, ttl=10) == EXPIRED
+
+    def test_refresh_runs_once_per_key(self):
+        """测试同一条目同时只刷新一次，失败计入刷新错误"""
+        policy = CachePolicy(stale_window=60)
+        release = threading.Event()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+
+        first = policy.refresh('key', slow, 'repo')
+        assert policy.refresh('key', slow, 'repo') is None
+        release.set()
+        first.result(5)
+
+        policy.refresh('key', lambda: 1 / 0, 'repo').result(5)
+        policy.shutdown()
+
+        assert len(calls) == 1
+        assert policy.stats()['repo']['refresh_errors'] == 1
+
+    def test_stale_tree_served_while_refreshing(self, server):
+        """测试按分支获取的文件树刚过期时立即返回旧值，后台刷新后返回新内容"""
+        handler = GitHubHandler()
+        handler.get_repository_tree('user', 'repo', 'main')
+        server.files['new.py'] = b'x = 1'
+        age_entry(handler, 'tree_user_repo_main', Config.CACHE_TTL_TREE + 1)
+
+        requests_before = len(server.requests)
+        assert [f['path'] for f in handler.get_repository_tree('user', 'repo', 'main')] == ['main.py']
+        CachePolicy.reset_all()  # 等待后台刷新完成
+
+        assert len(server.requests) == requests_before + 1
+        files = GitHubHandler().get_repository_tree('user', 'repo', 'main')
+        assert sorted(f['path'] for f in files) == ['main.py', 'new.py']
+        assert CachePolicy.shared().stats()['tree']['hits'] == 1
+
+    def test_expired_commit_resolved_again(self, server):
+        """测试分支解析出的提交过期后不返回旧值，推送后立即解析到新提交"""
+        handler = GitHubHandler()
+        old_commit = handler.get_commit_sha('user', 'repo', 'main')
+        server.files['new.py'] = b'x = 1'
+        age_entry(handler, 'commit_user_repo_main', Config.CACHE_TTL_COMMIT + 1)
+
+        new_commit = handler.get_commit_sha('user', 'repo', 'main')
+
+        assert new_commit == server.commit_sha() != old_commit
+        assert CachePolicy.shared().stats()['commit']['stale'] == 0
+
+    def test_tree_at_commit_never_expires(self, server):
+        """测试按提交SHA获取的文件树不会过期"""
+        handler = GitHubHandler()
+        commit = server.commit_sha()
+        handler.get_repository_tree('user', 'repo', commit)
+        age_entry(handler, f'tree_user_repo_{commit}', Config.CACHE_TTL_TREE + Config.CACHE_STALE_WINDOW + 1)
+
+        requests_before = len(server.requests)
+        handler.get_repository_tree('user', 'repo', commit)
+
+        assert len(server.requests) == requests_before
+        assert CachePolicy.shared().stats()['tree']['hits'] == 1
+
+    def test_blob_idle_ttl(self, isolated, monkeypatch):
+        """测试设置了blob TTL时长时间未访问的内容视为未命中"""
+        monkeypatch.setattr(Config, 'CACHE_TTL_BLOB', 60)
+        cache = BlobCache.shared()
+        cache.put('a' * 40, make_file_record('a.py', 'x', 1))
+        assert cache.get('a' * 40, 'a.py') is not None
+
+        cache._db.execute('UPDATE blobs SET last_access = ?', (time.time() - 120,))
+
+        assert cache.get('a' * 40, 'a.py') is None
+        assert cache.contains(['a' * 40]) == set()
+        stats = CachePolicy.shared().stats()['blob']
+        assert (stats['hits'], stats['misses'], stats['ttl']) == (1, 1, 60)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,73 @@
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.content_spool import ContentSpool
+from utils.file_processor import FileProcessor
+from utils.file_records import make_file_record, make_oversized_record
+from config import Config
+
+
+RECORDS = [
+    make_file_record('src/app.js', 'console.log(1)', 14),
+    make_file_record('README.md', '# 中文说明', 14),
+    make_file_record('empty.txt', '', 0),
+    make_oversized_record('big.bin', 5 * 1024 * 1024)
+]
+
+
+class TestContentSpool:
+    """测试导出内容磁盘暂存区"""
+
+    def test_round_trip(self, tmp_path):
+        """测试记录写入磁盘后按下标、顺序和路径顺序读回"""
+        with ContentSpool(str(tmp_path)) as spool:
+            spool.extend(RECORDS[:2])
+            assert spool[1] == RECORDS[1]
+            # 读取后继续追加，映射会随之更新
+            spool.extend(RECORDS[2:])
+
+            assert len(spool) == 4
+            assert list(spool) == RECORDS
+            assert spool.sorted_paths() == ['README.md', 'big.bin', 'empty.txt', 'src/app.js']
+            assert list(spool.iter_sorted()) == sorted(RECORDS, key=lambda r: r['path'])
+
+    def test_content_not_kept_in_memory(self, tmp_path):
+        """测试内存中只保留索引"""
+        with ContentSpool(str(tmp_path)) as spool:
+            spool.append(make_file_record('a.txt', 'x' * 100000, 100000))
+            assert all(len(str(entry)) < 200 for entry in spool._index)
+            assert spool[0]['content'] == 'x' * 100000
+
+    def test_write_merged_file_matches_merge(self, isolated, monkeypatch):
+        """测试从暂存区逐段写出的结果与内存合并一致"""
+        monkeypatch.setattr(Config, 'DOWNLOAD_FOLDER', str(isolated / 'downloads'))
+        processor = FileProcessor()
+        expected, _ = processor.merge_files_content(RECORDS, 'md', 'repo')
+
+        with ContentSpool(str(isolated)) as spool:
+            spool.extend(RECORDS)
+            saved = processor.write_merged_file(spool, 'md', 'repo', 'repo.md')
+
+        with open(saved['file_path'], encoding='utf-8') as f:
+            written = f.read()
+        # 生成时间可能相差一秒
+        assert written.splitlines()[3:] == expected.splitlines()[3:]
+        assert saved['file_size'] == len(written.encode('utf-8'))
+
+    def test_split_files_from_spool(self, isolated, monkeypatch):
+        """测试切分模式可以直接读取暂存区"""
+        monkeypatch.setattr(Config, 'DOWNLOAD_FOLDER', str(isolated / 'downloads'))
+
+        with ContentSpool(str(isolated)) as spool:
+            spool.extend(RECORDS)
+            saved = FileProcessor().save_split_files(spool, 'repo', 'md')
+
+        assert saved['file_count'] == 4
+        with open(os.path.join(saved['file_path'], 'part_1.md'), encoding='utf-8') as f:
+            assert '# 中文说明' in f.read()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
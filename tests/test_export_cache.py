@@ -0,0 +1,114 @@
+import pytest
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.export_cache import ExportCache
+from utils.cache_policy import CachePolicy
+from utils.github_handler import GitHubHandler, GitHubError
+from config import Config
+from tests.mock_github_server import MockGitHubServer
+
+
+PARAMS = {
+    'owner': 'User',
+    'repo': 'Repo',
+    'file_types': ['py', 'JS'],
+    'exclude_names': [],
+    'exclude_dirs': ['docs/', 'tests'],
+    'output_format': 'md',
+    'output_mode': 'single',
+    'use_default_filters': False
+}
+
+
+def write_artifact(name):
+    os.makedirs(Config.DOWNLOAD_FOLDER, exist_ok=True)
+    path = os.path.join(Config.DOWNLOAD_FOLDER, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('# repo')
+    return path
+
+
+class TestExportCache:
+    """测试按提交固定的导出结果缓存"""
+
+    def test_key_normalizes_params(self):
+        """测试参数顺序、大小写和多余的斜杠不影响缓存键"""
+        reordered = dict(PARAMS, owner='user', file_types=['js', 'py'], exclude_dirs=['tests', 'docs'],
+                         fetch_mode='archive')
+
+        assert ExportCache.make_key('abc', PARAMS) == ExportCache.make_key('abc', reordered)
+        assert ExportCache.make_key('abc', PARAMS) != ExportCache.make_key('def', PARAMS)
+        assert ExportCache.make_key('abc', PARAMS) != ExportCache.make_key('abc', dict(PARAMS, output_format='txt'))
+
+    def test_split_mode_only_applies_to_markdown(self):
+        """测试txt格式的拆分模式与单文件模式结果相同"""
+        txt = dict(PARAMS, output_format='txt')
+
+        assert ExportCache.make_key('abc', txt) == ExportCache.make_key('abc', dict(txt, output_mode='split'))
+        assert ExportCache.make_key('abc', PARAMS) != ExportCache.make_key('abc', dict(PARAMS, output_mode='split'))
+
+    def test_lookup_requires_artifact(self, isolated):
+        """测试结果只在产物仍存在时可复用"""
+        cache = ExportCache()
+        path = write_artifact('repo_merged.md')
+        os.utime(path, (time.time() - 600, time.time() - 600))
+        cache.complete('key', 'task-1', {'download_url': '/files/repo_merged.md', 'file_count': 2})
+
+        assert cache.lookup('key')['file_count'] == 2
+        assert os.path.getmtime(path) > time.time() - 60
+
+        os.remove(path)
+        assert cache.lookup('key') is None
+
+    def test_expire_evicts_cleaned_artifacts(self, isolated):
+        """测试产物被清理后，没有再被查询的结果也会被删除"""
+        cache = ExportCache()
+        write_artifact('kept.md')
+        removed = write_artifact('removed.md')
+        cache.complete('kept', 'task-1', {'download_url': '/files/kept.md'})
+        cache.complete('removed', 'task-2', {'download_url': '/files/removed.md'})
+
+        os.remove(removed)
+
+        assert cache.expire() == 1
+        assert list(cache._results) == ['kept']
+        assert cache.expire() == 0
+
+    def test_claim_dedupes_in_flight(self, isolated):
+        """测试相同导出进行中时关联到已有任务，结束后释放"""
+        cache = ExportCache()
+
+        assert cache.claim('key', 'task-1') is None
+        assert cache.claim('key', 'task-2') == 'task-1'
+
+        cache.release('key', 'task-1')
+        assert cache.claim('key', 'task-3') is None
+
+    def test_get_commit_sha(self, isolated, monkeypatch):
+        """测试将分支解析为提交SHA，缓存有效期内复用，过期后同步重新解析（不返回旧值）"""
+        with MockGitHubServer({'main.py': b'print(1)'}) as server:
+            monkeypatch.setattr(Config, 'GITHUB_API_URL', server.url)
+            handler = GitHubHandler()
+
+            first = handler.get_commit_sha('user', 'repo', 'main')
+            assert first == server.commit_sha()
+
+            server.files['new.py'] = b'x = 1'
+            assert handler.get_commit_sha('user', 'repo', 'main') == first
+
+            entry = handler._get_cache_entry('commit_user_repo_main')
+            handler._write_cache_entry('commit_user_repo_main',
+                                       dict(entry, timestamp=entry['timestamp'] - Config.CACHE_TTL_COMMIT - 1))
+            assert handler.get_commit_sha('user', 'repo', 'main') == server.commit_sha() != first
+            assert CachePolicy.shared().stats()['commit'] == dict(
+                hits=1, misses=2, stale=0, refresh_errors=0, ttl=Config.CACHE_TTL_COMMIT, hit_rate=0.333)
+
+            with pytest.raises(GitHubError, match="分支不存在"):
+                handler.get_commit_sha('user', 'repo', 'missing')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,77 @@
+import pytest
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.export_queue import ExportQueue, QueueFullError
+
+
+class TestExportQueue:
+    """测试导出执行器的并发上限和排队"""
+
+    def test_limits_workers_and_reports_positions(self):
+        """测试同时执行的任务数有限，排队任务按提交顺序报告位置"""
+        queue = ExportQueue(workers=2, max_queue=2)
+        release = threading.Event()
+        started = []
+        lock = threading.Lock()
+
+        def task(name):
+            with lock:
+                started.append(name)
+            release.wait(5)
+
+        queue.submit('a', task, 'a')
+        queue.submit('b', task, 'b')
+        while queue.stats()['running'] < 2:
+            pass
+        assert queue.submit('c', task, 'c') == 1
+        assert queue.submit('d', task, 'd') == 2
+
+        assert (queue.position('c'), queue.position('d'), queue.position('a')) == (1, 2, None)
+        assert sorted(started) == ['a', 'b']
+        assert queue.stats() == {'workers': 2, 'running': 2, 'queued': 2, 'max_queue': 2, 'waiting_memory': 0}
+
+        release.set()
+        queue.shutdown()
+        assert sorted(started) == ['a', 'b', 'c', 'd']
+
+    def test_rejects_when_full(self, monkeypatch):
+        """测试队列已满时拒绝提交并给出重试时间"""
+        monkeypatch.setattr(Config, 'EXPORT_RETRY_AFTER', 42)
+        queue = ExportQueue(workers=1, max_queue=1)
+        release = threading.Event()
+
+        queue.submit('a', release.wait, 5)
+        while not queue.stats()['running']:
+            pass
+        queue.submit('b', release.wait, 5)
+        assert queue.is_full()
+
+        with pytest.raises(QueueFullError) as error:
+            queue.submit('c', release.wait, 5)
+        assert error.value.retry_after == 42
+
+        release.set()
+        queue.shutdown()
+
+    def test_failing_task_does_not_stop_worker(self):
+        """测试任务抛出异常后工作线程继续执行后续任务"""
+        queue = ExportQueue(workers=1, max_queue=5)
+        done = []
+
+        def fail():
+            raise ValueError('boom')
+
+        queue.submit('a', fail)
+        queue.submit('b', done.append, 'b')
+        queue.shutdown()
+
+        assert done == ['b']
+        assert queue.retry_after() >= 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -158,6 +158,43 @@ class TestFileProcessor:
         assert filtered[0]['name'] == 'main.py'
         assert filtered[1]['name'] == 'app.js'
     
+    def test_plan_fetch(self):
+        """测试根据树信息规划获取，超大文件和二进制文件直接生成占位"""
+        processor = FileProcessor()
+        max_size = int(Config.MAX_SINGLE_FILE_SIZE_MB * 1024 * 1024)
+        
+        files = [
+            {'name': 'main.py', 'path': 'main.py', 'type': 'file', 'size': 100},
+            {'name': 'big.py', 'path': 'big.py', 'type': 'file', 'size': max_size + 1},
+            {'name': 'logo.PNG', 'path': 'img/logo.PNG', 'type': 'file', 'size': 2048},
+            {'name': 'dist.tar.gz', 'path': 'dist.tar.gz', 'type': 'file', 'size': 10}
+        ]
+        
+        plan = processor.plan_fetch(files)
+        
+        assert [f['path'] for f in plan['fetch']] == ['main.py']
+        placeholders = {r['path']: r for r in plan['placeholders']}
+        assert placeholders['big.py']['is_oversized'] is True
+        assert placeholders['img/logo.PNG']['is_binary'] is True
+        assert placeholders['dist.tar.gz']['is_binary'] is True
+        assert plan['stats']['saved_api_calls'] == 3
+        assert plan['stats']['saved_bytes'] == max_size + 1 + 2048 + 10
+    
+    def test_plan_fetch_keeps_text_and_requested_types(self):
+        """测试 .svg、.lock 等文本格式以及 file_types 中指定的扩展名照常获取"""
+        files = [
+            {'name': 'Cargo.lock', 'path': 'Cargo.lock', 'type': 'file', 'size': 100},
+            {'name': 'logo.svg', 'path': 'img/logo.svg', 'type': 'file', 'size': 100},
+            {'name': 'icon.png', 'path': 'img/icon.png', 'type': 'file', 'size': 100}
+        ]
+        
+        plan = FileProcessor(file_types=['lock', 'svg']).plan_fetch(files)
+        assert [f['path'] for f in plan['fetch']] == ['Cargo.lock', 'img/logo.svg']
+        assert [r['path'] for r in plan['placeholders']] == ['img/icon.png']
+        
+        plan = FileProcessor(file_types=['png']).plan_fetch(files)
+        assert len(plan['fetch']) == 3
+    
     def test_generate_output_filename(self):
         """测试输出文件名生成"""
         processor = FileProcessor()
@@ -0,0 +1,114 @@
+import pytest
+import sys
+import os
+import subprocess
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import git_fetcher
+from utils.git_fetcher import GitFetcher, GitFetchError
+from utils.file_processor import FileProcessor
+from utils.github_handler import GitHubHandler
+from config import Config
+from tests.mock_github_server import MockGitHubServer
+
+pytestmark = pytest.mark.skipif(not git_fetcher.is_available(), reason="需要安装git")
+
+
+FILES = {
+    'main.py': b'print("Hello")',
+    'src/app.js': b'console.log(1)',
+    'src/util.js': b'console.log(1)',
+    'docs/readme.md': '# 中文说明'.encode('utf-8'),
+    'logo.bin': b'\xff\xfe\x00\x01',
+    'big.txt': b'x' * 2048
+}
+
+
+def git(cwd, *args):
+    env = dict(os.environ, GIT_AUTHOR_NAME='t', GIT_AUTHOR_EMAIL='t@t',
+               GIT_COMMITTER_NAME='t', GIT_COMMITTER_EMAIL='t@t')
+    return subprocess.run(['git', '-C', str(cwd), *args], check=True, capture_output=True, env=env).stdout
+
+
+@pytest.fixture
+def bare_repo(tmp_path, monkeypatch):
+    """在 tmp/user/repo.git 创建支持部分克隆的本地裸仓库，通过 file:// 访问"""
+    source = tmp_path / 'source'
+    for path, data in FILES.items():
+        (source / path).parent.mkdir(parents=True, exist_ok=True)
+        (source / path).write_bytes(data)
+    git(tmp_path, 'init', '-q', '-b', 'main', str(source))
+    git(source, 'add', '.')
+    git(source, 'commit', '-q', '-m', 'init')
+
+    bare = tmp_path / 'user' / 'repo.git'
+    git(tmp_path, 'clone', '-q', '--bare', str(source), str(bare))
+    git(bare, 'config', 'uploadpack.allowFilter', 'true')
+    git(bare, 'config', 'uploadpack.allowAnySHA1InWant', 'true')
+
+    monkeypatch.setattr(Config, 'GIT_CLONE_URL', f'file://{tmp_path}/{{owner}}/{{repo}}.git')
+    return {'path': bare, 'commit': git(source, 'rev-parse', 'HEAD').decode().strip()}
+
+
+class TestGitFetcher:
+    """测试git部分克隆获取引擎"""
+
+    def test_iter_files(self, bare_repo):
+        """测试获取全部文件并生成与其他引擎一致的记录"""
+        records = {r['path']: r for r in GitFetcher().iter_files('user', 'repo', 'main')}
+
+        assert sorted(records) == sorted(FILES)
+        assert records['main.py'] == {
+            'path': 'main.py', 'content': 'print("Hello")', 'size': 14, 'is_binary': False, 'is_oversized': False
+        }
+        assert records['docs/readme.md']['content'] == '# 中文说明'
+        assert records['logo.bin']['is_binary'] is True
+
+    def test_fetches_only_selected_blobs(self, bare_repo, monkeypatch):
+        """测试只获取过滤后需要的blob，内容相同的文件只获取一次，超大文件生成占位"""
+        monkeypatch.setattr(Config, 'MAX_SINGLE_FILE_SIZE_MB', 0.001)
+        fetcher = GitFetcher()
+        processor = FileProcessor(exclude_dirs=['docs'], file_types=['js', 'txt'])
+
+        records = {r['path']: r for r in fetcher.iter_files('user', 'repo', bare_repo['commit'], processor)}
+
+        assert sorted(records) == ['big.txt', 'src/app.js', 'src/util.js']
+        assert records['big.txt']['is_oversized'] is True
+        assert records['src/util.js']['content'] == 'console.log(1)'
+        assert fetcher.stats == {'tree_files': len(FILES), 'selected_blobs': 2, 'fetched_blobs': 2}
+
+    def test_wanted_paths(self, bare_repo):
+        """测试只返回指定路径"""
+        records = list(GitFetcher().iter_files('user', 'repo', 'main', wanted_paths=['main.py']))
+
+        assert [r['path'] for r in records] == ['main.py']
+
+    def test_missing_ref(self, bare_repo):
+        """测试分支不存在"""
+        with pytest.raises(GitFetchError, match="git fetch 失败"):
+            list(GitFetcher().iter_files('user', 'repo', 'missing'))
+
+    def test_same_records_as_api(self, isolated, bare_repo, monkeypatch):
+        """测试git获取方式与逐个文件API获取的结果一致"""
+        with MockGitHubServer(FILES) as server:
+            monkeypatch.setattr(Config, 'GITHUB_API_URL', server.url)
+            handler = GitHubHandler()
+            paths = sorted(FILES)
+
+            api_records = handler.get_file_content_batch('user', 'repo', paths, 'main')
+            git_records = handler.get_file_content_git('user', 'repo', branch='main', file_paths=paths)
+
+        assert sorted(api_records, key=lambda r: r['path']) == sorted(git_records, key=lambda r: r['path'])
+
+    def test_token_not_in_command_line(self):
+        """测试Token只通过环境变量传给git，且只用于https地址"""
+        fetcher = GitFetcher(token='secret-token')
+
+        env = fetcher._env('https://github.com/user/repo.git')
+        assert env['GIT_CONFIG_KEY_0'] == 'http.extraHeader'
+        assert env['GIT_CONFIG_VALUE_0'].startswith('Authorization: Basic ')
+        assert 'GIT_CONFIG_KEY_0' not in fetcher._env('file:///tmp/user/repo.git')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
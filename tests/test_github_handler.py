@@ -0,0 +1,256 @@
+import pytest
+import sys
+import os
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.github_handler import GitHubHandler, GitHubError
+from utils.file_processor import FileProcessor
+from utils.file_records import make_file_record, make_error_record, StreamDecoder
+from utils.memory_cache import MemoryCache
+from utils.cache_codec import encode_entry, decode_entry
+from config import Config
+from tests.mock_github_server import MockGitHubServer
+
+
+FILES = {
+    'main.py': b'print("Hello")',
+    'src/app.js': b'console.log(1)'
+}
+
+
+@pytest.fixture
+def server(isolated, monkeypatch):
+    with MockGitHubServer(dict(FILES)) as mock:
+        monkeypatch.setattr(Config, 'GITHUB_API_URL', mock.url)
+        yield mock
+
+
+def expire_cache(handler, key):
+    """将缓存条目的时间戳改为过期（超出可返回旧值的时长）"""
+    path = handler._get_cache_path(key)
+    with open(path, 'rb') as f:
+        entry = decode_entry(f.read())
+    entry['timestamp'] -= Config.CACHE_STALE_WINDOW + 3600
+    with open(path, 'wb') as f:
+        f.write(encode_entry(entry))
+    # 直接修改了磁盘文件，丢弃内存中的副本
+    MemoryCache.shared().discard(os.path.abspath(path))
+
+
+class CountingSink:
+    """只计数不保留记录的结果容器，模拟写入磁盘暂存区"""
+
+    def __init__(self):
+        self.count = 0
+
+    def append(self, record):
+        self.count += 1
+
+
+class TestGitHubHandler:
+    """测试GitHub处理器"""
+
+    def test_get_repo_info(self, server):
+        """测试获取仓库信息"""
+        info = GitHubHandler().get_repo_info('user', 'repo')
+
+        assert info['full_name'] == 'user/repo'
+        assert info['default_branch'] == 'main'
+        assert info['private'] is False
+
+    def test_get_repo_info_too_large(self, server, monkeypatch):
+        """测试仓库大小超过限制"""
+        monkeypatch.setattr(Config, 'MAX_REPO_SIZE_MB', 0)
+        server.files['big.bin'] = b'x' * 4096
+
+        with pytest.raises(GitHubError, match="超过限制"):
+            GitHubHandler().get_repo_info('user', 'repo')
+
+    def test_repo_info_revalidates_with_etag(self, server):
+        """测试仓库信息缓存过期后使用条件请求续期"""
+        handler = GitHubHandler()
+        first = handler.get_repo_info('user', 'repo')
+        expire_cache(handler, 'repo_user_repo')
+
+        # 新的导出上下文才会重新读取缓存
+        second = GitHubHandler().get_repo_info('user', 'repo')
+
+        assert second == first
+        assert server.not_modified == 1
+        assert handler._get_from_cache('repo', 'repo_user_repo') == first
+
+    def test_tree_revalidates_with_etag(self, server):
+        """测试文件树未变化时返回304，变化后重新获取"""
+        handler = GitHubHandler()
+        files = handler.get_repository_tree('user', 'repo', 'main')
+        assert sorted(f['path'] for f in files) == ['main.py', 'src/app.js']
+
+        expire_cache(handler, 'tree_user_repo_main')
+        assert handler.get_repository_tree('user', 'repo', 'main') == files
+        assert server.not_modified == 1
+
+        server.files['new.py'] = b'x = 1'
+        expire_cache(handler, 'tree_user_repo_main')
+        files = handler.get_repository_tree('user', 'repo', 'main')
+        assert sorted(f['path'] for f in files) == ['main.py', 'new.py', 'src/app.js']
+        assert server.not_modified == 1
+
+    def test_export_context_resolves_repo_once(self, server):
+        """测试同一导出上下文只请求一次仓库信息，客户端在导出之间共享"""
+        handler = GitHubHandler()
+        handler.get_repository_tree('user', 'repo')
+        handler.get_file_content_batch('user', 'repo', ['main.py'])
+
+        assert server.requests.count('/repos/user/repo') == 1
+        assert GitHubHandler().github is handler.github
+
+    def test_fetches_raw_content(self, server, monkeypatch):
+        """测试以原始字节获取文件内容，超大文件和二进制文件在读取时识别"""
+        monkeypatch.setattr(Config, 'MAX_SINGLE_FILE_SIZE_MB', 0.001)
+        server.files['docs/中文.md'] = '# 说明'.encode('utf-8')
+        server.files['big.txt'] = b'x' * 4096
+        server.files['logo.bin'] = b'\xff\xfe\x00\x01'
+
+        records = GitHubHandler().get_file_content_batch(
+            'user', 'repo', ['main.py', 'docs/中文.md', 'big.txt', 'logo.bin'], 'main'
+        )
+        records = {r['path']: r for r in records}
+
+        assert server.raw_requests == 4
+        assert records['main.py']['content'] == 'print("Hello")'
+        assert records['docs/中文.md']['content'] == '# 说明'
+        assert records['big.txt']['is_oversized'] is True
+        assert records['big.txt']['size'] == 4096
+        assert records['logo.bin']['is_binary'] is True
+
+    def test_stream_decoder(self):
+        """测试增量解码跨块的多字节字符，超过上限时停止读取"""
+        data = '中文内容'.encode('utf-8')
+        decoder = StreamDecoder('a.md', max_size=100)
+        for i in range(len(data)):
+            assert decoder.feed(data[i:i + 1])
+        assert decoder.record()['content'] == '中文内容'
+
+        decoder = StreamDecoder('b.txt', max_size=4)
+        assert decoder.feed(b'abc')
+        assert not decoder.feed(b'de')
+        record = decoder.record(1000)
+        assert record['is_oversized'] is True
+        assert record['size'] == 1000
+
+        decoder = StreamDecoder('c.txt', max_size=100)
+        assert decoder.feed(b'ab\xe4')
+        assert decoder.record()['is_binary'] is True
+
+    def test_truncated_tree_walks_subtrees(self, server):
+        """测试递归树被截断时遍历子树补全文件列表"""
+        server.files.update({
+            f'pkg/mod_{i}/file_{j}.py': b'x = 1' for i in range(3) for j in range(3)
+        })
+        server.files['pkg/deep/a/b/c.py'] = b'y = 2'
+        server.truncate_after = 5
+
+        files = GitHubHandler().get_repository_tree('user', 'repo', 'main')
+
+        assert sorted(f['path'] for f in files) == sorted(server.files)
+        sub = next(f for f in files if f['path'] == 'pkg/deep/a/b/c.py')
+        assert sub['name'] == 'c.py'
+        assert sub['sha'] == MockGitHubServer.blob_sha(b'y = 2')
+
+    def test_truncated_tree_skips_excluded_dirs(self, server):
+        """测试遍历子树时不进入排除目录，结果按排除目录单独缓存"""
+        server.files.update({f'node_modules/lib_{i}/index.js': b'1' for i in range(5)})
+        server.truncate_after = 3
+        processor = FileProcessor(exclude_dirs=['node_modules'])
+        handler = GitHubHandler()
+
+        files = handler.get_repository_tree('user', 'repo', 'main', processor)
+
+        assert sorted(f['path'] for f in files) == ['main.py', 'src/app.js']
+        assert not any(MockGitHubServer.tree_sha('node_modules') in path for path in server.requests)
+
+        requests_before = len(server.requests)
+        assert handler.get_repository_tree('user', 'repo', 'main', processor) == files
+        assert len(server.requests) == requests_before
+        assert handler._get_cache_entry('tree_user_repo_main') is None
+
+    def test_incremental_export_reuses_unchanged_files(self, server):
+        """测试增量导出只重新获取内容变化的文件"""
+        handler = GitHubHandler()
+        files = handler.get_repository_tree('user', 'repo', 'main')
+        assert handler.plan_incremental('user', 'repo', 'filters', files) == ([], files, None)
+
+        base_commit = server.commit_sha()
+        records = handler.get_file_content_batch('user', 'repo', [f['path'] for f in files], 'main')
+        handler.save_export_snapshot('user', 'repo', 'filters', base_commit, files, records)
+
+        server.files['src/app.js'] = b'console.log(2)'
+        server.files['new.py'] = b'x = 1'
+        expire_cache(handler, 'tree_user_repo_main')
+        handler = GitHubHandler()
+        files = handler.get_repository_tree('user', 'repo', 'main')
+
+        reused, to_fetch, commit = handler.plan_incremental('user', 'repo', 'filters', files)
+
+        assert commit == base_commit
+        assert [f['path'] for f in reused] == ['main.py']
+        assert sorted(f['path'] for f in to_fetch) == ['new.py', 'src/app.js']
+        assert handler.plan_incremental('user', 'repo', 'other', files)[2] is None
+
+        loaded = []
+        assert handler.load_cached_records(reused, loaded) == []
+        assert loaded[0]['content'] == 'print("Hello")'
+
+    def test_snapshot_skips_failed_files(self, server):
+        """测试获取失败的文件不写入内容缓存"""
+        handler = GitHubHandler()
+        files = handler.get_repository_tree('user', 'repo', 'main')
+        records = [
+            make_file_record('main.py', 'print("Hello")', 14),
+            make_error_record('src/app.js', '[获取文件内容失败: HTTP 500]')
+        ]
+        handler.save_export_snapshot('user', 'repo', 'filters', 'abc', files, records)
+
+        reused, to_fetch, _ = handler.plan_incremental('user', 'repo', 'filters', files)
+
+        assert [r['path'] for r in reused] == ['main.py']
+        assert [f['path'] for f in to_fetch] == ['src/app.js']
+
+    def test_blob_cache_shared_across_branches(self, server):
+        """测试内容按blob SHA缓存，其他分支或fork中相同的文件不再请求"""
+        handler = GitHubHandler()
+        files = handler.get_repository_tree('user', 'repo', 'main')
+        handler.get_file_content_batch('user', 'repo', [f['path'] for f in files], 'main')
+        assert server.raw_requests == 2
+
+        # 模拟fork：路径和仓库不同，但blob SHA相同
+        fork = GitHubHandler()
+        fork._blob_shas[('other', 'fork', 'lib/main.py')] = next(f['sha'] for f in files if f['path'] == 'main.py')
+        record = fork.get_file_content_batch('other', 'fork', ['lib/main.py'], 'dev')[0]
+
+        assert record == make_file_record('lib/main.py', 'print("Hello")', 14)
+        assert server.raw_requests == 2
+
+    def test_batch_memory_bounded_by_window(self, isolated, monkeypatch):
+        """测试批量获取只保留窗口内的结果，内存峰值远小于内容总量"""
+        monkeypatch.setattr(Config, 'CONCURRENT_REQUESTS', 4)
+        size = 128 * 1024
+        paths = [f'src/file_{i}.txt' for i in range(100)]
+        handler = GitHubHandler(engine='thread')
+        monkeypatch.setattr(handler, '_fetch_file_content',
+                            lambda path, branch, owner, repo_name: make_file_record(path, 'x' * size, size))
+        sink = CountingSink()
+
+        tracemalloc.start()
+        try:
+            handler.get_file_content_batch('user', 'repo', paths, 'main', results=sink)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        assert sink.count == len(paths)
+        assert peak < size * len(paths) / 4
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,146 @@
+import pytest
+import sys
+import os
+import time
+import threading
+import tracemalloc
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.memory_budget import MemoryBudget, estimate_export_memory, fetch_window, current_rss, PER_FILE_OVERHEAD
+from utils.export_queue import ExportQueue
+from utils.content_spool import ContentSpool
+from utils.file_records import make_file_record
+from utils.github_handler import GitHubHandler
+
+
+def staged(queue, log, name, nbytes, hold=None):
+    """第一阶段立即结束，把需要 nbytes 配额的第二阶段交回执行器"""
+    def second():
+        log.append(name)
+        if hold is not None:
+            hold.wait(5)
+
+    def first():
+        queue.defer(name, nbytes, second)
+    return first
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class TestMemoryBudget:
+    """测试按内存估计的任务准入"""
+
+    def test_estimate_from_tree_sizes(self, monkeypatch):
+        """测试估计值由最大的若干文件（按单文件上限截断）和文件数量决定"""
+        monkeypatch.setattr(Config, 'MAX_SINGLE_FILE_SIZE_MB', 1)
+        monkeypatch.setattr(Config, 'EXPORT_MEMORY_BASE_MB', 1)
+        monkeypatch.setattr(Config, 'EXPORT_MEMORY_FACTOR', 2)
+        files = [{'size': 100}, {'size': 5 * 1024 * 1024}, {'size': 300}, {}]
+
+        expected = 1024 * 1024 + 4 * PER_FILE_OVERHEAD + (1024 * 1024 + 300) * 2
+        assert estimate_export_memory(files, window=2) == expected
+
+    def test_window_follows_fetch_engine(self, monkeypatch):
+        """测试同时获取的文件数按获取方式和引擎的并发数计算"""
+        monkeypatch.setattr(Config, 'CONCURRENT_REQUESTS', 10)
+        monkeypatch.setattr(Config, 'ASYNC_CONCURRENCY', 200)
+
+        assert fetch_window('api', 'thread') == 20
+        assert fetch_window('api', 'async') == 400
+        assert fetch_window('archive', 'async') == 1
+        assert fetch_window('git') == 1
+
+    def test_estimate_covers_measured_peak(self, isolated, monkeypatch):
+        """测试估计值不低于实际获取并写入暂存区时测得的内存峰值，且远小于内容总量"""
+        monkeypatch.setattr(Config, 'CONCURRENT_REQUESTS', 4)
+        monkeypatch.setattr(Config, 'EXPORT_MEMORY_BASE_MB', 1)
+        files = [{'path': f'src/file_{i}.txt', 'size': (i % 10 + 1) * 32 * 1024} for i in range(300)]
+        sizes = {f['path']: f['size'] for f in files}
+
+        def fetch(path, branch, owner, repo_name):
+            # 与实际获取相同：原始字节解码为文本后构造记录
+            data = b'x' * sizes[path]
+            return make_file_record(path, data.decode('utf-8'), len(data))
+
+        handler = GitHubHandler(engine='thread')
+        monkeypatch.setattr(handler, '_fetch_file_content', fetch)
+        estimate = estimate_export_memory(files, fetch_window('api', 'thread'))
+
+        with ContentSpool(str(isolated)) as spool:
+            tracemalloc.start()
+            try:
+                handler.get_file_content_batch('user', 'repo', list(sizes), 'main', results=spool)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            assert len(spool) == len(files)
+
+        assert peak <= estimate
+        assert estimate < sum(sizes.values()) / 4
+
+    def test_try_acquire_clamps_to_budget(self):
+        """测试配额不足时不占用，超过整个预算的任务按整个预算计"""
+        budget = MemoryBudget(max_bytes=100)
+        assert budget.try_acquire(60)
+        assert not budget.try_acquire(80)
+        budget.release(60)
+        assert budget.try_acquire(500)
+        assert budget.stats() == {'budget_bytes': 100, 'used_bytes': 100}
+        budget.release(500)
+        assert budget.stats()['used_bytes'] == 0
+
+    def test_small_tasks_pass_waiting_large_task(self):
+        """测试大任务等待配额时不占用工作线程，小任务仍可执行，配额归还后大任务开始"""
+        budget = MemoryBudget(max_bytes=100)
+        # 一个工作线程被第一个任务占用，只剩一个工作线程
+        queue = ExportQueue(workers=2, max_queue=5, memory_budget=budget)
+        hold = threading.Event()
+        log = []
+
+        queue.submit('first', staged(queue, log, 'first', 60, hold))
+        wait_until(lambda: log == ['first'])
+        queue.submit('large', staged(queue, log, 'large', 80))
+        wait_until(lambda: queue.stats()['waiting_memory'] == 1)
+        queue.submit('small', staged(queue, log, 'small', 30))
+        wait_until(lambda: 'small' in log)
+        assert log == ['first', 'small']
+
+        hold.set()
+        queue.shutdown()
+        assert log == ['first', 'small', 'large']
+        assert budget.stats()['used_bytes'] == 0
+
+    def test_long_waiter_blocks_newcomers(self, monkeypatch):
+        """测试最早等待配额的任务等待过久后，其他需要配额的任务不再插队"""
+        monkeypatch.setattr(Config, 'EXPORT_MEMORY_MAX_WAIT', 0)
+        budget = MemoryBudget(max_bytes=100)
+        queue = ExportQueue(workers=2, max_queue=5, memory_budget=budget)
+        hold = threading.Event()
+        log = []
+
+        queue.submit('first', staged(queue, log, 'first', 60, hold))
+        wait_until(lambda: log == ['first'])
+        queue.submit('large', staged(queue, log, 'large', 80))
+        wait_until(lambda: queue.stats()['waiting_memory'] == 1)
+        queue.submit('small', staged(queue, log, 'small', 30))
+        wait_until(lambda: queue.stats()['waiting_memory'] == 2)
+        time.sleep(0.1)
+        assert log == ['first']
+
+        hold.set()
+        queue.shutdown()
+        assert log == ['first', 'large', 'small']
+
+    def test_current_rss(self):
+        """测试读取当前进程的常驻内存"""
+        rss = current_rss()
+        assert rss is None or rss > 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,73 @@
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.memory_cache import MemoryCache
+from utils.github_handler import GitHubHandler
+
+
+class TestMemoryCache:
+    """测试进程内LRU缓存"""
+
+    def test_evicts_by_entry_count(self):
+        """测试超过条目数时淘汰最久未使用的条目"""
+        cache = MemoryCache(max_entries=2, max_bytes=1000)
+        cache.put('a', 1, 10)
+        cache.put('b', 2, 10)
+        assert cache.get('a') == 1
+        cache.put('c', 3, 10)
+
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert cache.stats()['evictions'] == 1
+
+    def test_evicts_by_bytes(self):
+        """测试超过字节上限时淘汰，单个过大的条目不缓存"""
+        cache = MemoryCache(max_entries=10, max_bytes=100)
+        cache.put('a', 1, 60)
+        cache.put('b', 2, 60)
+        cache.put('huge', 3, 200)
+
+        assert cache.get('a') is None
+        assert cache.get('b') == 2
+        assert cache.get('huge') is None
+        assert cache.stats()['bytes'] == 60
+
+    def test_replace_updates_size(self):
+        """测试覆盖写入时更新占用字节数"""
+        cache = MemoryCache(max_entries=10, max_bytes=100)
+        cache.put('a', 1, 60)
+        cache.put('a', 2, 30)
+
+        assert cache.get('a') == 2
+        assert cache.stats()['bytes'] == 30
+
+    def test_counters(self):
+        """测试命中和未命中计数"""
+        cache = MemoryCache(max_entries=10, max_bytes=100)
+        cache.put('a', 1, 1)
+        cache.get('a')
+        cache.get('missing')
+
+        stats = cache.stats()
+        assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+    def test_handler_reads_through_and_writes_through(self, isolated):
+        """测试处理器写入时同步写入内存，命中后不再读取磁盘"""
+        handler = GitHubHandler()
+        handler._save_to_cache('repo_user_repo', {'name': 'repo'})
+        os.remove(handler._get_cache_path('repo_user_repo'))
+
+        assert handler._get_from_cache('repo', 'repo_user_repo') == {'name': 'repo'}
+
+        # 其他处理器写入的磁盘文件在未命中时读入内存
+        handler._save_to_cache('tree_user_repo_main', [])
+        MemoryCache.shared().clear()
+        assert GitHubHandler()._get_cache_entry('tree_user_repo_main')['content'] == []
+        assert MemoryCache.shared().stats()['entries'] == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,101 @@
+import pytest
+import sys
+import os
+import time
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limiter import RateLimiter, RateLimitExceeded
+
+
+class TestRateLimiter:
+    """测试共享令牌桶速率限制器"""
+
+    def test_allows_burst(self):
+        """测试桶内有令牌时不阻塞"""
+        limiter = RateLimiter(rate=1, burst=5)
+
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.acquire()
+
+        assert time.monotonic() - start < 0.5
+
+    def test_throttles_after_burst(self):
+        """测试令牌耗尽后按补充速率放行"""
+        limiter = RateLimiter(rate=20, burst=1)
+
+        start = time.monotonic()
+        for _ in range(3):
+            limiter.acquire()
+
+        assert time.monotonic() - start >= 0.09
+
+    def test_update_from_headers(self):
+        """测试从响应头更新额度"""
+        limiter = RateLimiter(rate=100, burst=10)
+        reset = int(time.time()) + 3600
+        limiter.update_from_headers({
+            'X-RateLimit-Limit': '5000',
+            'X-RateLimit-Remaining': '4999',
+            'X-RateLimit-Reset': str(reset)
+        })
+        limiter.acquire()
+
+        snapshot = limiter.snapshot()
+        assert snapshot['known'] is True
+        assert snapshot['limit'] == 5000
+        assert snapshot['remaining'] == 4998
+        assert snapshot['reset'] == reset
+
+    def test_exhausted_budget_raises_when_reset_too_far(self):
+        """测试额度耗尽且重置时间超过等待上限时抛出异常"""
+        limiter = RateLimiter(rate=100, burst=10, max_wait=1)
+        limiter.update(remaining=0, limit=60, reset=time.time() + 3600)
+
+        with pytest.raises(RateLimitExceeded):
+            limiter.acquire()
+
+    def test_exhausted_budget_waits_for_reset(self):
+        """测试额度耗尽时等待到重置时间后恢复"""
+        limiter = RateLimiter(rate=100, burst=10, max_wait=5)
+        limiter.update(remaining=0, limit=60, reset=time.time() + 0.2)
+
+        limiter.acquire()
+
+        assert limiter.snapshot()['remaining'] == 59
+
+    def test_exhausted_budget_without_known_reset_does_not_hang(self):
+        """测试额度耗尽但重置时间未知，或已过重置时间且上限未知时不会一直等待"""
+        limiter = RateLimiter(rate=100, burst=10, max_wait=5)
+        limiter.update(remaining=0)
+        started = time.monotonic()
+        limiter.acquire()
+        assert limiter.snapshot()['remaining'] is None
+
+        limiter.update(remaining=0, reset=time.time() - 1)
+        limiter.acquire()
+        assert time.monotonic() - started < 1
+
+    def test_thread_safe_budget(self):
+        """测试多线程并发获取时额度计数准确"""
+        limiter = RateLimiter(rate=1000, burst=100)
+        limiter.update(remaining=100, limit=100, reset=time.time() + 3600)
+
+        threads = [threading.Thread(target=lambda: [limiter.acquire() for _ in range(10)]) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert limiter.snapshot()['remaining'] == 0
+
+    def test_for_token_shares_instance(self):
+        """测试同一Token共享同一个限制器"""
+        RateLimiter.reset_all()
+        assert RateLimiter.for_token('abc') is RateLimiter.for_token('abc')
+        assert RateLimiter.for_token('abc') is not RateLimiter.for_token(None)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
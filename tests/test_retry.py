@@ -0,0 +1,108 @@
+import pytest
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github import GithubException
+from utils.retry import RetryPolicy, RetryBudget, RetryableHTTPError, retry_after_seconds
+
+
+class Flaky:
+    """前 failures 次调用抛出指定异常，之后返回成功"""
+
+    def __init__(self, error, failures):
+        self.error = error
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return 'ok'
+
+
+class TestRetryPolicy:
+    """测试重试策略"""
+
+    def make_policy(self, **kwargs):
+        delays = []
+        kwargs.setdefault('max_attempts', 3)
+        kwargs.setdefault('base_delay', 1)
+        kwargs.setdefault('max_delay', 60)
+        policy = RetryPolicy(sleep=delays.append, **kwargs)
+        return policy, delays
+
+    def test_retries_server_errors(self):
+        """测试5xx错误重试后成功"""
+        policy, delays = self.make_policy()
+        func = Flaky(RetryableHTTPError('HTTP 502', 502), failures=2)
+
+        assert policy.call(func) == 'ok'
+        assert func.calls == 3
+        assert len(delays) == 2
+        assert all(0 <= d <= 2 for d in delays)
+
+    def test_gives_up_after_max_attempts(self):
+        """测试超过最大尝试次数后抛出原异常"""
+        policy, delays = self.make_policy(max_attempts=2)
+        func = Flaky(RetryableHTTPError('HTTP 500', 500), failures=5)
+
+        with pytest.raises(RetryableHTTPError):
+            policy.call(func)
+        assert func.calls == 2
+
+    def test_does_not_retry_client_errors(self):
+        """测试404和普通403不重试"""
+        policy, delays = self.make_policy()
+        not_found = Flaky(GithubException(404, {'message': 'Not Found'}, {}), failures=1)
+        forbidden = Flaky(GithubException(403, {'message': 'Resource not accessible'}, {}), failures=1)
+
+        with pytest.raises(GithubException):
+            policy.call(not_found)
+        with pytest.raises(GithubException):
+            policy.call(forbidden)
+        assert not_found.calls == 1 and forbidden.calls == 1
+        assert delays == []
+
+    def test_respects_retry_after(self):
+        """测试遵循 Retry-After 响应头"""
+        policy, delays = self.make_policy()
+        error = GithubException(403, {'message': 'You have exceeded a secondary rate limit'}, {'retry-after': '5'})
+
+        assert policy.call(Flaky(error, failures=1)) == 'ok'
+        assert delays[0] >= 5
+
+    def test_gives_up_when_retry_after_too_long(self):
+        """测试服务端要求等待超过上限时直接放弃，不阻塞工作线程"""
+        policy, delays = self.make_policy(max_delay=10)
+        reset = str(int(time.time()) + 3600)
+        error = GithubException(403, {'message': 'API rate limit exceeded'},
+                                {'x-ratelimit-remaining': '0', 'x-ratelimit-reset': reset})
+
+        with pytest.raises(GithubException):
+            policy.call(Flaky(error, failures=1))
+        assert delays == []
+
+    def test_task_budget_shared(self):
+        """测试任务级重试预算"""
+        budget = RetryBudget(total=1)
+        policy, delays = self.make_policy(budget=budget)
+
+        assert policy.call(Flaky(ConnectionError('reset'), failures=1)) == 'ok'
+        with pytest.raises(ConnectionError):
+            policy.call(Flaky(ConnectionError('reset'), failures=1))
+        assert budget.remaining == 0
+
+    def test_retry_after_seconds(self):
+        """测试等待时间解析"""
+        assert retry_after_seconds({'Retry-After': '7'}) == 7
+        assert retry_after_seconds({'X-RateLimit-Remaining': '10'}) is None
+        assert retry_after_seconds(None) is None
+        reset = time.time() + 30
+        assert 25 < retry_after_seconds({'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(reset)}) <= 30
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
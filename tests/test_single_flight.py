@@ -0,0 +1,92 @@
+import pytest
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.single_flight import SingleFlight
+from utils.github_handler import GitHubHandler
+from tests.mock_github_server import MockGitHubServer
+
+
+@pytest.fixture
+def server(isolated, monkeypatch):
+    with MockGitHubServer({'main.py': b'print(1)', 'src/app.js': b'console.log(1)'}, latency=0.2) as mock:
+        monkeypatch.setattr(Config, 'GITHUB_API_URL', mock.url)
+        yield mock
+
+
+def run_concurrently(func, count=5):
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        return [future.result() for future in [executor.submit(func) for _ in range(count)]]
+
+
+class TestSingleFlight:
+    """测试并发请求合并"""
+
+    def test_waiters_share_result_and_error(self):
+        """测试同一键的并发调用只执行一次，等待者共享结果和异常"""
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return 'value'
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(flight.do, 'key', fetch) for _ in range(3)]
+            while flight.stats()['coalesced'] < 2:
+                pass
+            release.set()
+            assert [future.result() for future in futures] == ['value'] * 3
+        assert len(calls) == 1
+        assert flight.stats() == {'executed': 1, 'coalesced': 2, 'in_flight': 0}
+
+        def fail():
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            flight.do('key', fail)
+        assert flight.do('key', lambda: 'again') == 'again'
+
+    def test_concurrent_exports_fetch_tree_once(self, server):
+        """测试并发导出同一仓库时文件树只请求一次"""
+        results = run_concurrently(lambda: GitHubHandler().get_repository_tree('user', 'repo', 'main'))
+
+        assert all(files == results[0] for files in results)
+        assert sum('/git/trees/' in path for path in server.requests) == 1
+
+    def test_concurrent_exports_fetch_content_once(self, server):
+        """测试并发获取同一文件时只请求一次，SHA相同的不同路径共享结果"""
+        tree = GitHubHandler().get_repository_tree('user', 'repo', 'main')
+        sha = next(f['sha'] for f in tree if f['path'] == 'main.py')
+
+        def fetch():
+            handler = GitHubHandler()
+            handler._blob_shas[('user', 'repo', 'main.py')] = sha
+            return handler._fetch_file_content('main.py', 'main', 'user', 'repo')
+
+        def fetch_fork():
+            handler = GitHubHandler()
+            handler._blob_shas[('other', 'fork', 'lib/main.py')] = sha
+            return handler._fetch_file_content('lib/main.py', 'main', 'other', 'fork')
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(fetch) for _ in range(4)]
+            # fork中没有该仓库，确保由前面的任务执行获取
+            while not SingleFlight.shared().stats()['in_flight']:
+                pass
+            futures.append(executor.submit(fetch_fork))
+            records = [future.result() for future in futures]
+
+        assert server.raw_requests == 1
+        assert [r['content'] for r in records] == ['print(1)'] * 5
+        assert records[-1]['path'] == 'lib/main.py'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
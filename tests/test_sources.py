@@ -0,0 +1,153 @@
+import pytest
+import sys
+import os
+import subprocess
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import git_fetcher
+from utils.sources import LocalDirectorySource, LocalBareRepoSource, SourceError, open_local_source
+from utils.file_processor import FileProcessor
+from utils.file_records import is_error_record
+from config import Config
+
+
+FILES = {
+    'main.py': b'print("Hello")',
+    'src/app.js': b'console.log(1)',
+    'node_modules/lib/index.js': b'module.exports = 1',
+    'docs/readme.md': '# 中文说明'.encode('utf-8'),
+    'empty.txt': b'',
+    'big.txt': b'x' * 2048
+}
+
+
+def git(cwd, *args):
+    env = dict(os.environ, GIT_AUTHOR_NAME='t', GIT_AUTHOR_EMAIL='t@t',
+               GIT_COMMITTER_NAME='t', GIT_COMMITTER_EMAIL='t@t')
+    return subprocess.run(['git', '-C', str(cwd), *args], check=True, capture_output=True, env=env).stdout
+
+
+@pytest.fixture
+def work_tree(tmp_path):
+    """创建包含 .git 目录的本地工作区"""
+    root = tmp_path / 'repo'
+    for path, data in FILES.items():
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_bytes(data)
+    (root / '.git').mkdir()
+    (root / '.git' / 'HEAD').write_text('ref: refs/heads/main\n')
+    return root
+
+
+@pytest.fixture
+def bare_repo(tmp_path):
+    """创建本地裸仓库（模拟镜像仓库）"""
+    source = tmp_path / 'source'
+    for path, data in FILES.items():
+        (source / path).parent.mkdir(parents=True, exist_ok=True)
+        (source / path).write_bytes(data)
+    git(tmp_path, 'init', '-q', '-b', 'main', str(source))
+    git(source, 'add', '.')
+    git(source, 'commit', '-q', '-m', 'init')
+
+    bare = tmp_path / 'repo.git'
+    git(tmp_path, 'clone', '-q', '--bare', str(source), str(bare))
+    return bare
+
+
+class TestLocalDirectorySource:
+    """测试本地目录来源"""
+
+    def test_list_skips_git_and_excluded_dirs(self, work_tree):
+        """测试遍历时跳过 .git 和排除目录"""
+        source = LocalDirectorySource(str(work_tree))
+
+        all_paths = sorted(f['path'] for f in source.list_repository_contents())
+        assert all_paths == sorted(FILES)
+
+        files = source.list_repository_contents(file_processor=FileProcessor(exclude_dirs=['node_modules']))
+        assert 'node_modules/lib/index.js' not in [f['path'] for f in files]
+        assert next(f for f in files if f['path'] == 'big.txt')['size'] == 2048
+
+    def test_read_files(self, work_tree, monkeypatch):
+        """测试内存映射读取，空文件和超大文件分别处理"""
+        monkeypatch.setattr(Config, 'MAX_SINGLE_FILE_SIZE_MB', 0.001)
+        progress = []
+
+        records = LocalDirectorySource(str(work_tree)).get_file_content_batch(
+            '', 'repo', ['docs/readme.md', 'empty.txt', 'big.txt'],
+            progress_callback=lambda done, total: progress.append((done, total))
+        )
+        records = {r['path']: r for r in records}
+
+        assert records['docs/readme.md']['content'] == '# 中文说明'
+        assert records['empty.txt']['content'] == ''
+        assert records['big.txt']['is_oversized'] is True
+        assert progress[-1] == (3, 3)
+
+    def test_rejects_paths_outside_root(self, work_tree):
+        """测试拒绝越出根目录的路径"""
+        (work_tree.parent / 'secret.txt').write_text('secret')
+
+        record = LocalDirectorySource(str(work_tree)).get_file_content_batch('', 'repo', ['../secret.txt'])[0]
+
+        assert is_error_record(record)
+        assert '路径超出源目录' in record['content']
+
+    def test_missing_directory(self, tmp_path):
+        """测试目录不存在"""
+        with pytest.raises(SourceError, match="目录不存在"):
+            LocalDirectorySource(str(tmp_path / 'missing'))
+
+
+@pytest.mark.skipif(not git_fetcher.is_available(), reason="需要安装git")
+class TestLocalBareRepoSource:
+    """测试本地裸仓库来源"""
+
+    def test_open_detects_bare_repo(self, bare_repo, work_tree):
+        """测试自动识别裸仓库和普通目录"""
+        assert isinstance(open_local_source(str(bare_repo)), LocalBareRepoSource)
+        assert isinstance(open_local_source(str(work_tree)), LocalDirectorySource)
+
+    def test_matches_directory_source(self, bare_repo, work_tree, monkeypatch):
+        """测试与本地目录来源产出相同的文件列表和记录"""
+        monkeypatch.setattr(Config, 'MAX_SINGLE_FILE_SIZE_MB', 0.001)
+        processor = FileProcessor(exclude_dirs=['node_modules'])
+        bare_source = LocalBareRepoSource(str(bare_repo))
+        dir_source = LocalDirectorySource(str(work_tree))
+
+        bare_files = bare_source.list_repository_contents(file_processor=processor)
+        dir_files = dir_source.list_repository_contents(file_processor=processor)
+        assert sorted((f['path'], f['size']) for f in bare_files) == sorted((f['path'], f['size']) for f in dir_files)
+
+        paths = [f['path'] for f in bare_files]
+        assert bare_source.get_file_content_batch('', 'repo', paths, 'main') == \
+            dir_source.get_file_content_batch('', 'repo', paths)
+
+    def test_appends_records_as_read(self, bare_repo):
+        """测试每读取一个文件就追加到 results，不先在内存中汇总"""
+        source = LocalBareRepoSource(str(bare_repo))
+        paths = ['missing.py'] + [f['path'] for f in source.list_repository_contents()]
+        results = []
+        appended = []
+
+        source.get_file_content_batch('', 'repo', paths, 'main',
+                                      lambda processed, total: appended.append((processed, len(results))), results)
+
+        assert appended == [(i, i) for i in range(1, len(paths) + 1)]
+        assert [r['path'] for r in results] == paths
+
+    def test_missing_path(self, bare_repo):
+        """测试请求不存在的路径返回错误记录"""
+        record = LocalBareRepoSource(str(bare_repo)).get_file_content_batch('', 'repo', ['missing.py'])[0]
+
+        assert is_error_record(record)
+
+    def test_unknown_branch(self, bare_repo):
+        """测试分支不存在"""
+        with pytest.raises(SourceError, match="ls-tree"):
+            LocalBareRepoSource(str(bare_repo)).list_repository_contents(branch='missing')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
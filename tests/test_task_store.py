@@ -0,0 +1,148 @@
+import pytest
+import sys
+import os
+import time
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import task_store
+from utils.task_store import TaskStore
+
+
+@pytest.fixture
+def stores(tmp_path):
+    """同一数据库文件上的两个实例，模拟两个工作进程"""
+    path = str(tmp_path / 'tasks.sqlite3')
+    worker = TaskStore(path, flush_interval=3600, ttl=60)
+    other = TaskStore(path, flush_interval=3600, ttl=60)
+    yield worker, other
+    worker.close()
+    other.close()
+
+
+class TestTaskStore:
+    """测试跨进程共享的任务状态存储"""
+
+    def test_visible_to_other_workers(self, stores):
+        """测试创建的任务立即对其他进程可见，本进程的修改立即反映在查询结果中"""
+        worker, other = stores
+        worker['t1'] = {'status': 'queued', 'progress': 0}
+
+        assert other.get('t1') == {'status': 'queued', 'progress': 0}
+        assert 't1' in other
+        assert other.get('missing') is None
+
+        worker.update('t1', status='processing')
+        assert worker.get('t1')['status'] == 'processing'
+
+    def test_get_returns_snapshot(self, stores):
+        """测试查询返回的是快照，之后的修改不影响已取得的快照，序列化时不会遇到字典被修改"""
+        worker, _ = stores
+        worker['t1'] = {'status': 'processing', 'memory': {'peak_rss_bytes': 1}}
+        snapshot = worker.get('t1')
+
+        worker.update('t1', status='success', memory={'peak_rss_bytes': 2})
+        snapshot['memory']['peak_rss_bytes'] = 3
+
+        assert snapshot['status'] == 'processing'
+        assert worker.get('t1') == {'status': 'success', 'memory': {'peak_rss_bytes': 2}}
+
+    def test_progress_written_in_batches(self, stores):
+        """测试进度修改在 flush 时批量写入，没有变化时不重复写入"""
+        worker, other = stores
+        worker['t1'] = {'status': 'processing', 'progress': 0}
+        worker['t2'] = {'status': 'processing', 'progress': 0}
+        for progress in range(1, 50):
+            worker.update('t1', progress=progress)
+
+        assert other.get('t1')['progress'] == 0
+        assert worker.flush() == 1
+        assert other.get('t1')['progress'] == 49
+        assert worker.flush() == 0
+
+    def test_pop_removes_everywhere(self, stores):
+        """测试删除的任务在所有进程中都不可见"""
+        worker, other = stores
+        worker['t1'] = {'status': 'pending'}
+
+        assert worker.pop('t1') == {'status': 'pending'}
+        assert other.get('t1') is None
+        assert worker.pop('t1', 'gone') == 'gone'
+
+    def test_expire_finished_and_abandoned(self, stores, monkeypatch):
+        """测试删除结束超过保留时间的任务和长时间没有更新的任务，执行中的任务保留"""
+        worker, other = stores
+        worker['done'] = {'status': 'success', 'progress': 100}
+        worker['running'] = {'status': 'processing', 'progress': 10}
+        other['abandoned'] = {'status': 'processing', 'progress': 10}
+        other._local.clear()
+
+        now = time.time()
+        monkeypatch.setattr(task_store.time, 'time', lambda: now + 120)
+        worker.flush()
+
+        assert other.expire() == 2
+        assert worker.count() == 1
+        assert other.get('running') == {'status': 'processing', 'progress': 10}
+
+    def test_finished_tasks_leave_local_after_grace(self, stores, monkeypatch):
+        """测试结束的任务写入后在宽限时间后移出本地，仍可从数据库读取"""
+        worker, other = stores
+        worker['t1'] = {'status': 'processing', 'progress': 50}
+        worker.update('t1', status='success', progress=100)
+        worker.flush()
+        assert 't1' in worker._local
+
+        now = time.time()
+        monkeypatch.setattr(task_store.time, 'time', lambda: now + task_store.LOCAL_GRACE_SECONDS + 1)
+        worker.flush()
+
+        assert 't1' not in worker._local
+        assert worker.get('t1') == {'status': 'success', 'progress': 100}
+
+    def test_wait_wakes_on_local_changes(self, stores):
+        """测试本进程任务的状态推送由 update 和 notify 唤醒，读取状态后发生的变化不会错过"""
+        worker, _ = stores
+        worker['t1'] = {'status': 'processing', 'progress': 0}
+
+        version = worker.version('t1')
+        worker.notify('t1')
+        started = time.monotonic()
+        worker.wait('t1', version, 5)
+        assert time.monotonic() - started < 1
+
+        version = worker.version('t1')
+        timer = threading.Timer(0.1, worker.update, ('t1',), {'progress': 1})
+        timer.start()
+        worker.wait('t1', version, 5)
+        assert time.monotonic() - started < 2
+        timer.join()
+
+    def test_notify_wakes_only_that_task(self, stores):
+        """测试通知只唤醒等待该任务的推送"""
+        worker, _ = stores
+        worker['t1'] = {'status': 'processing', 'progress': 0}
+        worker['t2'] = {'status': 'processing', 'progress': 0}
+
+        version = worker.version('t2')
+        timer = threading.Timer(0.05, worker.notify, ('t1',))
+        timer.start()
+        started = time.monotonic()
+        worker.wait('t2', version, 0.3)
+        assert time.monotonic() - started >= 0.3
+        timer.join()
+        assert worker._conditions == {}
+
+    def test_wait_polls_tasks_of_other_workers(self, tmp_path):
+        """测试其他进程的任务最多等待一个写入间隔"""
+        store = TaskStore(str(tmp_path / 'tasks.sqlite3'), flush_interval=0.1)
+        try:
+            started = time.monotonic()
+            store.wait('remote', store.version('remote'), 5)
+            assert time.monotonic() - started < 1
+        finally:
+            store.close()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
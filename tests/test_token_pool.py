@@ -0,0 +1,100 @@
+import pytest
+import sys
+import os
+import json
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.token_pool import TokenPool, mask_token, is_budget_exhausted
+from utils.rate_limiter import RateLimiter
+from utils.github_handler import GitHubHandler
+from config import Config
+from tests.mock_github_server import MockGitHubServer
+
+
+FILES = {
+    'main.py': b'print("Hello")',
+    'src/app.js': b'console.log(1)'
+}
+
+
+class TestTokenPool:
+    """测试多Token池"""
+
+    def test_get_github_tokens(self, isolated, monkeypatch):
+        """测试合并配置文件和环境变量中的Token并去重"""
+        with open(Config.TOKEN_CONFIG_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'github_token': 'file-a', 'github_tokens': ['file-b', 'file-a']}, f)
+        monkeypatch.setenv('GITHUB_TOKENS', 'env-a, file-b,,env-b')
+        monkeypatch.setenv('GITHUB_TOKEN', 'env-c')
+
+        assert Config.get_github_tokens() == ['file-a', 'file-b', 'env-a', 'env-b', 'env-c']
+
+    def test_anonymous_pool(self, isolated):
+        """测试未配置Token时使用匿名访问"""
+        pool = TokenPool.shared()
+
+        assert pool.tokens == [None]
+        assert pool.select() is None
+
+    def test_select_most_remaining(self, isolated):
+        """测试选择剩余额度最多的Token，额度未知的Token优先"""
+        pool = TokenPool(['a', 'b', 'c'])
+        reset = time.time() + 3600
+        RateLimiter.for_token('a').update(100, 5000, reset)
+        RateLimiter.for_token('b').update(3000, 5000, reset)
+
+        assert pool.select() == 'c'
+        RateLimiter.for_token('c').update(50, 5000, reset)
+        assert pool.select() == 'b'
+        assert pool.select(exclude=['b']) == 'a'
+
+    def test_exhausted_token_is_parked(self, isolated):
+        """测试额度耗尽的Token在重置前不被选择，全部耗尽时选择最早重置的"""
+        pool = TokenPool(['a', 'b'])
+        now = time.time()
+        RateLimiter.for_token('a').update(0, 5000, now + 600)
+        RateLimiter.for_token('b').update(10, 5000, now + 3600)
+
+        assert pool.select() == 'b'
+        assert pool.has_available(exclude=['b']) is False
+
+        RateLimiter.for_token('b').update(0, 5000, now + 3600)
+        assert pool.select() == 'a'
+        assert [s['parked'] for s in pool.status()] == [True, True]
+
+    def test_status_masks_tokens(self, isolated):
+        """测试状态中的Token已脱敏"""
+        pool = TokenPool(['ghp_1234567890abcdef'])
+        RateLimiter.for_token('ghp_1234567890abcdef').update(4000, 5000, time.time() + 3600)
+
+        status = pool.status()[0]
+        assert status['token_masked'] == mask_token('ghp_1234567890abcdef')
+        assert '1234567890ab' not in status['token_masked']
+        assert status['remaining'] == 4000
+        assert status['parked'] is False
+
+    def test_is_budget_exhausted(self):
+        """测试识别主额度耗尽的响应"""
+        assert is_budget_exhausted(403, {'x-ratelimit-remaining': '0'}) is True
+        assert is_budget_exhausted(403, {'X-RateLimit-Remaining': '10'}) is False
+        assert is_budget_exhausted(404, {'X-RateLimit-Remaining': '0'}) is False
+
+    def test_handler_rotates_exhausted_token(self, isolated, monkeypatch):
+        """测试Token额度耗尽时立即换用其他Token，且之后不再使用被搁置的Token"""
+        with MockGitHubServer(FILES) as server:
+            monkeypatch.setattr(Config, 'GITHUB_API_URL', server.url)
+            monkeypatch.setattr(Config, 'CONCURRENT_REQUESTS', 1)
+            server.exhausted_tokens.add('token-a')
+            handler = GitHubHandler(engine='thread', tokens=['token-a', 'token-b'])
+
+            records = handler.get_file_content_batch('user', 'repo', list(FILES), 'main')
+
+            assert sorted(r['content'] for r in records) == sorted(d.decode() for d in FILES.values())
+            assert RateLimiter.for_token('token-a').snapshot()['remaining'] == 0
+            assert handler.token_pool.select() == 'token-b'
+            assert server.tokens_seen.count('token-a') == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -106,6 +106,18 @@ class TestValidator:
         assert result['output_format'] == 'md'
         assert result['use_default_filters'] is True
 
+    def test_validate_fetch_mode(self):
+        """测试内容获取方式验证"""
+        params = {'repo_url': 'https://github.com/user/repo'}
+        assert Validator.validate_all_params(params)['fetch_mode'] == 'api'
+        
+        params['fetch_mode'] = 'archive'
+        assert Validator.validate_all_params(params)['fetch_mode'] == 'archive'
+        
+        params['fetch_mode'] = 'ftp'
+        with pytest.raises(ValidationError, match="不支持的获取方式"):
+            Validator.validate_all_params(params)
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v']) 
\ No newline at end of file
@@ -0,0 +1,119 @@
+import os
+import tarfile
+import requests
+from typing import Dict, Any, Iterator, Optional, Iterable
+from config import Config
+from utils.file_processor import FileProcessor
+from utils.rate_limiter import RateLimiter
+from utils.client_pool import ClientPool
+from utils.retry import RetryPolicy, RetryableHTTPError
+from utils.file_records import max_single_file_bytes, make_oversized_record, decode_file_record
+
+
+class ArchiveError(Exception):
+    """仓库归档下载或解析异常"""
+    pass
+
+
+class ArchiveFetcher:
+    """通过仓库归档（tarball）一次性流式获取文件内容
+
+    整个仓库只发起一次请求，边下载边遍历tar成员，
+    不会把归档解压到磁盘，也不会整体缓存在内存中。
+    """
+
+    def __init__(self, token: Optional[str] = None, api_url: Optional[str] = None,
+                 timeout: Optional[int] = None, rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None) -> None:
+        self.token = token
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.api_url = (api_url or Config.GITHUB_API_URL).rstrip('/')
+        self.timeout = timeout or Config.REQUEST_TIMEOUT
+
+    def archive_url(self, owner: str, repo_name: str, ref: str) -> str:
+        """获取指定引用的tarball地址"""
+        return f"{self.api_url}/repos/{owner}/{repo_name}/tarball/{ref}"
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {'Accept': 'application/vnd.github+json'}
+        if self.token:
+            headers['Authorization'] = f'token {self.token}'
+        return headers
+
+    @staticmethod
+    def _strip_root(member_name: str) -> Optional[str]:
+        """去掉归档中的顶层目录（形如 owner-repo-sha/）"""
+        parts = member_name.split('/', 1)
+        if len(parts) < 2 or not parts[1]:
+            return None
+        return parts[1]
+
+    def _open(self, url: str) -> requests.Response:
+        """发起流式下载请求，可重试的状态码抛出 RetryableHTTPError"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        response = ClientPool.session().get(url, headers=self._headers(), stream=True, timeout=self.timeout)
+        if self.rate_limiter:
+            self.rate_limiter.update_from_headers(response.headers)
+
+        error = RetryableHTTPError(f"HTTP {response.status_code}", response.status_code, response.headers)
+        if response.status_code != 200 and RetryPolicy.is_retryable(error):
+            response.close()
+            raise error
+        return response
+
+    def iter_files(self, owner: str, repo_name: str, ref: str,
+                   file_processor: Optional[FileProcessor] = None,
+                   wanted_paths: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """流式遍历归档中的文件，按过滤规则产出文件记录
+
+        file_processor: 复用 FileProcessor 的过滤规则
+        wanted_paths: 可选，仅返回这些路径（与树API的结果保持一致）
+        """
+        wanted = set(wanted_paths) if wanted_paths is not None else None
+        max_size = max_single_file_bytes()
+
+        try:
+            response = self.retry_policy.call(self._open, self.archive_url(owner, repo_name, ref))
+        except (requests.RequestException, RetryableHTTPError) as e:
+            raise ArchiveError(f"下载仓库归档失败：{str(e)}")
+
+        with response:
+            if response.status_code == 404:
+                raise ArchiveError("仓库不存在或分支不存在")
+            if response.status_code != 200:
+                raise ArchiveError(f"下载仓库归档失败：HTTP {response.status_code}")
+
+            response.raw.decode_content = True
+            try:
+                with tarfile.open(fileobj=response.raw, mode='r|*') as archive:
+                    for member in archive:
+                        if not member.isfile():
+                            continue
+
+                        path = self._strip_root(member.name)
+                        if path is None:
+                            continue
+                        if wanted is not None and path not in wanted:
+                            continue
+
+                        file_info = {
+                            'path': path,
+                            'name': os.path.basename(path),
+                            'size': member.size,
+                            'type': 'file'
+                        }
+                        if file_processor and not file_processor.should_include_file(file_info):
+                            continue
+
+                        # 超大文件直接生成占位，不读取成员内容
+                        if member.size > max_size:
+                            yield make_oversized_record(path, member.size)
+                            continue
+
+                        extracted = archive.extractfile(member)
+                        data = extracted.read() if extracted else b''
+                        yield decode_file_record(path, data, member.size)
+            except (tarfile.TarError, EOFError, OSError, requests.RequestException) as e:
+                raise ArchiveError(f"解析仓库归档失败：{str(e)}")
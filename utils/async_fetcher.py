@@ -0,0 +1,239 @@
+import os
+import asyncio
+from urllib.parse import quote
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from config import Config
+from utils.rate_limiter import RateLimiter
+from utils.retry import RetryPolicy, RetryableHTTPError
+from utils.token_pool import TokenPool, is_budget_exhausted
+from utils.client_pool import RAW_MEDIA_TYPE
+from utils.file_records import make_error_record, StreamDecoder, STREAM_CHUNK_SIZE
+
+try:
+    import aiohttp
+except ImportError:  # 可选依赖：pip install aiohttp
+    aiohttp = None
+
+
+def is_available() -> bool:
+    """异步引擎依赖的 aiohttp 是否已安装"""
+    return aiohttp is not None
+
+
+class AsyncFetchError(Exception):
+    """异步获取引擎异常"""
+    pass
+
+
+class AsyncFetcher:
+    """基于 asyncio 的获取引擎
+
+    在单个事件循环中保持大量请求同时在途，复用连接池中的长连接，
+    适合以网络延迟为主的大型导出。结果格式与 GitHubHandler 的线程池实现一致。
+    """
+
+    def __init__(self, token: Optional[str] = None, api_url: Optional[str] = None,
+                 concurrency: Optional[int] = None, pool_size: Optional[int] = None,
+                 rate_limiter: Optional[RateLimiter] = None, timeout: Optional[int] = None,
+                 retry_policy: Optional[RetryPolicy] = None, token_pool: Optional[TokenPool] = None) -> None:
+        if not is_available():
+            raise AsyncFetchError("异步获取引擎需要安装 aiohttp：pip install aiohttp")
+        self.token = token
+        self.token_pool = token_pool
+        self.api_url = (api_url or Config.GITHUB_API_URL).rstrip('/')
+        self.concurrency = concurrency or Config.ASYNC_CONCURRENCY
+        self.pool_size = pool_size or Config.ASYNC_POOL_SIZE
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.timeout = timeout or Config.REQUEST_TIMEOUT
+
+    def _session(self) -> 'aiohttp.ClientSession':
+        headers = {'Accept': 'application/vnd.github+json'}
+        return aiohttp.ClientSession(
+            headers=headers,
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+
+    async def _get_json(self, session: 'aiohttp.ClientSession', path: str, **kwargs: Any) -> Tuple[int, Any]:
+        """发起GET请求（按重试策略重试），返回 (状态码, JSON内容)"""
+        return await self.retry_policy.call_async(self._request_json, session, path, **kwargs)
+
+    def _pick_token(self, exclude: List[Optional[str]]) -> Tuple[Optional[str], Optional[RateLimiter]]:
+        """选择本次请求使用的Token及其限制器；有Token池时按剩余额度选择"""
+        if self.token_pool:
+            token = self.token_pool.select(exclude=exclude)
+            return token, TokenPool.limiter(token)
+        return self.token, self.rate_limiter
+
+    async def _request_json(self, session: 'aiohttp.ClientSession', path: str, **kwargs: Any) -> Tuple[int, Any]:
+        """发起单次GET请求，可重试的状态码抛出 RetryableHTTPError
+
+        Token额度耗尽且池中还有其他可用Token时，立即换用其他Token重发。
+        """
+        exhausted: List[Optional[str]] = []
+        while True:
+            token, limiter = self._pick_token(exhausted)
+            if limiter:
+                await limiter.acquire_async()
+            headers = {'Authorization': f'token {token}'} if token else {}
+            async with session.get(f"{self.api_url}{path}", headers=headers, **kwargs) as response:
+                if limiter:
+                    limiter.update_from_headers(response.headers)
+                if response.status == 200:
+                    return response.status, await response.json(content_type=None)
+
+                if (self.token_pool and is_budget_exhausted(response.status, response.headers)
+                        and self.token_pool.has_available(exclude=exhausted + [token])):
+                    exhausted.append(token)
+                    continue
+                error = RetryableHTTPError(f"HTTP {response.status}", response.status, response.headers)
+                if RetryPolicy.is_retryable(error):
+                    raise error
+                return response.status, None
+
+    async def _request_raw(self, session: 'aiohttp.ClientSession', path: str, file_path: str,
+                           **kwargs: Any) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """以原始媒体类型流式读取单个文件，返回 (状态码, 文件记录或None)
+
+        内容边读取边增量解码，超过单文件大小上限时立即停止读取。
+        """
+        exhausted: List[Optional[str]] = []
+        while True:
+            token, limiter = self._pick_token(exhausted)
+            if limiter:
+                await limiter.acquire_async()
+            headers = {'Accept': RAW_MEDIA_TYPE}
+            if token:
+                headers['Authorization'] = f'token {token}'
+            async with session.get(f"{self.api_url}{path}", headers=headers, **kwargs) as response:
+                if limiter:
+                    limiter.update_from_headers(response.headers)
+                if response.status == 200:
+                    decoder = StreamDecoder(file_path)
+                    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                        if not decoder.feed(chunk):
+                            break
+                    return response.status, decoder.record(response.content_length)
+
+                if (self.token_pool and is_budget_exhausted(response.status, response.headers)
+                        and self.token_pool.has_available(exclude=exhausted + [token])):
+                    exhausted.append(token)
+                    continue
+                error = RetryableHTTPError(f"HTTP {response.status}", response.status, response.headers)
+                if RetryPolicy.is_retryable(error):
+                    raise error
+                return response.status, None
+
+    async def _default_branch(self, session: 'aiohttp.ClientSession', owner: str, repo_name: str) -> str:
+        status, data = await self._get_json(session, f"/repos/{owner}/{repo_name}")
+        if status == 404:
+            raise AsyncFetchError("仓库不存在或无法访问")
+        if status != 200:
+            raise AsyncFetchError(f"获取仓库信息失败：HTTP {status}")
+        return data['default_branch']
+
+    async def _fetch_tree_data(self, owner: str, repo_name: str, branch: Optional[str]) -> Dict[str, Any]:
+        async with self._session() as session:
+            if not branch:
+                branch = await self._default_branch(session, owner, repo_name)
+
+            status, data = await self._get_json(
+                session, f"/repos/{owner}/{repo_name}/git/trees/{quote(branch, safe='')}",
+                params={'recursive': '1'}
+            )
+            if status == 404:
+                raise AsyncFetchError("仓库不存在或分支不存在")
+            if status != 200:
+                raise AsyncFetchError(f"获取仓库内容失败：HTTP {status}")
+            return data
+
+    async def _fetch_tree(self, owner: str, repo_name: str, branch: Optional[str]) -> List[Dict[str, Any]]:
+        data = await self._fetch_tree_data(owner, repo_name, branch)
+
+        files = []
+        for item in data.get('tree', []):
+            if item.get('type') == 'blob':  # 只要文件，不要目录
+                files.append({
+                    'path': item['path'],
+                    'name': os.path.basename(item['path']),
+                    'size': item.get('size', 0),
+                    'sha': item['sha'],
+                    'type': 'file'
+                })
+        return files
+
+    async def _fetch_content(self, session: 'aiohttp.ClientSession', semaphore: asyncio.Semaphore,
+                             owner: str, repo_name: str, file_path: str, branch: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                status, record = await self.retry_policy.call_async(
+                    self._request_raw, session, f"/repos/{owner}/{repo_name}/contents/{quote(file_path)}",
+                    file_path, params={'ref': branch}
+                )
+                if record is None:
+                    return make_error_record(file_path, f"[获取文件内容失败: HTTP {status}]")
+                return record
+            except Exception as e:
+                return make_error_record(file_path, f"[处理文件时出错: {str(e)}]")
+
+    async def _fetch_contents(self, owner: str, repo_name: str, file_paths: List[str], branch: Optional[str],
+                              progress_callback: Optional[Callable[[int, int], None]],
+                              results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._session() as session:
+            if not branch:
+                branch = await self._default_branch(session, owner, repo_name)
+
+            # 按窗口逐批创建任务，记录写入 results 后即释放，不为所有文件同时保留任务和结果
+            window = self.concurrency * 2
+            queued_paths = iter(file_paths)
+            pending = set()
+            total_files = len(file_paths)
+            processed_count = 0
+            while True:
+                for path in queued_paths:
+                    pending.add(asyncio.ensure_future(
+                        self._fetch_content(session, semaphore, owner, repo_name, path, branch)))
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    results.append(future.result())
+                    processed_count += 1
+                    if progress_callback:
+                        progress_callback(processed_count, total_files)
+            return results
+
+    def get_repository_tree(self, owner: str, repo_name: str, branch: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取仓库文件树（同步入口）"""
+        try:
+            return asyncio.run(self._fetch_tree(owner, repo_name, branch))
+        except AsyncFetchError:
+            raise
+        except Exception as e:
+            raise AsyncFetchError(f"处理仓库内容时出错：{str(e)}")
+
+    def get_tree_data(self, owner: str, repo_name: str, branch: Optional[str] = None) -> Dict[str, Any]:
+        """获取递归树接口的原始JSON（包含 sha 和 truncated 标记，同步入口）"""
+        try:
+            return asyncio.run(self._fetch_tree_data(owner, repo_name, branch))
+        except AsyncFetchError:
+            raise
+        except Exception as e:
+            raise AsyncFetchError(f"处理仓库内容时出错：{str(e)}")
+
+    def get_file_content_batch(self, owner: str, repo_name: str, file_paths: List[str], branch: Optional[str] = None,
+                               progress_callback: Optional[Callable[[int, int], None]] = None,
+                               results: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """批量获取文件内容（同步入口），results 为可选的追加记录容器"""
+        try:
+            return asyncio.run(self._fetch_contents(owner, repo_name, file_paths, branch, progress_callback,
+                                                    [] if results is None else results))
+        except AsyncFetchError:
+            raise
+        except Exception as e:
+            raise AsyncFetchError(f"批量获取文件失败：{str(e)}")
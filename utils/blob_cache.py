@@ -0,0 +1,215 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from config import Config
+from utils.file_records import make_file_record, make_binary_record, make_oversized_record, is_error_record
+from utils.cache_codec import compress, decompress
+from utils.cache_policy import CachePolicy
+from utils.cache_index import compact_database
+
+_FLAG_BINARY = 1
+_FLAG_OVERSIZED = 2
+_FLAG_ENCODED = 4  # 内容带版本头并可能经过压缩（旧条目为原始UTF-8）
+
+
+class BlobCache:
+    """按blob SHA索引的文件内容缓存（单个SQLite数据库）
+
+    blob内容由SHA唯一确定，不同分支、提交和fork中内容相同的文件共享同一条目，默认永不过期
+    （设置了 CACHE_TTL_BLOB 时超过该时间未被访问的条目视为未命中）；
+    内容按 CACHE_COMPRESSION_LEVEL 压缩后存储，总大小（按压缩后计）超过 BLOB_CACHE_MAX_MB 时按最近访问时间淘汰。
+    多个工作进程可以共用同一个数据库文件。
+    """
+
+    _instances: Dict[str, 'BlobCache'] = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, path: Optional[str] = None) -> 'BlobCache':
+        """获取指定数据库文件对应的进程级共享实例，默认位于缓存目录下"""
+        path = os.path.abspath(path or os.path.join(Config.CACHE_FOLDER, 'blobs.sqlite3'))
+        with cls._instances_lock:
+            cache = cls._instances.get(path)
+            if cache is None:
+                cache = cls(path)
+                cls._instances[path] = cache
+            return cache
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """关闭并清空所有共享实例（主要用于测试）"""
+        with cls._instances_lock:
+            for cache in cls._instances.values():
+                cache.close()
+            cls._instances.clear()
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None) -> None:
+        self.path = path
+        self.max_bytes = int(Config.BLOB_CACHE_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS blobs ('
+            'sha TEXT PRIMARY KEY, content BLOB NOT NULL, size INTEGER NOT NULL, '
+            'flags INTEGER NOT NULL, stored_bytes INTEGER NOT NULL, last_access REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS blobs_last_access ON blobs (last_access)')
+        self._total_bytes = self._sum_bytes()
+
+    def _sum_bytes(self) -> int:
+        return self._db.execute('SELECT COALESCE(SUM(stored_bytes), 0) FROM blobs').fetchone()[0]
+
+    @staticmethod
+    def _to_record(path: str, row: tuple) -> Dict[str, Any]:
+        content, size, flags = row
+        # 占位记录只保存标记和大小，内容按当前路径重新生成
+        if flags & _FLAG_OVERSIZED:
+            return make_oversized_record(path, size)
+        if flags & _FLAG_BINARY:
+            return make_binary_record(path, size)
+        content = decompress(content) if flags & _FLAG_ENCODED else bytes(content)
+        return make_file_record(path, content.decode('utf-8'), size)
+
+    @staticmethod
+    def _access_cutoff() -> float:
+        """最近访问时间早于该值的条目已过期（未设置TTL时为0）"""
+        ttl = CachePolicy.shared().ttl('blob')
+        return time.time() - ttl if ttl > 0 else 0
+
+    def get(self, sha: str, path: str) -> Optional[Dict[str, Any]]:
+        """按SHA读取内容并生成指定路径的文件记录，未命中返回None"""
+        record = self.peek(sha, path)
+        CachePolicy.shared().record('blob', 'misses' if record is None else 'hits')
+        return record
+
+    def peek(self, sha: str, path: str) -> Optional[Dict[str, Any]]:
+        """与 get 相同，但不计入命中统计（用于同一次查找中的再次确认）"""
+        with self._lock:
+            row = self._db.execute('SELECT content, size, flags FROM blobs WHERE sha = ? AND last_access >= ?',
+                                   (sha, self._access_cutoff())).fetchone()
+            if row is not None:
+                self._db.execute('UPDATE blobs SET last_access = ? WHERE sha = ?', (time.time(), sha))
+        return None if row is None else self._to_record(path, row)
+
+    def contains(self, shas: Iterable[str]) -> set:
+        """返回已缓存的SHA集合（不读取内容）"""
+        shas = list(set(shas))
+        found = set()
+        cutoff = self._access_cutoff()
+        with self._lock:
+            # SQLite 单条语句的参数数量有限，分批查询
+            for i in range(0, len(shas), 500):
+                batch = shas[i:i + 500]
+                placeholders = ','.join('?' * len(batch))
+                found.update(row[0] for row in self._db.execute(
+                    f'SELECT sha FROM blobs WHERE sha IN ({placeholders}) AND last_access >= ?', batch + [cutoff]))
+        return found
+
+    def put(self, sha: str, record: Dict[str, Any]) -> None:
+        """保存文件记录的内容，获取失败的占位记录不保存；二进制和超大文件只保存标记和大小"""
+        if not sha or is_error_record(record):
+            return
+        placeholder = record.get('is_binary') or record.get('is_oversized')
+        content = compress(b'' if placeholder else record.get('content', '').encode('utf-8'))
+        flags = _FLAG_ENCODED | (_FLAG_BINARY if record.get('is_binary') else 0) | (_FLAG_OVERSIZED if record.get('is_oversized') else 0)
+        stored_bytes = len(content) + len(sha)
+        with self._lock:
+            previous = self._db.execute('SELECT stored_bytes FROM blobs WHERE sha = ?', (sha,)).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO blobs (sha, content, size, flags, stored_bytes, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (sha, content, record.get('size', 0), flags, stored_bytes, time.time())
+            )
+            self._total_bytes += stored_bytes - (previous[0] if previous else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """按淘汰优先级淘汰，直到总大小降到预算的90%（留出余量，避免每次写入都触发淘汰）"""
+        # 其他进程也会写入同一数据库，淘汰前重新统计
+        self._total_bytes = self._sum_bytes()
+        target = int(self.max_bytes * 0.9)
+        while self._total_bytes > target:
+            rows = self._candidates(Config.CACHE_GC_COST_WEIGHT, 100)
+            if not rows:
+                break
+            freed = 0
+            evicted = []
+            for _, sha, stored_bytes in rows:
+                evicted.append(sha)
+                freed += stored_bytes
+                if self._total_bytes - freed <= target:
+                    break
+            self._delete(evicted)
+            self._total_bytes -= freed
+    
+    def _candidates(self, weight: float, limit: int) -> List[Tuple[float, str, int]]:
+        # 每个blob重新获取都需要一次请求，单位字节的代价随大小减小
+        return self._db.execute(
+            'SELECT last_access + ? / MAX(stored_bytes / 1024.0, 1.0) AS priority, sha, stored_bytes '
+            'FROM blobs ORDER BY priority LIMIT ?', (weight, limit)).fetchall()
+    
+    def _delete(self, shas: List[str]) -> None:
+        placeholders = ','.join('?' * len(shas))
+        self._db.execute(f'DELETE FROM blobs WHERE sha IN ({placeholders})', shas)
+    
+    def eviction_candidates(self, weight: float, limit: int) -> List[Tuple[float, str, int]]:
+        """按淘汰优先级升序返回 (优先级, SHA, 字节数)，优先级的含义与 CacheIndex 相同"""
+        with self._lock:
+            return self._candidates(weight, limit)
+    
+    def remove(self, shas: List[str]) -> None:
+        if not shas:
+            return
+        with self._lock:
+            self._delete(shas)
+            self._total_bytes = self._sum_bytes()
+    
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._sum_bytes()
+    
+    def verify(self, after_rowid: int, limit: int) -> Tuple[int, int]:
+        """校验一批条目能否解码，删除损坏的条目
+
+        返回 (本批最后的rowid, 删除数量)；rowid 为0表示已校验到末尾。
+        """
+        with self._lock:
+            rows = self._db.execute('SELECT rowid, sha, content, flags FROM blobs WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                                    (after_rowid, limit)).fetchall()
+        corrupt = []
+        for _, sha, content, flags in rows:
+            try:
+                (decompress(content) if flags & _FLAG_ENCODED else bytes(content)).decode('utf-8')
+            except Exception:
+                corrupt.append(sha)
+        self.remove(corrupt)
+        return (rows[-1][0] if len(rows) == limit else 0), len(corrupt)
+    
+    def compact(self, max_pages: int) -> int:
+        with self._lock:
+            return compact_database(self._db, max_pages)
+    
+    def stats(self) -> Dict[str, int]:
+        """条目数量和占用字节数"""
+        with self._lock:
+            entries, total = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(stored_bytes), 0) FROM blobs').fetchone()
+        return {'entries': entries, 'bytes': total}
+
+    def clear(self) -> None:
+        """删除所有条目"""
+        with self._lock:
+            self._db.execute('DELETE FROM blobs')
+            self._total_bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
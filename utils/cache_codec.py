@@ -0,0 +1,75 @@
+import json
+import zlib
+import struct
+from typing import Any, Optional
+from config import Config
+
+# 文件格式：魔数(4) + 版本(1) + 压缩方式(1) + 原始长度(4) + 数据
+MAGIC = b'G2MC'
+FORMAT_VERSION = 1
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+
+_HEADER = struct.Struct('>4sBBI')
+HEADER_SIZE = _HEADER.size
+
+# 仓库信息、文件树等缓存文件的扩展名（旧版为 .json）
+CACHE_FILE_SUFFIX = '.cache'
+
+# 小于该长度的数据压缩收益有限，直接存储
+MIN_COMPRESS_SIZE = 256
+
+
+class CacheFormatError(ValueError):
+    """缓存数据不是可识别的格式"""
+    pass
+
+
+def compress(data: bytes, level: Optional[int] = None) -> bytes:
+    """按配置的压缩级别压缩字节数据，加上版本头；级别为0或数据过短时不压缩"""
+    level = Config.CACHE_COMPRESSION_LEVEL if level is None else level
+    codec = CODEC_NONE
+    payload = data
+    if level > 0 and len(data) >= MIN_COMPRESS_SIZE:
+        compressed = zlib.compress(data, level)
+        if len(compressed) < len(data):
+            codec, payload = CODEC_ZLIB, compressed
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, codec, len(data)) + payload
+
+
+def decompress(blob: bytes) -> bytes:
+    """解析版本头并还原字节数据"""
+    if len(blob) < HEADER_SIZE:
+        raise CacheFormatError('缓存数据过短')
+    magic, version, codec, size = _HEADER.unpack_from(blob)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise CacheFormatError('未知的缓存格式版本')
+    payload = bytes(blob[HEADER_SIZE:])
+    if codec == CODEC_ZLIB:
+        payload = zlib.decompress(payload)
+    elif codec != CODEC_NONE:
+        raise CacheFormatError(f'未知的压缩方式: {codec}')
+    if len(payload) != size:
+        raise CacheFormatError('缓存数据长度不一致')
+    return payload
+
+
+def raw_size(blob: bytes) -> int:
+    """版本头中记录的原始（未压缩）数据长度"""
+    if len(blob) < HEADER_SIZE:
+        raise CacheFormatError('缓存数据过短')
+    return _HEADER.unpack_from(blob)[3]
+
+
+def is_encoded(blob: bytes) -> bool:
+    return bytes(blob[:len(MAGIC)]) == MAGIC
+
+
+def encode_entry(entry: Any, level: Optional[int] = None) -> bytes:
+    """将缓存条目序列化为紧凑JSON并压缩"""
+    data = json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return compress(data, level)
+
+
+def decode_entry(blob: bytes) -> Any:
+    return json.loads(decompress(blob).decode('utf-8'))
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+from typing import Dict, List, Optional
+from config import Config
+from utils.cache_index import CacheIndex
+from utils.blob_cache import BlobCache
+from utils.memory_cache import MemoryCache
+from utils.cache_codec import decode_entry, CACHE_FILE_SUFFIX
+
+# 写入中断留下的临时文件超过该时间后删除（秒）
+STALE_TEMP_SECONDS = 3600
+
+
+class CacheCollector:
+    """缓存垃圾回收（由定时任务调用）
+
+    每次执行：
+    1. 按索引分批校验条目（游标保存在索引中，多次执行轮流覆盖全部条目），删除文件丢失或无法解码的条目；
+    2. 缓存目录和blob数据库的总大小超过 CACHE_MAX_MB 时，按最近访问时间和重新获取代价淘汰到预算的90%；
+    3. 增量回收数据库空闲页并截断WAL。
+    只在第一次执行时遍历一次缓存目录，把索引建立之前写入的文件登记到索引中。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, index: Optional[CacheIndex] = None,
+                 blobs: Optional[BlobCache] = None, max_bytes: Optional[int] = None) -> None:
+        self.cache_dir = cache_dir or Config.CACHE_FOLDER
+        self.index = index or CacheIndex.shared()
+        self.blobs = blobs or BlobCache.shared()
+        self.max_bytes = int(Config.CACHE_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+
+    def run(self) -> Dict[str, int]:
+        """执行一次回收，返回各项处理数量"""
+        stats = {'adopted': 0, 'orphans': 0, 'corrupt': 0, 'evicted': 0, 'evicted_bytes': 0, 'vacuumed_pages': 0}
+        self.index.flush()
+        if self.index.get_meta('adopted') is None:
+            stats['adopted'] = self._adopt()
+            self.index.set_meta('adopted', str(time.time()))
+
+        stats['orphans'], stats['corrupt'] = self._verify_entries()
+        cursor, corrupt = self.blobs.verify(int(self.index.get_meta('blob_cursor') or 0), Config.CACHE_GC_BATCH)
+        self.index.set_meta('blob_cursor', str(cursor))
+        stats['corrupt'] += corrupt
+
+        stats['evicted'], stats['evicted_bytes'] = self._evict()
+        stats['vacuumed_pages'] = (self.index.compact(Config.CACHE_GC_VACUUM_PAGES)
+                                   + self.blobs.compact(Config.CACHE_GC_VACUUM_PAGES))
+        return stats
+
+    def _paths(self, key: str) -> List[str]:
+        """条目可能对应的文件（当前格式和旧版JSON）"""
+        return [os.path.join(self.cache_dir, f"{key}{CACHE_FILE_SUFFIX}"), os.path.join(self.cache_dir, f"{key}.json")]
+
+    def _remove(self, keys: List[str]) -> None:
+        """删除条目的文件、内存缓存和索引记录"""
+        memory_cache = MemoryCache.shared()
+        for key in keys:
+            for path in self._paths(key):
+                memory_cache.discard(os.path.abspath(path))
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self.index.forget(keys)
+
+    def _adopt(self) -> int:
+        """登记索引中没有的缓存文件，并删除遗留的临时文件"""
+        known = self.index.keys()
+        adopted = 0
+        now = time.time()
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if entry.name.endswith('.tmp'):
+                    if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                        try:
+                            os.remove(entry.path)
+                        except OSError:
+                            pass
+                    continue
+                for suffix in (CACHE_FILE_SUFFIX, '.json'):
+                    if entry.name.endswith(suffix):
+                        key = entry.name[:-len(suffix)]
+                        if key not in known:
+                            self.index.record(key, stat.st_size, last_access=stat.st_mtime)
+                            known.add(key)
+                            adopted += 1
+                        break
+        return adopted
+
+    def _verify_entries(self):
+        """校验一批条目，返回 (文件丢失数, 损坏数)"""
+        cursor = int(self.index.get_meta('entry_cursor') or 0)
+        rows = self.index.batch_after(cursor, Config.CACHE_GC_BATCH)
+        orphans, corrupt = [], []
+        for _, key in rows:
+            path, legacy_path = self._paths(key)
+            try:
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        decode_entry(f.read())
+                elif os.path.exists(legacy_path):
+                    with open(legacy_path, 'r', encoding='utf-8') as f:
+                        json.load(f)
+                else:
+                    orphans.append(key)
+            except Exception:
+                corrupt.append(key)
+        self._remove(orphans + corrupt)
+        self.index.set_meta('entry_cursor', str(rows[-1][0] if len(rows) == Config.CACHE_GC_BATCH else 0))
+        return len(orphans), len(corrupt)
+
+    def _evict(self):
+        """超过总预算时淘汰到预算的90%，返回 (淘汰数量, 释放字节数)"""
+        total = self.index.total_bytes() + self.blobs.total_bytes()
+        if total <= self.max_bytes:
+            return 0, 0
+        target = int(self.max_bytes * 0.9)
+        weight = Config.CACHE_GC_COST_WEIGHT
+        evicted = freed = 0
+        while total - freed > target:
+            candidates = sorted(
+                [(priority, 'entry', key, size) for priority, key, size in self.index.eviction_candidates(weight, 100)]
+                + [(priority, 'blob', sha, size) for priority, sha, size in self.blobs.eviction_candidates(weight, 100)]
+            )
+            if not candidates:
+                break
+            keys, shas = [], []
+            for _, store, name, size in candidates[:100]:
+                (keys if store == 'entry' else shas).append(name)
+                freed += size
+                if total - freed <= target:
+                    break
+            self._remove(keys)
+            self.blobs.remove(shas)
+            evicted += len(keys) + len(shas)
+        return evicted, freed
@@ -0,0 +1,160 @@
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+from config import Config
+
+# 访问时间先记在内存中，积累到该数量或垃圾回收时再批量写入
+TOUCH_FLUSH_THRESHOLD = 256
+
+
+def compact_database(db: sqlite3.Connection, max_pages: int) -> int:
+    """回收SQLite数据库的空闲页并截断WAL，返回回收的页数
+
+    增量清理每次最多回收 max_pages 页，不长时间占用数据库。
+    未启用增量清理的旧数据库（auto_vacuum 在建表后才能通过完整VACUUM切换）不在这里转换：
+    完整VACUUM会重写整个数据库，期间阻塞所有读写请求；其空闲页由之后的写入复用。
+    """
+    free_pages = db.execute('PRAGMA freelist_count').fetchone()[0]
+    if free_pages and db.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+        db.execute(f'PRAGMA incremental_vacuum({int(max_pages)})').fetchall()
+    db.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+    return free_pages - db.execute('PRAGMA freelist_count').fetchone()[0]
+
+
+class CacheIndex:
+    """缓存目录中各条目文件的索引（SQLite）
+
+    记录每个缓存键的种类、占用字节数、重新获取的代价（请求数）和最近访问时间，
+    垃圾回收按索引挑选淘汰对象，不需要每次遍历缓存目录。
+    """
+
+    _instances: Dict[str, 'CacheIndex'] = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, path: Optional[str] = None) -> 'CacheIndex':
+        """获取指定数据库文件对应的进程级共享实例，默认位于缓存目录下"""
+        path = os.path.abspath(path or os.path.join(Config.CACHE_FOLDER, 'index.sqlite3'))
+        with cls._instances_lock:
+            index = cls._instances.get(path)
+            if index is None:
+                index = cls(path)
+                cls._instances[path] = index
+            return index
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """关闭并清空所有共享实例（主要用于测试）"""
+        with cls._instances_lock:
+            for index in cls._instances.values():
+                index.close()
+            cls._instances.clear()
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, float] = {}
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, kind TEXT NOT NULL, stored_bytes INTEGER NOT NULL, '
+            'cost REAL NOT NULL, last_access REAL NOT NULL)'
+        )
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)')
+
+    def record(self, key: str, stored_bytes: int, cost: float = 1, last_access: Optional[float] = None) -> None:
+        """写入缓存文件后登记（或更新）条目"""
+        kind = key.split('_', 1)[0]
+        with self._lock:
+            self._pending.pop(key, None)
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries (key, kind, stored_bytes, cost, last_access) VALUES (?, ?, ?, ?, ?)',
+                (key, kind, stored_bytes, cost, last_access or time.time())
+            )
+
+    def touch(self, key: str) -> None:
+        """记录一次访问（只写内存，批量落盘）"""
+        with self._lock:
+            self._pending[key] = time.time()
+            if len(self._pending) < TOUCH_FLUSH_THRESHOLD:
+                return
+            self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        self._db.executemany('UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?',
+                             [(accessed, key) for key, accessed in pending.items()])
+
+    def forget(self, keys: List[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._pending.pop(key, None)
+            self._db.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key in keys])
+
+    def eviction_candidates(self, weight: float, limit: int) -> List[Tuple[float, str, int]]:
+        """按淘汰优先级升序返回 (优先级, 键, 字节数)
+
+        优先级为最近访问时间加上 weight 秒乘以每KB的重新获取代价：
+        同样久未访问时，重新获取代价高、占用小的条目保留得更久。
+        """
+        with self._lock:
+            self._flush_locked()
+            return self._db.execute(
+                'SELECT last_access + ? * cost / MAX(stored_bytes / 1024.0, 1.0) AS priority, key, stored_bytes '
+                'FROM entries ORDER BY priority LIMIT ?', (weight, limit)).fetchall()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COALESCE(SUM(stored_bytes), 0) FROM entries').fetchone()[0]
+
+    def compact(self, max_pages: int) -> int:
+        with self._lock:
+            return compact_database(self._db, max_pages)
+
+    def keys(self) -> set:
+        with self._lock:
+            return {row[0] for row in self._db.execute('SELECT key FROM entries')}
+
+    def batch_after(self, rowid: int, limit: int) -> List[Tuple[int, str]]:
+        """按rowid顺序返回一批条目 (rowid, key)，用于分批校验"""
+        with self._lock:
+            return self._db.execute('SELECT rowid, key FROM entries WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                                    (rowid, limit)).fetchall()
+
+    def get_meta(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: str) -> None:
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)', (name, value))
+
+    def stats(self) -> Dict[str, int]:
+        """条目数量和占用字节数"""
+        with self._lock:
+            entries, total = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(stored_bytes), 0) FROM entries').fetchone()
+        return {'entries': entries, 'bytes': total}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+            self._db.execute('DELETE FROM entries')
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,117 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, Any, Optional
+from config import Config
+
+# 缓存条目的种类：仓库信息、分支到提交的解析、文件树、文件内容（blob）
+CACHE_KINDS = ('repo', 'commit', 'tree', 'blob')
+
+# 不返回旧值的种类：分支解析出的提交决定导出内容和导出缓存键，过期后必须重新解析，
+# 否则推送后的第一次导出会得到上一个提交的内容
+NO_STALE_KINDS = ('commit',)
+
+FRESH = 'fresh'
+STALE = 'stale'
+EXPIRED = 'expired'
+
+
+class CachePolicy:
+    """按条目种类区分的缓存过期策略（进程级共享）
+
+    每种条目有独立的TTL（0 表示永不过期）；过期后 CACHE_STALE_WINDOW 秒内仍可直接返回旧值（NO_STALE_KINDS 除外），
+    同时在后台线程中刷新（stale-while-revalidate），同一条目同时只刷新一次。
+    按种类统计命中、未命中和返回旧值的次数。
+    """
+
+    _instance: Optional['CachePolicy'] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'CachePolicy':
+        """获取进程级共享实例"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """等待进行中的后台刷新结束并丢弃共享实例（主要用于测试）"""
+        with cls._instance_lock:
+            if cls._instance is not None:
+                cls._instance.shutdown()
+            cls._instance = None
+
+    def __init__(self, ttls: Optional[Dict[str, int]] = None, stale_window: Optional[int] = None) -> None:
+        self.ttls = ttls or {
+            'repo': Config.CACHE_TTL_REPO,
+            'commit': Config.CACHE_TTL_COMMIT,
+            'tree': Config.CACHE_TTL_TREE,
+            'blob': Config.CACHE_TTL_BLOB
+        }
+        self.stale_window = Config.CACHE_STALE_WINDOW if stale_window is None else stale_window
+        self._lock = threading.Lock()
+        self._counters = {kind: {'hits': 0, 'misses': 0, 'stale': 0, 'refresh_errors': 0} for kind in CACHE_KINDS}
+        self._refreshing = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def ttl(self, kind: str) -> int:
+        return self.ttls.get(kind, Config.CACHE_DURATION)
+
+    def classify(self, kind: str, timestamp: float, ttl: Optional[int] = None) -> str:
+        """按条目写入时间判断 fresh / stale（可先返回再后台刷新）/ expired"""
+        ttl = self.ttl(kind) if ttl is None else ttl
+        if ttl <= 0:
+            return FRESH
+        age = time.time() - timestamp
+        if age < ttl:
+            return FRESH
+        if kind not in NO_STALE_KINDS and age < ttl + self.stale_window:
+            return STALE
+        return EXPIRED
+
+    def record(self, kind: str, outcome: str) -> None:
+        """记录一次查找结果：hits / misses / stale / refresh_errors"""
+        with self._lock:
+            self._counters[kind][outcome] += 1
+
+    def refresh(self, key: str, func: Callable[[], Any], kind: Optional[str] = None) -> Optional[Future]:
+        """在后台刷新指定条目；该条目已在刷新中时返回None"""
+        with self._lock:
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=Config.CACHE_REFRESH_WORKERS,
+                                                    thread_name_prefix='cache-refresh')
+            executor = self._executor
+
+        def _run():
+            try:
+                return func()
+            except Exception:
+                # 刷新失败时保留旧条目，下次访问再重试
+                if kind:
+                    self.record(kind, 'refresh_errors')
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        return executor.submit(_run)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各种类的TTL、命中、未命中和返回旧值的次数"""
+        with self._lock:
+            result = {}
+            for kind, counters in self._counters.items():
+                lookups = counters['hits'] + counters['stale'] + counters['misses']
+                result[kind] = dict(counters, ttl=self.ttl(kind),
+                                    hit_rate=round((counters['hits'] + counters['stale']) / lookups, 3) if lookups else 0.0)
+            return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,56 @@
+import threading
+import requests
+from typing import Dict, Optional, Tuple
+from github import Github
+from config import Config
+
+
+# 以原始字节返回文件内容的媒体类型（不经过JSON和base64包装）
+RAW_MEDIA_TYPE = 'application/vnd.github.raw'
+
+
+class ClientPool:
+    """进程内共享的GitHub客户端池
+
+    - 每个 (API地址, Token) 对应一个长期存在的PyGithub客户端，其内部的HTTP会话在任务之间复用，
+      连接池大小与 CONCURRENT_REQUESTS 一致，避免每次导出重新建立TLS连接
+    - 条件请求和归档下载等直接发起的HTTP请求共用一个 requests.Session
+    """
+
+    _clients: Dict[Tuple[str, Optional[str]], Github] = {}
+    _session: Optional[requests.Session] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def client(cls, token: Optional[str]) -> Github:
+        """获取指定Token对应的共享PyGithub客户端，token 为None时为匿名客户端"""
+        key = (Config.GITHUB_API_URL, token)
+        with cls._lock:
+            client = cls._clients.get(key)
+            if client is None:
+                client = Github(token, base_url=Config.GITHUB_API_URL,
+                                timeout=Config.REQUEST_TIMEOUT, pool_size=Config.CONCURRENT_REQUESTS)
+                cls._clients[key] = client
+            return client
+
+    @classmethod
+    def session(cls) -> requests.Session:
+        """获取共享的HTTP会话（保持长连接）"""
+        with cls._lock:
+            if cls._session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=Config.CONCURRENT_REQUESTS,
+                                                        pool_maxsize=Config.CONCURRENT_REQUESTS)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                cls._session = session
+            return cls._session
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """关闭并清空所有共享客户端和会话（主要用于测试和更新Token后）"""
+        with cls._lock:
+            if cls._session is not None:
+                cls._session.close()
+            cls._clients.clear()
+            cls._session = None
@@ -0,0 +1,90 @@
+import mmap
+import tempfile
+import threading
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from config import Config
+from utils.file_records import make_file_record
+
+
+class ContentSpool:
+    """导出内容的磁盘暂存区
+
+    获取到的文件记录追加写入一个临时文件，内存中只保留 路径 -> (偏移, 长度, 元数据) 的索引；
+    渲染时通过内存映射按需读取单个文件的内容，任务的内存峰值与仓库大小无关。
+    支持 append/extend/len/下标/迭代，可以替代记录列表传给获取和合并流程。
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self._file = tempfile.TemporaryFile(prefix='git2md_spool_', dir=directory or Config.SPOOL_FOLDER)
+        self._index: List[Tuple[str, int, int, int, bool, bool]] = []
+        self._offset = 0
+        self._mapped: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        self._lock = threading.Lock()
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """追加一条文件记录，内容写入磁盘后不再占用内存"""
+        data = record.get('content', '').encode('utf-8')
+        with self._lock:
+            self._file.seek(self._offset)
+            self._file.write(data)
+            self._index.append((record['path'], self._offset, len(data), record.get('size', 0),
+                                bool(record.get('is_binary')), bool(record.get('is_oversized'))))
+            self._offset += len(data)
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _view(self) -> Optional[mmap.mmap]:
+        """映射已写入的内容，追加新内容后重新映射"""
+        if self._mapped is not None and self._mapped_size == self._offset:
+            return self._mapped
+        if self._mapped is not None:
+            self._mapped.close()
+            self._mapped = None
+        self._file.flush()
+        if self._offset:
+            self._mapped = mmap.mmap(self._file.fileno(), self._offset, access=mmap.ACCESS_READ)
+        self._mapped_size = self._offset
+        return self._mapped
+
+    def _load(self, entry: Tuple[str, int, int, int, bool, bool]) -> Dict[str, Any]:
+        path, offset, length, size, is_binary, is_oversized = entry
+        with self._lock:
+            view = self._view()
+            content = view[offset:offset + length].decode('utf-8') if length else ''
+        return make_file_record(path, content, size, is_binary=is_binary, is_oversized=is_oversized)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return self._load(self._index[index])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for entry in list(self._index):
+            yield self._load(entry)
+
+    def sorted_paths(self) -> List[str]:
+        """按路径排序的文件列表（不读取内容）"""
+        return sorted(entry[0] for entry in self._index)
+
+    def iter_sorted(self) -> Iterator[Dict[str, Any]]:
+        """按路径顺序逐个读取记录"""
+        for entry in sorted(self._index, key=lambda entry: entry[0]):
+            yield self._load(entry)
+
+    def close(self) -> None:
+        """释放内存映射并删除临时文件"""
+        with self._lock:
+            if self._mapped is not None:
+                self._mapped.close()
+                self._mapped = None
+            self._file.close()
+
+    def __enter__(self) -> 'ContentSpool':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
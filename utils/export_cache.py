@@ -0,0 +1,104 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+from config import Config
+
+
+class ExportCache:
+    """按提交固定的导出结果缓存
+
+    同一提交、相同过滤参数、输出格式和输出模式的导出结果完全相同：
+    - 已完成的结果直接复用 downloads/ 中的产物（产物被定时清理后自动失效）
+    - 正在进行的相同导出只保留一个任务，后来的提交直接关联到该任务
+    """
+
+    def __init__(self) -> None:
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(normalized: Dict[str, Any]) -> str:
+        payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _normalize_filters(params: Dict[str, Any]) -> Dict[str, Any]:
+        """规范化仓库和过滤参数（与顺序、大小写和多余的斜杠无关）"""
+        return {
+            'repo': f"{params['owner']}/{params['repo']}".lower(),
+            'file_types': sorted({ft.lower() for ft in params.get('file_types') or []}),
+            'exclude_names': sorted(set(params.get('exclude_names') or [])),
+            'exclude_dirs': sorted({ed.strip('/') for ed in params.get('exclude_dirs') or []}),
+            'use_default_filters': bool(params.get('use_default_filters'))
+        }
+
+    @classmethod
+    def make_filter_key(cls, params: Dict[str, Any]) -> str:
+        """仓库和过滤参数的键，同一键下不同提交的导出可以增量复用文件内容"""
+        return cls._digest(cls._normalize_filters(params))
+
+    @classmethod
+    def make_key(cls, commit_sha: str, params: Dict[str, Any]) -> str:
+        """由提交SHA和规范化后的导出参数生成缓存键"""
+        output_format = params.get('output_format', 'md')
+        output_mode = 'split' if params.get('output_mode') == 'split' and output_format == 'md' else 'single'
+        normalized = dict(cls._normalize_filters(params), commit=commit_sha,
+                          output_format=output_format, output_mode=output_mode)
+        return cls._digest(normalized)
+
+    @staticmethod
+    def _artifact_path(result: Dict[str, Any]) -> str:
+        return os.path.join(Config.DOWNLOAD_FOLDER, os.path.basename(result['download_url']))
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """返回可复用的导出结果，产物已被清理时返回None"""
+        with self._lock:
+            result = self._results.get(key)
+            if result is None:
+                return None
+            artifact_path = self._artifact_path(result)
+            if not os.path.exists(artifact_path):
+                del self._results[key]
+                return None
+            # 复用时刷新修改时间，避免产物刚被复用就被定时清理
+            os.utime(artifact_path)
+            return dict(result)
+
+    def claim(self, key: str, task_id: str) -> Optional[str]:
+        """登记正在进行的导出；已有相同导出在进行时返回其任务ID，否则返回None"""
+        with self._lock:
+            existing = self._in_flight.get(key)
+            if existing is not None:
+                return existing
+            self._in_flight[key] = task_id
+            return None
+
+    def complete(self, key: str, task_id: str, result: Dict[str, Any]) -> None:
+        """记录导出结果并结束登记"""
+        with self._lock:
+            self._results[key] = dict(result)
+            if self._in_flight.get(key) == task_id:
+                del self._in_flight[key]
+
+    def release(self, key: str, task_id: str) -> None:
+        """导出失败时结束登记，后续提交会重新执行"""
+        with self._lock:
+            if self._in_flight.get(key) == task_id:
+                del self._in_flight[key]
+
+    def expire(self) -> int:
+        """删除产物已被清理的结果，返回删除数量"""
+        with self._lock:
+            expired = [key for key, result in self._results.items()
+                       if not os.path.exists(self._artifact_path(result))]
+            for key in expired:
+                del self._results[key]
+            return len(expired)
+
+    def clear(self) -> None:
+        """清空所有已记录的结果"""
+        with self._lock:
+            self._results.clear()
@@ -0,0 +1,176 @@
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+from config import Config
+from utils.memory_budget import MemoryBudget
+
+
+class QueueFullError(Exception):
+    """导出队列已满，retry_after 为建议的重试等待时间（秒）"""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"服务器繁忙，请在 {retry_after} 秒后重试")
+        self.retry_after = retry_after
+
+
+class _Job:
+    """一个排队的执行单元，nbytes 为开始前需要占用的内存配额（0 表示不需要）"""
+
+    __slots__ = ('task_id', 'func', 'args', 'nbytes', 'enqueued_at')
+
+    def __init__(self, task_id: str, func: Callable[..., Any], args: tuple, nbytes: int = 0) -> None:
+        self.task_id = task_id
+        self.func = func
+        self.args = args
+        self.nbytes = nbytes
+        self.enqueued_at = time.monotonic()
+
+
+class ExportQueue:
+    """固定线程数的导出执行器，带有限长度的等待队列和内存准入
+
+    同时执行的导出任务不超过 EXPORT_WORKERS 个，排队的任务不超过 EXPORT_QUEUE_DEPTH 个；
+    队列已满时拒绝提交，由调用方返回 429。按最近任务的平均耗时估计重试等待时间。
+
+    任务在获取文件树并估计内存后，用 defer 把获取内容的阶段放回队列，
+    工作线程只取出内存预算（MemoryBudget）能够容纳的任务，等待配额时不占用工作线程。
+    小任务可以越过等待配额的大任务先执行；最早等待配额的任务等待超过 EXPORT_MEMORY_MAX_WAIT 秒后，
+    其他需要配额的任务不再插队。
+    """
+
+    _instance: Optional['ExportQueue'] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'ExportQueue':
+        """获取进程级共享实例（使用进程级内存预算）"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(memory_budget=MemoryBudget.shared())
+            return cls._instance
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """等待已提交的任务结束并丢弃共享实例（主要用于测试）"""
+        with cls._instance_lock:
+            if cls._instance is not None:
+                cls._instance.shutdown()
+            cls._instance = None
+
+    def __init__(self, workers: Optional[int] = None, max_queue: Optional[int] = None,
+                 memory_budget: Optional[MemoryBudget] = None) -> None:
+        self.workers = workers or Config.EXPORT_WORKERS
+        self.max_queue = Config.EXPORT_QUEUE_DEPTH if max_queue is None else max_queue
+        self.memory_budget = memory_budget
+        self._cond = threading.Condition()
+        self._queue: Deque[_Job] = deque()
+        self._running = 0
+        self._threads = []
+        self._closed = False
+        self._avg_duration: Optional[float] = None
+
+    def submit(self, task_id: str, func: Callable[..., Any], *args: Any) -> int:
+        """提交任务，返回排队位置（0 表示立即执行）；队列已满时抛出 QueueFullError"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('导出队列已关闭')
+            if self.is_full():
+                raise QueueFullError(self.retry_after())
+            self._queue.append(_Job(task_id, func, args))
+            self._start_workers()
+            self._cond.notify()
+            idle = self.workers - self._running
+            return max(len(self._queue) - idle, 0)
+
+    def defer(self, task_id: str, nbytes: int, func: Callable[..., Any], *args: Any) -> None:
+        """在任务执行中提交其后续阶段，占用 nbytes 内存配额后才开始执行；已接受的任务不受队列长度限制"""
+        with self._cond:
+            self._queue.append(_Job(task_id, func, args, nbytes if self.memory_budget else 0))
+            self._start_workers()
+            self._cond.notify()
+
+    def is_full(self) -> bool:
+        """空闲线程和剩余队列长度都已用完"""
+        with self._cond:
+            return len(self._queue) - (self.workers - self._running) >= self.max_queue
+
+    def position(self, task_id: str) -> Optional[int]:
+        """任务在等待队列中的位置（从1开始），不在队列中返回None"""
+        with self._cond:
+            for index, job in enumerate(self._queue):
+                if job.task_id == task_id:
+                    return index + 1
+        return None
+
+    def retry_after(self) -> int:
+        """估计队列腾出位置所需的时间（秒）"""
+        with self._cond:
+            if self._avg_duration is None:
+                return Config.EXPORT_RETRY_AFTER
+            waves = len(self._queue) / self.workers + 1
+            return max(1, int(self._avg_duration * waves))
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {'workers': self.workers, 'running': self._running,
+                    'queued': len(self._queue), 'max_queue': self.max_queue,
+                    'waiting_memory': sum(1 for job in self._queue if job.nbytes)}
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f'export-worker-{len(self._threads)}', daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _take_job(self) -> Optional[_Job]:
+        """按提交顺序取出第一个可以开始的任务（不需要配额，或配额足够）"""
+        oldest = next((job for job in self._queue if job.nbytes), None)
+        fifo = oldest is not None and time.monotonic() - oldest.enqueued_at >= Config.EXPORT_MEMORY_MAX_WAIT
+        for job in self._queue:
+            if job.nbytes:
+                if fifo and job is not oldest:
+                    continue
+                if not self.memory_budget.try_acquire(job.nbytes):
+                    continue
+            self._queue.remove(job)
+            return job
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    job = self._take_job()
+                    if job is not None:
+                        break
+                    if self._closed and not self._queue:
+                        return
+                    # 只剩等待配额的任务时定期醒来，检查最早的等待者是否已等待过久
+                    self._cond.wait(timeout=1.0 if self._queue else None)
+                self._running += 1
+
+            started = time.time()
+            try:
+                job.func(*job.args)
+            except Exception:
+                # 任务自行记录失败状态，执行器不因单个任务出错而退出
+                pass
+            finally:
+                duration = time.time() - started
+                with self._cond:
+                    self._running -= 1
+                    if job.nbytes:
+                        self.memory_budget.release(job.nbytes)
+                    self._avg_duration = duration if self._avg_duration is None \
+                        else 0.8 * self._avg_duration + 0.2 * duration
+                    # 归还配额后等待配额的任务可能可以开始
+                    self._cond.notify_all()
+
+    def shutdown(self) -> None:
+        """不再接受新任务，执行完已排队的任务后结束工作线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
@@ -3,8 +3,10 @@ import re
 import fnmatch
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional, Any
+from typing import List, Dict, Tuple, Optional, Any, Iterable, Iterator
 from config import Config
+from utils.file_records import max_single_file_bytes, make_oversized_record, make_binary_record
+from utils.content_spool import ContentSpool
 
 class FileProcessor:
     """文件处理器"""
@@ -17,85 +19,172 @@ class FileProcessor:
         self.exclude_names = [en.strip() for en in exclude_names if en.strip()] if exclude_names else []
         self.exclude_dirs = [ed.strip().strip('/') for ed in exclude_dirs if ed.strip()] if exclude_dirs else []
         
+        self.use_default_filters = use_default_filters
+        self.exclude_extensions: List[str] = []
+        
         if use_default_filters:
             self.exclude_dirs.extend(Config.DEFAULT_EXCLUDE_DIRS)
-            # 默认过滤规则中没有'DEFAULT_EXCLUDE_FILENAMES'和'DEFAULT_EXCLUDE_EXTENSIONS'，此处注释掉
-            # self.exclude_names.extend(Config.DEFAULT_EXCLUDE_FILENAMES)
-            # if not self.file_types: # 如果用户未指定类型，则使用默认排除扩展名
-            #      self.exclude_names.extend([f"*.{ext}" for ext in Config.DEFAULT_EXCLUDE_EXTENSIONS])
+            self.exclude_names.extend(Config.DEFAULT_EXCLUDE_FILES)
+            self.exclude_extensions = list(Config.DEFAULT_EXCLUDE_EXTENSIONS)
     
-    def filter_files(self, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """过滤文件列表"""
+    @staticmethod
+    def _has_extension(file_path: str, extensions: List[str]) -> bool:
+        """判断文件是否以给定扩展名结尾（支持 .tar.gz 这类复合扩展名）"""
+        file_name = Path(file_path).name.lower()
+        return any(file_name.endswith(ext) for ext in extensions)
+    
+    def should_include_dir(self, dir_path: str) -> bool:
+        """判断目录是否需要遍历，被排除目录下的文件都不会被导出"""
+        dir_path = dir_path.strip('/')
+        for dir_pattern in self.exclude_dirs:
+            if f'/{dir_pattern}/' in f'/{dir_path}/':
+                return False
+        return True
+    
+    def should_include_file(self, file_info: Dict[str, Any]) -> bool:
+        """判断单个文件是否符合过滤规则"""
+        if file_info.get('type') != 'file':
+            return False
         
-        def _is_excluded(file_path: str) -> bool:
-            # 检查是否在排除目录中
-            for dir_pattern in self.exclude_dirs:
-                if f'/{dir_pattern}/' in f'/{file_path}' or file_path.startswith(dir_pattern + '/'):
-                    return True
-            
-            # 检查是否匹配排除文件名
-            file_name = Path(file_path).name
-            for name_pattern in self.exclude_names:
-                if fnmatch.fnmatch(file_name, name_pattern):
-                    return True
+        file_path = file_info['path']
+        
+        # 检查是否在排除目录中
+        if not self.should_include_dir(os.path.dirname(file_path)):
+            return False
+        
+        # 检查是否匹配排除文件名
+        file_name = Path(file_path).name
+        for name_pattern in self.exclude_names:
+            if fnmatch.fnmatch(file_name, name_pattern):
+                return False
 
-            # 检查文件类型
-            if self.file_types:
-                file_ext = Path(file_path).suffix.lstrip('.').lower()
-                if file_ext not in self.file_types:
-                    return True
-            
+        # 检查默认排除的扩展名
+        if self.exclude_extensions and self._has_extension(file_path, self.exclude_extensions):
             return False
 
-        return [f for f in files if f.get('type') == 'file' and not _is_excluded(f['path'])]
+        # 检查文件类型
+        if self.file_types:
+            file_ext = Path(file_path).suffix.lstrip('.').lower()
+            if file_ext not in self.file_types:
+                return False
+        
+        return True
     
-    def merge_files_content(self, files_content: List[Dict[str, Any]], 
-                          output_format: str, repo_name: str) -> Tuple[str, int]:
-        """合并文件内容"""
-        if not files_content:
-            return "", 0
+    def filter_files(self, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """过滤文件列表"""
+        return [f for f in files if self.should_include_file(f)]
+    
+    def _is_known_binary(self, file_path: str) -> bool:
+        """按扩展名判断是否为已知二进制文件，用户在 file_types 中指定的扩展名除外"""
+        if not self._has_extension(file_path, Config.BINARY_EXTENSIONS):
+            return False
+        return Path(file_path).suffix.lstrip('.').lower() not in self.file_types
+    
+    def plan_fetch(self, files: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """根据树信息规划获取：超大文件和已知二进制扩展名直接生成占位，无需网络请求
+
+        file_types 中明确指定的扩展名总是获取内容，由解码结果判断是否为二进制。
+        返回 {'fetch': 需要获取的文件, 'placeholders': 占位记录, 'stats': 节省统计}
+        """
+        max_size = max_single_file_bytes()
+        to_fetch = []
+        placeholders = []
+        saved_bytes = 0
         
-        merged_content = []
-        total_size = 0
+        for file_info in files:
+            file_path = file_info['path']
+            size = file_info.get('size') or 0
+            
+            if size > max_size:
+                placeholders.append(make_oversized_record(file_path, size))
+            elif self._is_known_binary(file_path):
+                placeholders.append(make_binary_record(file_path, size))
+            else:
+                to_fetch.append(file_info)
+                continue
+            saved_bytes += size
         
+        return {
+            'fetch': to_fetch,
+            'placeholders': placeholders,
+            'stats': {
+                'planned_files': len(files),
+                'fetch_files': len(to_fetch),
+                'skipped_files': len(placeholders),
+                'saved_bytes': saved_bytes,
+                'saved_api_calls': len(placeholders)
+            }
+        }
+    
+    @staticmethod
+    def _sorted_records(files_content: Iterable[Dict[str, Any]]) -> Tuple[List[str], Iterable[Dict[str, Any]]]:
+        """返回 (排序后的路径, 按路径顺序的记录)；磁盘暂存区按需逐个读取记录"""
+        if isinstance(files_content, ContentSpool):
+            return files_content.sorted_paths(), files_content.iter_sorted()
         sorted_files = sorted(files_content, key=lambda x: x['path'])
+        return [f['path'] for f in sorted_files], sorted_files
+    
+    def _iter_merged_parts(self, files_content: Iterable[Dict[str, Any]],
+                           output_format: str, repo_name: str) -> Iterator[str]:
+        """逐段生成合并后的内容"""
+        sorted_paths, sorted_files = self._sorted_records(files_content)
 
         if output_format == 'md':
             # 标题和基本信息
-            merged_content.append(f"# {repo_name} - 代码聚合文件\n\n")
-            merged_content.append(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            merged_content.append(f"文件数量: {len(files_content)}\n\n")
+            yield f"# {repo_name} - 代码聚合文件\n\n"
+            yield f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            yield f"文件数量: {len(sorted_paths)}\n\n"
             
             # 生成目录（TOC）
-            merged_content.append("## 📑 目录\n\n")
-            for file_info in sorted_files:
-                file_path = file_info['path']
+            yield "## 📑 目录\n\n"
+            for file_path in sorted_paths:
                 anchor = self._generate_anchor(file_path)
-                merged_content.append(f"- [{file_path}](#{anchor})\n")
-            merged_content.append("\n---\n\n")
+                yield f"- [{file_path}](#{anchor})\n"
+            yield "\n---\n\n"
             
             # 文件内容
             for file_info in sorted_files:
-                merged_content.append(self._format_file_content_md(file_info))
-                total_size += file_info.get('size', 0)
+                yield self._format_file_content_md(file_info)
         else: # TXT格式
-            merged_content.append(f"{repo_name} - 代码聚合文件\n")
-            merged_content.append(f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            merged_content.append(f"文件数量: {len(files_content)}\n")
-            merged_content.append("=" * 80 + "\n\n")
+            yield f"{repo_name} - 代码聚合文件\n"
+            yield f"生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            yield f"文件数量: {len(sorted_paths)}\n"
+            yield "=" * 80 + "\n\n"
             
             for file_info in sorted_files:
-                file_path = file_info['path']
-                content = file_info['content']
-                total_size += file_info.get('size', 0)
-                merged_content.append(f"===== /{file_path} =====\n")
-                merged_content.append(f"{content}\n\n")
+                yield f"===== /{file_info['path']} =====\n"
+                yield f"{file_info['content']}\n\n"
+    
+    def merge_files_content(self, files_content: List[Dict[str, Any]], 
+                          output_format: str, repo_name: str) -> Tuple[str, int]:
+        """合并文件内容"""
+        if not files_content:
+            return "", 0
         
-        final_content = ''.join(merged_content)
+        final_content = ''.join(self._iter_merged_parts(files_content, output_format, repo_name))
         # Recalculate size based on final content for accuracy
         final_size = len(final_content.encode('utf-8'))
         return final_content, final_size
     
+    def write_merged_file(self, files_content: Iterable[Dict[str, Any]], output_format: str,
+                          repo_name: str, filename: str) -> Dict[str, Any]:
+        """合并文件内容并逐段写入下载目录，不在内存中拼接完整结果"""
+        file_path = os.path.join(Config.DOWNLOAD_FOLDER, filename)
+        os.makedirs(Config.DOWNLOAD_FOLDER, exist_ok=True)
+        
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                for part in self._iter_merged_parts(files_content, output_format, repo_name):
+                    f.write(part)
+            
+            return {
+                'file_path': file_path,
+                'file_name': filename,
+                'file_size': os.path.getsize(file_path)
+            }
+        except Exception as e:
+            raise Exception(f"保存文件失败：{str(e)}")
+    
     def save_split_files(self, files_content: List[Dict[str, Any]], repo_name: str, output_format: str) -> Dict[str, Any]:
         """将内容拆分为多个文件并保存"""
         if not files_content:
@@ -119,7 +208,7 @@ class FileProcessor:
         current_content.append(header)
         current_size += len(header.encode('utf-8'))
 
-        sorted_files = sorted(files_content, key=lambda x: x['path'])
+        _, sorted_files = self._sorted_records(files_content)
 
         for file_info in sorted_files:
             file_path = file_info['path']
@@ -0,0 +1,113 @@
+import codecs
+from typing import Dict, Any, List, Optional, Union
+from config import Config
+
+
+# 流式读取文件内容时每次读取的字节数
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def max_single_file_bytes() -> int:
+    """单文件大小上限（字节）"""
+    return int(Config.MAX_SINGLE_FILE_SIZE_MB * 1024 * 1024)
+
+
+def make_file_record(path: str, content: str, size: int,
+                     is_binary: bool = False, is_oversized: bool = False) -> Dict[str, Any]:
+    """构造统一格式的文件记录"""
+    return {
+        'path': path,
+        'content': content,
+        'size': size,
+        'is_binary': is_binary,
+        'is_oversized': is_oversized
+    }
+
+
+def make_oversized_record(path: str, size: int) -> Dict[str, Any]:
+    """构造超大文件的占位记录"""
+    return make_file_record(
+        path,
+        f"[文件过大: {size / (1024*1024):.1f}MB > {Config.MAX_SINGLE_FILE_SIZE_MB}MB]",
+        size,
+        is_oversized=True
+    )
+
+
+def make_binary_record(path: str, size: int) -> Dict[str, Any]:
+    """构造二进制文件的占位记录"""
+    return make_file_record(path, f"[二进制文件或编码无法识别: {path}]", size, is_binary=True)
+
+
+def relabel_record(record: Dict[str, Any], path: str) -> Dict[str, Any]:
+    """将记录用于另一路径（如fork中相同的blob），二进制和超大文件的占位内容按新路径重新生成"""
+    if record['path'] == path:
+        return record
+    if record.get('is_oversized'):
+        return make_oversized_record(path, record.get('size', 0))
+    if record.get('is_binary'):
+        return make_binary_record(path, record.get('size', 0))
+    return dict(record, path=path)
+
+
+def make_error_record(path: str, message: str) -> Dict[str, Any]:
+    """构造获取失败的占位记录"""
+    return make_file_record(path, message, 0)
+
+
+def is_error_record(record: Dict[str, Any]) -> bool:
+    """判断记录是否为获取失败的占位（失败记录不应写入缓存）"""
+    return (not record.get('size') and not record.get('is_binary') and not record.get('is_oversized')
+            and record.get('content', '').startswith('['))
+
+
+def decode_file_record(path: str, data: Union[bytes, memoryview], size: int) -> Dict[str, Any]:
+    """将原始字节解码为文件记录，无法按UTF-8解码时视为二进制文件
+
+    data 可以是任意支持缓冲区协议的对象（如内存映射的 memoryview），直接解码，不先复制为bytes。
+    """
+    try:
+        return make_file_record(path, str(data, 'utf-8'), size)
+    except UnicodeDecodeError:
+        return make_binary_record(path, size)
+
+
+class StreamDecoder:
+    """增量解码流式读取的文件内容
+
+    按块喂入原始字节，超过单文件大小上限时 feed 返回False，调用方应停止读取，剩余内容不再缓冲；
+    遇到无法按UTF-8解码的字节时同样提前停止，视为二进制文件。
+    """
+
+    def __init__(self, path: str, max_size: Optional[int] = None) -> None:
+        self.path = path
+        self.max_size = max_single_file_bytes() if max_size is None else max_size
+        self.size = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._parts: List[str] = []
+        self._binary = False
+
+    def feed(self, chunk: bytes) -> bool:
+        """喂入一块内容，返回是否需要继续读取"""
+        self.size += len(chunk)
+        if self.size > self.max_size:
+            return False
+        try:
+            self._parts.append(self._decoder.decode(chunk))
+        except UnicodeDecodeError:
+            self._binary = True
+            return False
+        return True
+
+    def record(self, size: Optional[int] = None) -> Dict[str, Any]:
+        """生成文件记录；size 为已知的文件大小（如 Content-Length），提前停止时用于占位记录"""
+        size = max(size or 0, self.size)
+        if size > self.max_size:
+            return make_oversized_record(self.path, size)
+        if not self._binary:
+            try:
+                self._parts.append(self._decoder.decode(b'', final=True))
+                return make_file_record(self.path, ''.join(self._parts), size)
+            except UnicodeDecodeError:
+                pass
+        return make_binary_record(self.path, size)
@@ -0,0 +1,157 @@
+import os
+import base64
+import shutil
+import tempfile
+import subprocess
+from typing import Dict, Any, Iterator, List, Optional, Iterable, Tuple
+from config import Config
+from utils.file_processor import FileProcessor
+from utils.file_records import max_single_file_bytes, make_oversized_record, decode_file_record
+
+
+class GitFetchError(Exception):
+    """通过git协议获取仓库内容失败"""
+    pass
+
+
+def is_available() -> bool:
+    """系统中是否安装了git"""
+    return shutil.which('git') is not None
+
+
+class GitFetcher:
+    """通过git协议获取文件内容，完全不使用REST API
+
+    1. 以 blob:none 过滤浅获取目标提交，只下载提交和树对象
+    2. 在本地树上应用 FileProcessor 的过滤规则，选出需要的文件
+    3. 与稀疏检出相同，用一次 noop 协商的 fetch 把选中的blob打包获取
+    4. 通过 cat-file --batch 读取原始blob内容，不写出工作区
+
+    部分克隆中blob大小在获取前未知（ls-tree -l 会逐个触发按需获取），
+    超大文件在读取时才生成占位；通过 wanted_paths 传入按树API规划后的路径可避免获取超大文件。
+    """
+
+    def __init__(self, token: Optional[str] = None, clone_url: Optional[str] = None,
+                 timeout: Optional[int] = None) -> None:
+        if not is_available():
+            raise GitFetchError("git获取方式需要安装git")
+        self.token = token
+        self.clone_url_template = clone_url or Config.GIT_CLONE_URL
+        self.timeout = timeout or Config.GIT_FETCH_TIMEOUT
+        self.stats: Dict[str, int] = {}
+
+    def clone_url(self, owner: str, repo_name: str) -> str:
+        return self.clone_url_template.format(owner=owner, repo=repo_name)
+
+    def _env(self, url: str) -> Dict[str, str]:
+        """git子进程环境：禁止交互式认证，Token通过环境变量中的配置传递，不出现在命令行中"""
+        env = dict(os.environ, GIT_TERMINAL_PROMPT='0', GIT_CONFIG_NOSYSTEM='1')
+        if self.token and url.startswith('https://'):
+            credentials = base64.b64encode(f'x-access-token:{self.token}'.encode('utf-8')).decode('ascii')
+            env.update({
+                'GIT_CONFIG_COUNT': '1',
+                'GIT_CONFIG_KEY_0': 'http.extraHeader',
+                'GIT_CONFIG_VALUE_0': f'Authorization: Basic {credentials}'
+            })
+        return env
+
+    def _git(self, work_dir: str, env: Dict[str, str], *args: str, stdin: Optional[bytes] = None) -> bytes:
+        command = ['git', '-C', work_dir, '-c', 'maintenance.auto=false', '-c', 'gc.auto=0', *args]
+        name = next(arg for arg in args if not arg.startswith('-') and '=' not in arg)
+        try:
+            result = subprocess.run(command, input=stdin, env=env, capture_output=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            raise GitFetchError(f"git {name} 超时（{self.timeout}秒）")
+        if result.returncode != 0:
+            message = result.stderr.decode('utf-8', errors='replace').strip().splitlines()
+            raise GitFetchError(f"git {name} 失败：{message[-1] if message else result.returncode}")
+        return result.stdout
+
+    def _list_tree(self, work_dir: str, env: Dict[str, str]) -> List[Tuple[str, str]]:
+        """列出提交中的所有普通文件：(blob SHA, 路径)，只读取树对象"""
+        output = self._git(work_dir, env, 'ls-tree', '-r', '-z', 'FETCH_HEAD')
+        entries = []
+        for line in output.split(b'\0'):
+            if not line:
+                continue
+            meta, path = line.split(b'\t', 1)
+            mode, object_type, sha = meta.split()
+            # 只处理普通文件，跳过符号链接和子模块
+            if object_type != b'blob' or mode not in (b'100644', b'100755'):
+                continue
+            entries.append((sha.decode(), path.decode('utf-8', errors='replace')))
+        return entries
+
+    def _local_blobs(self, work_dir: str, env: Dict[str, str]) -> set:
+        """本地已有的blob（服务端不支持过滤时浅获取会带回全部blob）"""
+        output = self._git(work_dir, env, 'cat-file', '--batch-all-objects',
+                           '--batch-check=%(objectname) %(objecttype)')
+        return {line.split()[0].decode() for line in output.splitlines() if line.endswith(b' blob')}
+
+    def _read_blobs(self, work_dir: str, env: Dict[str, str], shas: List[str],
+                    max_size: int) -> Iterator[Tuple[str, int, Optional[bytes]]]:
+        """流式读取blob内容，产出 (SHA, 大小, 内容)，超过 max_size 的内容被丢弃并返回None"""
+        with tempfile.TemporaryFile() as request:
+            request.write(''.join(f'{sha}\n' for sha in shas).encode('ascii'))
+            request.seek(0)
+            process = subprocess.Popen(
+                ['git', '-C', work_dir, 'cat-file', '--batch'],
+                stdin=request, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env
+            )
+            try:
+                for _ in shas:
+                    header = process.stdout.readline().split()
+                    if len(header) != 3:
+                        raise GitFetchError(f"读取blob失败：{b' '.join(header).decode(errors='replace')}")
+                    size = int(header[2])
+                    data = process.stdout.read(size)
+                    process.stdout.read(1)  # 内容后的换行
+                    yield header[0].decode(), size, data if size <= max_size else None
+            finally:
+                process.stdout.close()
+                process.wait()
+
+    def iter_files(self, owner: str, repo_name: str, ref: str,
+                   file_processor: Optional[FileProcessor] = None,
+                   wanted_paths: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """获取指定引用的文件，按过滤规则产出文件记录
+
+        file_processor: 复用 FileProcessor 的过滤规则
+        wanted_paths: 可选，仅返回这些路径（与树API的结果保持一致）
+        """
+        wanted = set(wanted_paths) if wanted_paths is not None else None
+        max_size = max_single_file_bytes()
+        url = self.clone_url(owner, repo_name)
+        env = self._env(url)
+
+        with tempfile.TemporaryDirectory(prefix='git2md_') as work_dir:
+            self._git(work_dir, env, 'init', '-q', '--bare')
+            self._git(work_dir, env, 'remote', 'add', 'origin', url)
+            self._git(work_dir, env, 'config', 'remote.origin.promisor', 'true')
+            self._git(work_dir, env, 'config', 'remote.origin.partialclonefilter', 'blob:none')
+            self._git(work_dir, env, 'fetch', '-q', '--filter=blob:none', '--depth=1', '--no-tags', 'origin', ref)
+
+            entries = self._list_tree(work_dir, env)
+            selected: Dict[str, List[str]] = {}
+            for sha, path in entries:
+                if wanted is not None and path not in wanted:
+                    continue
+                file_info = {'path': path, 'name': os.path.basename(path), 'type': 'file'}
+                if file_processor and not file_processor.should_include_file(file_info):
+                    continue
+                selected.setdefault(sha, []).append(path)
+
+            missing = sorted(set(selected) - self._local_blobs(work_dir, env))
+            if missing:
+                self._git(work_dir, env, '-c', 'fetch.negotiationAlgorithm=noop', 'fetch', '-q', 'origin',
+                          '--no-tags', '--no-write-fetch-head', '--recurse-submodules=no',
+                          '--filter=blob:none', '--stdin',
+                          stdin=''.join(f'{sha}\n' for sha in missing).encode('ascii'))
+            self.stats = {'tree_files': len(entries), 'selected_blobs': len(selected), 'fetched_blobs': len(missing)}
+
+            for sha, size, data in self._read_blobs(work_dir, env, list(selected), max_size):
+                for path in selected[sha]:
+                    if data is None:
+                        yield make_oversized_record(path, size)
+                    else:
+                        yield decode_file_record(path, data, size)
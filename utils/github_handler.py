@@ -1,18 +1,41 @@
 import requests
-import base64
 import time
 import json
 import os
 import re
-from github import Github, GithubException
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+from urllib.parse import quote
+from collections import deque
+from github import GithubException
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from config import Config
+from utils.archive_fetcher import ArchiveFetcher, ArchiveError
+from utils.git_fetcher import GitFetcher, GitFetchError
+from utils.sources import RepositorySource
+from utils.client_pool import ClientPool, RAW_MEDIA_TYPE
+from utils.blob_cache import BlobCache
+from utils.memory_cache import MemoryCache
+from utils.cache_codec import encode_entry, decode_entry, raw_size, CACHE_FILE_SUFFIX
+from utils.cache_policy import CachePolicy, FRESH, STALE
+from utils.cache_index import CacheIndex
+from utils.single_flight import SingleFlight
+from utils.rate_limiter import RateLimiter
+from utils.token_pool import TokenPool, is_budget_exhausted
+from utils.retry import RetryPolicy, RetryBudget, RetryableHTTPError
+from utils import async_fetcher
+from utils.async_fetcher import AsyncFetcher, AsyncFetchError
+from utils.file_records import (
+    make_error_record, relabel_record, StreamDecoder, STREAM_CHUNK_SIZE
+)
+
+# 完整的40位提交SHA（对应的文件树内容不会变化）
+COMMIT_SHA_PATTERN = re.compile(r'[0-9a-f]{40}')
 
 class GitHubError(Exception):
     """GitHub操作异常"""
     pass
 
-class GitHubHandler:
+class GitHubHandler(RepositorySource):
     """GitHub仓库处理器"""
 
     @staticmethod
@@ -23,87 +46,325 @@ class GitHubHandler:
             return match.groups()
         raise ValueError("无效的GitHub仓库URL")
     
-    def __init__(self):
-        self.github = None
-        github_token = Config.get_github_token()
-        if github_token:
-            self.github = Github(github_token)
-        else:
-            self.github = Github()
+    def __init__(self, engine=None, tokens=None):
+        """一个实例对应一次导出的上下文：仓库对象和仓库信息只解析一次，客户端来自进程级共享池"""
+        # Token池：每次请求选择剩余额度最多的Token，未配置Token时为匿名访问
+        self.token_pool = TokenPool.shared(tokens)
+        self._clients = {}
+        self.token = self.token_pool.tokens[0]
+        self.github = self._client_for(self.token)
+        
+        # 本次导出内的仓库对象和仓库信息，以及文件树中各文件的blob SHA（用于按SHA读写内容缓存）
+        self._repos = {}
+        self._repo_infos = {}
+        self._blob_shas = {}
+        self.blob_cache = BlobCache.shared()
+        
+        # 获取引擎：thread 使用线程池 + PyGithub，async 使用 asyncio + 连接池
+        self.engine = engine or Config.FETCH_ENGINE
         
-        # 缓存机制
-        self.cache = {}
+        # 缓存机制：进程级内存LRU在前，磁盘JSON文件在后
+        self.memory_cache = MemoryCache.shared()
+        self.cache_policy = CachePolicy.shared()
+        self.cache_index = CacheIndex.shared()
         self.cache_dir = 'cache'
         os.makedirs(self.cache_dir, exist_ok=True)
         
-        # 请求延迟配置
-        self.request_delay = 0.5  # 秒
-        self.last_request_time = 0
+        # 重试策略（每个处理器实例即每个任务拥有独立的重试预算）
+        self.retry_policy = RetryPolicy(budget=RetryBudget())
+    
+    def _client_for(self, token):
+        """获取指定Token对应的共享PyGithub客户端（长连接在任务之间复用）"""
+        client = self._clients.get(token)
+        if client is None:
+            client = ClientPool.client(token)
+            self._clients[token] = client
+        return client
+    
+    def _repo(self, gh, owner, repo_name):
+        """获取仓库对象，同一客户端在本次导出内只构造一次（惰性对象不产生请求）"""
+        key = (gh, f"{owner}/{repo_name}")
+        repo = self._repos.get(key)
+        if repo is None:
+            repo = gh.get_repo(key[1], lazy=True)
+            self._repos[key] = repo
+        return repo
     
-    def _wait_for_rate_limit(self):
+    def _default_branch(self, owner, repo_name):
+        """解析默认分支（本次导出内只解析一次）"""
+        return self.get_repo_info(owner, repo_name)['default_branch']
+    
+    def _wait_for_rate_limit(self, token=None):
         """等待速率限制"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.request_delay:
-            time.sleep(self.request_delay - time_since_last)
-        self.last_request_time = time.time()
+        RateLimiter.for_token(token).acquire()
+    
+    def _call_api(self, func, *args, **kwargs):
+        """带速率限制、Token轮换和重试的GitHub API调用
+
+        func 的第一个参数为所选Token对应的PyGithub客户端。
+        某个Token额度耗尽时立即换用池中其他可用Token，不占用重试次数。
+        """
+        def _attempt():
+            exhausted = []
+            while True:
+                token = self.token_pool.select(exclude=exhausted)
+                self._wait_for_rate_limit(token)
+                try:
+                    return func(self._client_for(token), *args, **kwargs)
+                except GithubException as e:
+                    if (is_budget_exhausted(e.status, e.headers)
+                            and self.token_pool.has_available(exclude=exhausted + [token])):
+                        exhausted.append(token)
+                        continue
+                    raise
+                finally:
+                    self._sync_rate_limit(token)
+        
+        return self.retry_policy.call(_attempt)
+    
+    def _sync_rate_limit(self, token=None):
+        """将PyGithub从响应头记录的最新额度同步到共享限制器，未指定Token时同步全部已用客户端"""
+        tokens = [token] if token in self._clients else list(self._clients)
+        for token in tokens:
+            requester = getattr(self._clients[token], '_Github__requester', None)
+            if requester is None:
+                continue
+            remaining, limit = requester.rate_limiting
+            RateLimiter.for_token(token).update(remaining, limit, requester.rate_limiting_resettime)
+    
+    def _async_fetcher(self):
+        """启用异步引擎且依赖可用时返回 AsyncFetcher，否则返回 None（回退到线程池）"""
+        if self.engine != 'async' or not async_fetcher.is_available():
+            return None
+        return AsyncFetcher(token_pool=self.token_pool, retry_policy=self.retry_policy)
     
     def _get_cache_path(self, key):
         """获取缓存文件路径"""
-        return os.path.join(self.cache_dir, f"{key}.json")
+        return os.path.join(self.cache_dir, f"{key}{CACHE_FILE_SUFFIX}")
     
-    def _get_from_cache(self, key):
-        """从缓存获取数据"""
+    def _get_cache_entry(self, key):
+        """读取完整的缓存条目（不检查是否过期），不存在或损坏时返回None
+
+        先查内存缓存，未命中时读取磁盘文件并回填内存缓存；
+        只有旧版 .json 文件时读取后转换为新格式。
+        """
         cache_path = self._get_cache_path(key)
-        if os.path.exists(cache_path):
+        memory_key = os.path.abspath(cache_path)
+        entry = self.memory_cache.get(memory_key)
+        if entry is not None:
+            self.cache_index.touch(key)
+            return entry
+        try:
+            with open(cache_path, 'rb') as f:
+                data = f.read()
+            entry = decode_entry(data)
+            # 内存中保存的是解码后的对象，按未压缩的JSON长度计入内存缓存
+            self.memory_cache.put(memory_key, entry, raw_size(data))
+            self.cache_index.touch(key)
+            return entry
+        except FileNotFoundError:
+            return self._migrate_legacy_entry(key)
+        except:
+            pass
+        return None
+    
+    def _migrate_legacy_entry(self, key):
+        """读取旧版JSON缓存文件，以新格式重新保存并删除旧文件"""
+        legacy_path = os.path.join(self.cache_dir, f"{key}.json")
+        try:
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except:
+            return None
+        if self._write_cache_entry(key, entry):
             try:
-                with open(cache_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # 检查缓存是否过期（5分钟）
-                    if time.time() - data.get('timestamp', 0) < 300:
-                        return data.get('content')
-            except:
+                os.remove(legacy_path)
+            except OSError:
                 pass
-        return None
+        return entry
     
-    def _save_to_cache(self, key, content):
-        """保存数据到缓存"""
+    def _write_cache_entry(self, key, entry):
+        """写入内存缓存和磁盘，先写临时文件再替换，避免其他进程读到半个文件"""
         cache_path = self._get_cache_path(key)
         try:
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'timestamp': time.time(),
-                    'content': content
-                }, f)
+            data = encode_entry(entry)
+            self.memory_cache.put(os.path.abspath(cache_path), entry, raw_size(data))
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, cache_path)
+            self.cache_index.record(key, len(data), entry.get('cost', 1))
+            return True
         except:
-            pass
+            return False
     
-    def get_repo_info(self, owner, repo_name):
-        """获取仓库基本信息"""
-        cache_key = f"repo_{owner}_{repo_name}"
-        cached = self._get_from_cache(cache_key)
+    def _get_from_cache(self, kind, key, refresh=None, ttl=None):
+        """按条目种类的TTL从缓存获取数据，未命中返回None"""
+        return self._cached_content(kind, key, self._get_cache_entry(key), refresh, ttl)
+    
+    def _cached_content(self, kind, key, entry, refresh=None, ttl=None):
+        """判断缓存条目是否可用
+
+        未过期时直接返回；刚过期（在 CACHE_STALE_WINDOW 内）且提供了 refresh 时同样立即返回，
+        并在后台调用 refresh 重新获取，请求路径不等待GitHub。ttl 为空时使用该种类的默认TTL。
+        """
+        if entry is None:
+            self.cache_policy.record(kind, 'misses')
+            return None
+        state = self.cache_policy.classify(kind, entry.get('timestamp', 0), ttl)
+        if state == FRESH:
+            self.cache_policy.record(kind, 'hits')
+            return entry.get('content')
+        if state == STALE and refresh is not None:
+            self.cache_policy.record(kind, 'stale')
+            self.cache_policy.refresh(key, refresh, kind)
+            return entry.get('content')
+        self.cache_policy.record(kind, 'misses')
+        return None
+    
+    def _save_to_cache(self, key, content, validators=None, cost=1):
+        """保存数据到缓存，validators 为条件请求所需的 url/etag/last_modified，cost 为重新获取所需的请求数"""
+        entry = {
+            'timestamp': time.time(),
+            'content': content,
+            'cost': cost
+        }
+        if validators:
+            entry.update(validators)
+        self._write_cache_entry(key, entry)
+    
+    def _revalidate_cache(self, key, entry):
+        """使用 ETag/Last-Modified 发起条件请求
+
+        返回 (是否未变化, 新的JSON数据, 新的校验信息)。
+        未变化（304）时刷新缓存时间戳，304响应不计入主速率限制，因此不占用令牌。
+        """
+        if not entry or not entry.get('url') or not (entry.get('etag') or entry.get('last_modified')):
+            return False, None, None
+        if time.time() - entry.get('timestamp', 0) > Config.CACHE_REVALIDATE_MAX_AGE:
+            return False, None, None
+        
+        token = self.token_pool.select()
+        headers = {'Accept': 'application/vnd.github+json'}
+        if token:
+            headers['Authorization'] = f'token {token}'
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        
+        try:
+            response = ClientPool.session().get(f"{Config.GITHUB_API_URL}{entry['url']}", headers=headers,
+                                                timeout=Config.REQUEST_TIMEOUT)
+        except requests.RequestException:
+            return False, None, None
+        RateLimiter.for_token(token).update_from_headers(response.headers)
+        
+        if response.status_code == 304:
+            self._save_to_cache(key, entry['content'], self._validators(entry['url'], entry), entry.get('cost', 1))
+            return True, None, None
+        if response.status_code == 200:
+            return False, response.json(), self._validators(entry['url'], response.headers)
+        return False, None, None
+    
+    def get_commit_sha(self, owner, repo_name, branch):
+        """将分支解析为当前提交SHA，用于固定一次导出的内容
+
+        解析结果按 CACHE_TTL_COMMIT 缓存；过期后同步重新解析，不返回旧值（推送后的导出必须使用新提交）。
+        """
+        cache_key = f"commit_{owner}_{repo_name}_{branch}"
+        cached = self._get_from_cache('commit', cache_key)
         if cached:
             return cached
+        return self._load_commit_sha(owner, repo_name, branch)
+    
+    def _load_commit_sha(self, owner, repo_name, branch):
+        """请求分支信息并缓存其提交SHA"""
+        try:
+            ref = self._call_api(lambda gh: self._repo(gh, owner, repo_name).get_branch(branch))
+            sha = ref.commit.sha
+            self._save_to_cache(f"commit_{owner}_{repo_name}_{branch}", sha)
+            return sha
+        except GithubException as e:
+            if e.status == 404:
+                raise GitHubError("仓库不存在或分支不存在")
+            raise GitHubError(f"获取分支信息失败：{e.data.get('message', str(e))}")
+        except GitHubError:
+            raise
+        except Exception as e:
+            raise GitHubError(f"网络或其他错误：{str(e)}")
+    
+    @staticmethod
+    def _validators(url, source):
+        """从响应头（或旧缓存条目）中提取条件请求校验信息"""
+        etag = source.get('etag') or source.get('ETag')
+        last_modified = source.get('last_modified') or source.get('Last-Modified')
+        return {'url': url, 'etag': etag, 'last_modified': last_modified}
+    
+    @staticmethod
+    def _build_repo_info(data):
+        """由仓库JSON构造仓库信息，并检查仓库大小"""
+        repo_size_mb = data['size'] / 1024  # GitHub API返回的size单位是KB
+        if repo_size_mb > Config.MAX_REPO_SIZE_MB:
+            raise GitHubError(f"仓库大小 {repo_size_mb:.1f}MB 超过限制 {Config.MAX_REPO_SIZE_MB}MB")
+        
+        return {
+            'name': data['name'],
+            'full_name': data['full_name'],
+            'size_kb': data['size'],
+            'size_mb': repo_size_mb,
+            'default_branch': data['default_branch'],
+            'private': data['private']
+        }
+    
+    @staticmethod
+    def _build_tree_files(data, prefix=''):
+        """由树JSON构造文件列表，prefix 为子树所在目录（以 / 结尾）"""
+        files = []
+        for item in data.get('tree', []):
+            if item.get('type') == 'blob':  # 只要文件，不要目录
+                files.append({
+                    'path': prefix + item['path'],
+                    'name': os.path.basename(item['path']),
+                    'size': item.get('size', 0),
+                    'sha': item['sha'],
+                    'type': 'file'
+                })
+        return files
+    
+    def get_repo_info(self, owner, repo_name):
+        """获取仓库基本信息"""
+        memo_key = f"{owner}/{repo_name}"
+        if memo_key in self._repo_infos:
+            return self._repo_infos[memo_key]
         
+        cached = self._get_from_cache('repo', f"repo_{owner}_{repo_name}",
+                                      lambda: self._load_repo_info(owner, repo_name))
+        result = cached if cached else self._load_repo_info(owner, repo_name)
+        self._repo_infos[memo_key] = result
+        return result
+    
+    def _load_repo_info(self, owner, repo_name):
+        """通过条件请求或仓库API获取仓库信息并写入缓存"""
+        cache_key = f"repo_{owner}_{repo_name}"
         try:
-            self._wait_for_rate_limit()
-            repo = self.github.get_repo(f"{owner}/{repo_name}")
-            
-            # 检查仓库大小
-            repo_size_mb = repo.size / 1024  # GitHub API返回的size单位是KB
-            if repo_size_mb > Config.MAX_REPO_SIZE_MB:
-                raise GitHubError(f"仓库大小 {repo_size_mb:.1f}MB 超过限制 {Config.MAX_REPO_SIZE_MB}MB")
+            # 缓存过期但带有校验信息时，先发起条件请求
+            entry = self._get_cache_entry(cache_key)
+            unchanged, data, validators = self._revalidate_cache(cache_key, entry)
+            if unchanged:
+                return entry['content']
             
-            result = {
-                'name': repo.name,
-                'full_name': repo.full_name,
-                'size_kb': repo.size,
-                'size_mb': repo_size_mb,
-                'default_branch': repo.default_branch,
-                'private': repo.private
-            }
+            if data is None:
+                repo = self._call_api(lambda gh: gh.get_repo(f"{owner}/{repo_name}"))
+                data = repo.raw_data
+                validators = {
+                    'url': f"/repos/{owner}/{repo_name}",
+                    'etag': repo.etag,
+                    'last_modified': repo.last_modified
+                }
             
-            self._save_to_cache(cache_key, result)
+            result = self._build_repo_info(data)
+            self._save_to_cache(cache_key, result, validators)
             return result
             
         except GithubException as e:
@@ -113,42 +374,161 @@ class GitHubHandler:
                 raise GitHubError("API限制或权限不足，请设置GitHub Token或稍后重试")
             else:
                 raise GitHubError(f"获取仓库信息失败：{e.data.get('message', str(e))}")
+        except GitHubError:
+            raise
         except Exception as e:
             raise GitHubError(f"网络或其他错误：{str(e)}")
+        finally:
+            self._sync_rate_limit()
+    
+    @staticmethod
+    def _pruned_tree_cache_key(cache_key, file_processor):
+        """遍历时跳过了排除目录的文件树只对相同的排除目录有效，缓存键需包含排除目录"""
+        if not file_processor or not file_processor.exclude_dirs:
+            return None
+        digest = hashlib.sha1('\n'.join(sorted(file_processor.exclude_dirs)).encode('utf-8')).hexdigest()[:12]
+        return f"{cache_key}_excl_{digest}"
+    
+    def _fetch_tree_data(self, owner, repo_name, sha, recursive=False):
+        """获取单个树对象的原始JSON"""
+        tree = self._call_api(
+            lambda gh: self._repo(gh, owner, repo_name).get_git_tree(sha, recursive=recursive)
+        )
+        return tree.raw_data
+    
+    def _walk_truncated_tree(self, owner, repo_name, root_sha, file_processor=None):
+        """递归树结果被截断时，并行遍历子树补全文件列表
+
+        每个子目录先尝试一次递归获取，仍被截断时才展开为下一层，
+        同时在途的请求数不超过 CONCURRENT_REQUESTS；被排除的目录不再遍历。
+        返回 (文件列表, 是否跳过了排除目录)。
+        """
+        files = []
+        pruned = False
+        frontier = deque([('', root_sha, False)])  # (目录前缀, 树SHA, 是否递归获取)
+        in_flight = {}
+        
+        with ThreadPoolExecutor(max_workers=Config.CONCURRENT_REQUESTS) as executor:
+            while frontier or in_flight:
+                while frontier and len(in_flight) < Config.CONCURRENT_REQUESTS:
+                    prefix, sha, recursive = frontier.popleft()
+                    future = executor.submit(self._fetch_tree_data, owner, repo_name, sha, recursive)
+                    in_flight[future] = (prefix, sha, recursive)
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    prefix, sha, recursive = in_flight.pop(future)
+                    data = future.result()
+                    
+                    if recursive:
+                        if data.get('truncated'):
+                            # 子树仍然过大，改为逐层展开
+                            frontier.append((prefix, sha, False))
+                        else:
+                            files.extend(self._build_tree_files(data, prefix))
+                        continue
+                    
+                    files.extend(self._build_tree_files(data, prefix))
+                    for item in data.get('tree', []):
+                        if item.get('type') != 'tree':
+                            continue
+                        dir_path = prefix + item['path']
+                        if file_processor and not file_processor.should_include_dir(dir_path):
+                            pruned = True
+                        else:
+                            frontier.append((dir_path + '/', item['sha'], True))
+                
+                # 超过文件数量限制时提前结束，不再发起多余的请求
+                if len(files) > Config.MAX_FILE_COUNT:
+                    for future in in_flight:
+                        future.cancel()
+                    break
+        
+        return files, pruned
+    
+    def get_repository_tree(self, owner, repo_name, branch=None, file_processor=None):
+        """使用树API一次性获取所有文件信息
+
+        递归树结果被截断（大型仓库）时并行遍历子树；传入 file_processor 时跳过被排除的目录。
+        文件的blob SHA会记录在本次导出的上下文中，获取内容时按SHA命中内容缓存。
+        """
+        # 并发导出同一仓库时只读取一次，其他任务等待并共享结果
+        flight_key = self._pruned_tree_cache_key(f"tree_{owner}_{repo_name}_{branch}", file_processor) \
+            or f"tree_{owner}_{repo_name}_{branch}"
+        files = SingleFlight.shared().do(
+            flight_key, lambda: self._load_repository_tree(owner, repo_name, branch, file_processor)
+        )
+        for file_info in files:
+            if file_info.get('sha'):
+                self._blob_shas[(owner, repo_name, file_info['path'])] = file_info['sha']
+        return files
     
-    def get_repository_tree(self, owner, repo_name, branch=None):
-        """使用树API一次性获取所有文件信息"""
+    def _load_repository_tree(self, owner, repo_name, branch=None, file_processor=None):
+        """读取文件树（缓存、条件请求或树API）
+
+        提交SHA对应的文件树不会变化，缓存永不过期；分支对应的文件树按 CACHE_TTL_TREE 过期。
+        """
         cache_key = f"tree_{owner}_{repo_name}_{branch}"
-        cached = self._get_from_cache(cache_key)
-        if cached:
-            return cached
+        cache_keys = [cache_key]
+        pruned_key = self._pruned_tree_cache_key(cache_key, file_processor)
+        if pruned_key:
+            cache_keys.append(pruned_key)
         
+        entries = [(key, self._get_cache_entry(key)) for key in cache_keys]
+        key, entry = next(((key, entry) for key, entry in entries if entry is not None), (cache_key, None))
+        ttl = 0 if branch and COMMIT_SHA_PATTERN.fullmatch(branch) else None
+        cached = self._cached_content(
+            'tree', key, entry,
+            lambda: self._fetch_repository_tree(owner, repo_name, branch, file_processor, entries),
+            ttl
+        )
+        if cached is not None:
+            return cached
+        return self._fetch_repository_tree(owner, repo_name, branch, file_processor, entries)
+    
+    def _fetch_repository_tree(self, owner, repo_name, branch, file_processor, entries):
+        """通过条件请求或树API获取文件树并写入缓存，entries 为各缓存键对应的旧条目"""
+        cache_key, pruned_key = entries[0][0], (entries[1][0] if len(entries) > 1 else None)
         try:
-            self._wait_for_rate_limit()
-            repo = self.github.get_repo(f"{owner}/{repo_name}")
+            data = validators = None
+            for key, entry in entries:
+                unchanged, data, validators = self._revalidate_cache(key, entry)
+                if unchanged:
+                    return entry['content']
+                if data is not None:
+                    break
             
-            if not branch:
-                branch = repo.default_branch
-            
-            # 使用树API递归获取所有文件
-            tree = repo.get_git_tree(branch, recursive=True)
+            fetcher = self._async_fetcher()
+            if data is None and fetcher:
+                data = fetcher.get_tree_data(owner, repo_name, branch)
+            elif data is None:
+                if not branch:
+                    branch = self._default_branch(owner, repo_name)
+                
+                # 使用树API递归获取所有文件（惰性仓库对象不产生额外请求）
+                tree = self._call_api(
+                    lambda gh: self._repo(gh, owner, repo_name).get_git_tree(branch, recursive=True)
+                )
+                data = tree.raw_data
+                validators = {
+                    'url': f"/repos/{owner}/{repo_name}/git/trees/{branch}?recursive=1",
+                    'etag': tree.etag,
+                    'last_modified': tree.last_modified
+                }
             
-            files = []
-            for item in tree.tree:
-                if item.type == 'blob':  # 只要文件，不要目录
-                    files.append({
-                        'path': item.path,
-                        'name': os.path.basename(item.path),
-                        'size': item.size,
-                        'sha': item.sha,
-                        'type': 'file'
-                    })
+            pruned = False
+            if data.get('truncated'):
+                files, pruned = self._walk_truncated_tree(owner, repo_name, data['sha'], file_processor)
+            else:
+                files = self._build_tree_files(data)
             
             # 检查文件数量限制
             if len(files) > Config.MAX_FILE_COUNT:
                 raise GitHubError(f"仓库文件数量 {len(files)} 超过限制 {Config.MAX_FILE_COUNT}")
             
-            self._save_to_cache(cache_key, files)
+            # 被截断的树逐个目录获取，重新获取的代价按目录数估计
+            cost = len({os.path.dirname(f['path']) for f in files}) if data.get('truncated') else 1
+            self._save_to_cache(pruned_key if pruned else cache_key, files, validators, cost)
             return files
             
         except GithubException as e:
@@ -156,128 +536,305 @@ class GitHubHandler:
                 raise GitHubError("仓库不存在或分支不存在")
             else:
                 raise GitHubError(f"获取仓库内容失败：{e.data.get('message', str(e))}")
+        except AsyncFetchError as e:
+            raise GitHubError(str(e))
+        except GitHubError:
+            raise
         except Exception as e:
             raise GitHubError(f"处理仓库内容时出错：{str(e)}")
+        finally:
+            self._sync_rate_limit()
 
-    def _fetch_file_content(self, repo, file_path, branch, owner, repo_name):
-        """获取单个文件的内容（用于并发执行）"""
-        cache_key = f"file_{owner}_{repo_name}_{branch}_{file_path.replace('/', '_')}"
-        cached = self._get_from_cache(cache_key)
-        if cached:
-            return cached
+    def _fetch_raw(self, owner, repo_name, file_path, ref):
+        """以原始媒体类型流式获取单个文件，返回 (状态码, 文件记录或None)
 
-        try:
-            self._wait_for_rate_limit()
-            content = repo.get_contents(file_path, ref=branch)
+        内容边读取边增量解码，超过单文件大小上限时立即断开，不缓冲剩余内容。
+        Token额度耗尽时换用池中其他可用Token，可重试的状态码抛出 RetryableHTTPError。
+        """
+        url = f"{Config.GITHUB_API_URL}/repos/{owner}/{repo_name}/contents/{quote(file_path)}"
+        exhausted = []
+        while True:
+            token = self.token_pool.select(exclude=exhausted)
+            self._wait_for_rate_limit(token)
+            headers = {'Accept': RAW_MEDIA_TYPE}
+            if token:
+                headers['Authorization'] = f'token {token}'
+            
+            with ClientPool.session().get(url, headers=headers, params={'ref': ref}, stream=True,
+                                          timeout=Config.REQUEST_TIMEOUT) as response:
+                RateLimiter.for_token(token).update_from_headers(response.headers)
+                if response.status_code == 200:
+                    decoder = StreamDecoder(file_path)
+                    for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                        if not decoder.feed(chunk):
+                            break
+                    return 200, decoder.record(int(response.headers.get('Content-Length') or 0))
+                
+                if (is_budget_exhausted(response.status_code, response.headers)
+                        and self.token_pool.has_available(exclude=exhausted + [token])):
+                    exhausted.append(token)
+                    continue
+                error = RetryableHTTPError(f"HTTP {response.status_code}", response.status_code, response.headers)
+                if RetryPolicy.is_retryable(error):
+                    raise error
+                return response.status_code, None
+    
+    def _fetch_file_content(self, file_path, branch, owner, repo_name):
+        """获取单个文件的内容（用于并发执行）
 
-            if content.size > Config.MAX_SINGLE_FILE_SIZE_MB * 1024 * 1024:
-                result = {
-                    'path': file_path,
-                    'content': f"[文件过大: {content.size / (1024*1024):.1f}MB > {Config.MAX_SINGLE_FILE_SIZE_MB}MB]",
-                    'size': content.size,
-                    'is_binary': False,
-                    'is_oversized': True
-                }
-            else:
-                try:
-                    if content.encoding == 'base64':
-                        decoded_content = base64.b64decode(content.content).decode('utf-8')
-                    else:
-                        decoded_content = content.content
-                    
-                    result = {
-                        'path': file_path,
-                        'content': decoded_content,
-                        'size': content.size,
-                        'is_binary': False,
-                        'is_oversized': False
-                    }
-                except UnicodeDecodeError:
-                    result = {
-                        'path': file_path,
-                        'content': f"[二进制文件或编码无法识别: {file_path}]",
-                        'size': content.size,
-                        'is_binary': True,
-                        'is_oversized': False
-                    }
+        同一blob（或未知SHA时同一仓库、引用和路径）正在被其他任务获取时等待并共享其结果。
+        """
+        sha = self._blob_shas.get((owner, repo_name, file_path))
+        if sha:
+            cached = self.blob_cache.get(sha, file_path)
+            if cached:
+                return cached
+
+        flight_key = ('blob', sha) if sha else ('file', owner, repo_name, branch, file_path)
+        record = SingleFlight.shared().do(
+            flight_key, lambda: self._fetch_file_content_once(file_path, branch, owner, repo_name, sha)
+        )
+        # 共享的结果可能来自其他路径（如fork中相同的blob）
+        return relabel_record(record, file_path)
+
+    def _fetch_file_content_once(self, file_path, branch, owner, repo_name, sha):
+        # 等待期间其他任务可能刚写入缓存
+        if sha:
+            cached = self.blob_cache.peek(sha, file_path)
+            if cached:
+                return cached
+
+        try:
+            status, result = self.retry_policy.call(self._fetch_raw, owner, repo_name, file_path, branch)
+            if result is None:
+                return make_error_record(file_path, f"[获取文件内容失败: HTTP {status}]")
 
-            self._save_to_cache(cache_key, result)
+            self.blob_cache.put(sha, result)
             return result
-        except GithubException as e:
-            if e.status == 403 and 'abuse detection' in str(e):
-                time.sleep(30)
-                return self._fetch_file_content(repo, file_path, branch, owner, repo_name) # Retry
-            
-            return {
-                'path': file_path,
-                'content': f"[获取文件内容失败: {str(e)}]",
-                'size': 0,
-                'is_binary': False,
-                'is_oversized': False
-            }
+        except (RetryableHTTPError, requests.RequestException) as e:
+            return make_error_record(file_path, f"[获取文件内容失败: {str(e)}]")
         except Exception as e:
-            return {
-                'path': file_path,
-                'content': f"[处理文件时出错: {str(e)}]",
-                'size': 0,
-                'is_binary': False,
-                'is_oversized': False
-            }
+            return make_error_record(file_path, f"[处理文件时出错: {str(e)}]")
 
-    def get_file_content_batch(self, owner, repo_name, file_paths, branch=None, progress_callback=None):
-        """批量获取文件内容"""
+    def get_file_content_batch(self, owner, repo_name, file_paths, branch=None, progress_callback=None, results=None):
+        """批量获取文件内容
+
+        results: 可选，追加记录的容器（如 ContentSpool 磁盘暂存区），默认返回新列表
+        """
+        if results is None:
+            results = []
+        fetcher = self._async_fetcher()
+        if fetcher:
+            return self._get_file_content_batch_async(fetcher, owner, repo_name, file_paths, branch,
+                                                      progress_callback, results)
+        
         try:
-            repo = self.github.get_repo(f"{owner}/{repo_name}")
-            
             if not branch:
-                branch = repo.default_branch
+                branch = self._default_branch(owner, repo_name)
             
-            results = []
             total_files = len(file_paths)
+            # 在途请求不超过窗口大小，记录写入 results 后立即释放对应的 Future
+            window = Config.CONCURRENT_REQUESTS * 2
+            pending_paths = iter(file_paths)
+            in_flight = {}
             
             with ThreadPoolExecutor(max_workers=Config.CONCURRENT_REQUESTS) as executor:
-                future_to_path = {
-                    executor.submit(self._fetch_file_content, repo, path, branch, owner, repo_name): path
-                    for path in file_paths
-                }
-                
                 processed_count = 0
-                for future in as_completed(future_to_path):
-                    try:
-                        results.append(future.result())
-                    except Exception as e:
-                        path = future_to_path[future]
-                        results.append({
-                            'path': path,
-                            'content': f"[获取内容时发生意外错误: {str(e)}]",
-                            'size': 0,
-                            'is_binary': False,
-                            'is_oversized': False
-                        })
-                    finally:
-                        processed_count += 1
-                        if progress_callback:
-                            progress_callback(processed_count, total_files)
+                while True:
+                    for path in pending_paths:
+                        future = executor.submit(self._fetch_file_content, path, branch, owner, repo_name)
+                        in_flight[future] = path
+                        if len(in_flight) >= window:
+                            break
+                    if not in_flight:
+                        break
+                    
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        path = in_flight.pop(future)
+                        try:
+                            results.append(future.result())
+                        except Exception as e:
+                            results.append(make_error_record(path, f"[获取内容时发生意外错误: {str(e)}]"))
+                        finally:
+                            processed_count += 1
+                            if progress_callback:
+                                progress_callback(processed_count, total_files)
+            
+            return results
+            
+        except Exception as e:
+            raise GitHubError(f"批量获取文件失败：{str(e)}")
+    
+    def _get_file_content_batch_async(self, fetcher, owner, repo_name, file_paths, branch, progress_callback,
+                                      results):
+        """使用异步引擎批量获取文件内容，命中缓存的文件不再请求"""
+        try:
+            if not branch:
+                branch = self._default_branch(owner, repo_name)
+            
+            missing_paths = []
+            cached_count = 0
+            for path in file_paths:
+                sha = self._blob_shas.get((owner, repo_name, path))
+                cached = self.blob_cache.get(sha, path) if sha else None
+                if cached:
+                    results.append(cached)
+                    cached_count += 1
+                else:
+                    missing_paths.append(path)
+            
+            total_files = len(file_paths)
+            if progress_callback and cached_count:
+                progress_callback(cached_count, total_files)
+            
+            def _on_progress(processed, _total):
+                if progress_callback:
+                    progress_callback(cached_count + processed, total_files)
+            
+            if missing_paths:
+                start = len(results)
+                fetcher.get_file_content_batch(owner, repo_name, missing_paths, branch, _on_progress, results)
+                for index in range(start, len(results)):
+                    record = results[index]
+                    self.blob_cache.put(self._blob_shas.get((owner, repo_name, record['path'])), record)
             
             return results
             
+        except GitHubError:
+            raise
         except Exception as e:
             raise GitHubError(f"批量获取文件失败：{str(e)}")
     
+    def get_file_content_archive(self, owner, repo_name, file_processor=None, branch=None,
+                                 file_paths=None, progress_callback=None, results=None):
+        """通过仓库归档一次性获取文件内容（单次流式请求，替代逐个文件调用）"""
+        try:
+            if not branch:
+                branch = self._default_branch(owner, repo_name)
+            
+            total_files = len(file_paths) if file_paths is not None else 0
+            token = self.token_pool.select()
+            fetcher = ArchiveFetcher(token=token, rate_limiter=RateLimiter.for_token(token),
+                                     retry_policy=self.retry_policy)
+            
+            if results is None:
+                results = []
+            processed_count = 0
+            for record in fetcher.iter_files(owner, repo_name, branch, file_processor, file_paths):
+                results.append(record)
+                processed_count += 1
+                if progress_callback and total_files:
+                    progress_callback(min(processed_count, total_files), total_files)
+            
+            if progress_callback and total_files and processed_count < total_files:
+                progress_callback(total_files, total_files)
+            return results
+            
+        except ArchiveError as e:
+            raise GitHubError(str(e))
+        except GitHubError:
+            raise
+        except Exception as e:
+            raise GitHubError(f"通过归档获取文件失败：{str(e)}")
+    
+    def _export_snapshot_key(self, owner, repo_name, filter_key):
+        """增量导出快照的缓存键"""
+        return f"export_{owner}_{repo_name}_{filter_key[:16]}"
+    
+    def plan_incremental(self, owner, repo_name, filter_key, files):
+        """拆分出内容已在blob缓存中的文件
+
+        文件树中每个文件都带有blob SHA，SHA已缓存的文件（来自任意提交、分支或fork）直接复用，
+        只有新增或修改的文件需要重新获取。
+        返回 (可复用的文件信息, 需要获取的文件信息, 上次相同过滤条件导出的提交SHA或None)。
+        """
+        entry = self._get_cache_entry(self._export_snapshot_key(owner, repo_name, filter_key))
+        snapshot = entry.get('content') if entry else None
+        base_commit = snapshot.get('commit') if snapshot else None
+        
+        cached_shas = self.blob_cache.contains(f['sha'] for f in files if f.get('sha'))
+        reused = []
+        to_fetch = []
+        for file_info in files:
+            if file_info.get('sha') in cached_shas:
+                reused.append(file_info)
+            else:
+                to_fetch.append(file_info)
+        return reused, to_fetch, base_commit
+    
+    def load_cached_records(self, files, results):
+        """从blob缓存逐个读取文件记录追加到 results，返回读取前已被淘汰、需要重新获取的文件信息"""
+        missing = []
+        for file_info in files:
+            record = self.blob_cache.get(file_info['sha'], file_info['path'])
+            if record is None:
+                missing.append(file_info)
+            else:
+                results.append(record)
+        return missing
+    
+    def save_export_snapshot(self, owner, repo_name, filter_key, commit_sha, files, records):
+        """将本次导出获取的内容按blob SHA写入缓存，并记录导出的提交（获取失败的文件不保存）"""
+        sha_by_path = {f['path']: f.get('sha') for f in files}
+        cached_shas = self.blob_cache.contains(sha for sha in sha_by_path.values() if sha)
+        for record in records:
+            sha = sha_by_path.get(record['path'])
+            if sha and sha not in cached_shas:
+                self.blob_cache.put(sha, record)
+                cached_shas.add(sha)
+        self._save_to_cache(
+            self._export_snapshot_key(owner, repo_name, filter_key),
+            {'commit': commit_sha, 'file_count': len(sha_by_path)}
+        )
+    
+    def get_file_content_git(self, owner, repo_name, file_processor=None, branch=None,
+                             file_paths=None, progress_callback=None, results=None):
+        """通过git部分克隆获取文件内容（只下载树和所需的blob，不占用REST API额度）"""
+        try:
+            if not branch:
+                branch = self._default_branch(owner, repo_name)
+            
+            total_files = len(file_paths) if file_paths is not None else 0
+            fetcher = GitFetcher(token=self.token_pool.select())
+            
+            if results is None:
+                results = []
+            processed_count = 0
+            for record in fetcher.iter_files(owner, repo_name, branch, file_processor, file_paths):
+                results.append(record)
+                processed_count += 1
+                if progress_callback and total_files:
+                    progress_callback(min(processed_count, total_files), total_files)
+            
+            if progress_callback and total_files and processed_count < total_files:
+                progress_callback(total_files, total_files)
+            return results
+            
+        except GitFetchError as e:
+            raise GitHubError(str(e))
+        except GitHubError:
+            raise
+        except Exception as e:
+            raise GitHubError(f"通过git获取文件失败：{str(e)}")
+    
     def get_file_content(self, owner, repo_name, file_path, branch='main'):
         """获取单个文件内容（兼容性方法）"""
         results = self.get_file_content_batch(owner, repo_name, [file_path], branch)
         return results[0] if results else None
     
-    def list_repository_contents(self, owner, repo_name, branch=None):
+    def list_repository_contents(self, owner, repo_name, branch=None, file_processor=None):
         """递归获取仓库所有文件列表（使用树API优化）"""
-        return self.get_repository_tree(owner, repo_name, branch)
+        return self.get_repository_tree(owner, repo_name, branch, file_processor)
     
     def clear_cache(self):
         """清理缓存"""
+        self.memory_cache.clear()
+        self.blob_cache.clear()
+        self.cache_index.clear()
         try:
             for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.json'):
+                if filename.endswith((CACHE_FILE_SUFFIX, '.json')):
                     os.remove(os.path.join(self.cache_dir, filename))
         except:
             pass 
\ No newline at end of file
@@ -0,0 +1,93 @@
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional
+from config import Config
+
+# 文件树中每个文件的元数据（路径、SHA、记录索引等）的估计内存占用（字节）
+PER_FILE_OVERHEAD = 512
+
+
+def fetch_window(fetch_mode: str = 'api', engine: Optional[str] = None) -> int:
+    """同时获取（内容同时驻留内存）的文件数
+
+    归档和git按文件逐个读取；API获取时两种引擎都最多保留并发数两倍的在途请求和未写入的结果。
+    """
+    if fetch_mode in ('archive', 'git'):
+        return 1
+    if (engine or Config.FETCH_ENGINE) == 'async':
+        return Config.ASYNC_CONCURRENCY * 2
+    return Config.CONCURRENT_REQUESTS * 2
+
+
+def estimate_export_memory(files: Iterable[Dict[str, Any]], window: Optional[int] = None) -> int:
+    """由文件树中的blob大小估计导出任务的内存峰值（字节）
+
+    内容写入磁盘暂存区后不再占用内存，峰值主要来自同时获取的文件
+    （最大的 window 个文件，每个按单文件上限截断，默认为 API 获取时的窗口大小）解码后的内容，
+    加上文件列表的元数据和固定开销。
+    """
+    window = fetch_window() if window is None else window
+    max_file = int(Config.MAX_SINGLE_FILE_SIZE_MB * 1024 * 1024)
+    sizes = sorted((min(f.get('size', 0), max_file) for f in files), reverse=True)
+    in_flight = sum(sizes[:window])
+    return int(Config.EXPORT_MEMORY_BASE_MB * 1024 * 1024
+               + len(sizes) * PER_FILE_OVERHEAD
+               + in_flight * Config.EXPORT_MEMORY_FACTOR)
+
+
+def current_rss() -> Optional[int]:
+    """当前进程的常驻内存（字节），无法获取时返回None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemoryBudget:
+    """进程级导出内存预算
+
+    记录已准入任务的估计内存之和，不超过 EXPORT_MEMORY_BUDGET_MB。本身不阻塞：
+    等待配额的任务留在 ExportQueue 中，由其调度线程决定准入顺序，等待期间不占用工作线程。
+    超过整个预算的任务按整个预算计，在没有其他任务占用配额时单独执行。
+    """
+
+    _instance: Optional['MemoryBudget'] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'MemoryBudget':
+        """获取进程级共享实例"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """丢弃共享实例（主要用于测试）"""
+        with cls._instance_lock:
+            cls._instance = None
+
+    def __init__(self, max_bytes: Optional[int] = None) -> None:
+        self.max_bytes = int(Config.EXPORT_MEMORY_BUDGET_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        self._used = 0
+
+    def try_acquire(self, nbytes: int) -> bool:
+        """配额足够时占用并返回True，否则返回False"""
+        nbytes = min(nbytes, self.max_bytes)
+        with self._lock:
+            if self._used + nbytes > self.max_bytes:
+                return False
+            self._used += nbytes
+            return True
+
+    def release(self, nbytes: int) -> None:
+        """归还 try_acquire 占用的配额"""
+        with self._lock:
+            self._used -= min(nbytes, self.max_bytes)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'budget_bytes': self.max_bytes, 'used_bytes': self._used}
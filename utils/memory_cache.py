@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from config import Config
+
+
+class MemoryCache:
+    """进程内共享的LRU内存缓存，位于磁盘缓存之前
+
+    同时限制条目数量和总字节数（按序列化后的大小计），超出时淘汰最久未使用的条目；
+    读取时未命中再读磁盘并回填（read-through），写入磁盘时同步写入（write-through）。
+    返回的对象在线程之间共享，调用方不应修改。
+    """
+
+    _instance: Optional['MemoryCache'] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'MemoryCache':
+        """获取进程级共享实例"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """丢弃共享实例（主要用于测试）"""
+        with cls._instance_lock:
+            cls._instance = None
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        self.max_entries = Config.MEMORY_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = int(Config.MEMORY_CACHE_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        self._entries: 'OrderedDict[str, Tuple[Any, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取条目并标记为最近使用，未命中返回None"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: str, value: Any, size: int) -> None:
+        """写入条目，size 为条目的估计字节数；单个条目超过字节上限时不缓存"""
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            if size > self.max_bytes or self.max_entries <= 0:
+                return
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            item = self._entries.pop(key, None)
+            if item is not None:
+                self._bytes -= item[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """条目数、字节数以及命中、未命中和淘汰计数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,143 @@
+import time
+import asyncio
+import threading
+from typing import Dict, Any, Optional, Mapping
+from config import Config
+
+
+class RateLimitExceeded(Exception):
+    """API额度耗尽且等待时间超过上限"""
+    pass
+
+
+class RateLimiter:
+    """线程安全的令牌桶速率限制器
+
+    - 令牌桶按 RATE_LIMIT_PER_SECOND 匀速补充，容量为 RATE_LIMIT_BURST，允许突发请求
+    - 同时跟踪响应头中的 X-RateLimit-Remaining / X-RateLimit-Reset，
+      额度耗尽时等待到重置时间，重置后恢复到 X-RateLimit-Limit
+    - 同一个Token在进程内共享同一个实例（见 for_token）
+    """
+
+    _instances: Dict[Optional[str], 'RateLimiter'] = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def for_token(cls, token: Optional[str]) -> 'RateLimiter':
+        """获取指定Token对应的进程级共享限制器"""
+        with cls._instances_lock:
+            limiter = cls._instances.get(token)
+            if limiter is None:
+                limiter = cls()
+                cls._instances[token] = limiter
+            return limiter
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """清空所有共享实例（主要用于测试）"""
+        with cls._instances_lock:
+            cls._instances.clear()
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[int] = None,
+                 max_wait: Optional[float] = None) -> None:
+        self.rate = rate or Config.RATE_LIMIT_PER_SECOND
+        self.burst = burst or Config.RATE_LIMIT_BURST
+        self.max_wait = Config.RATE_LIMIT_MAX_WAIT if max_wait is None else max_wait
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+
+        # 来自GitHub响应头的额度信息，未知时为None
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: float = 0
+
+    def _refill(self) -> None:
+        """按经过的时间补充令牌，并在到达重置时间后恢复额度（额度上限未知时恢复为未知）"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+        if self.reset_at and time.time() >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = 0
+
+    def _reserve(self) -> float:
+        """尝试占用一个令牌，成功返回0，否则返回建议等待的秒数"""
+        with self._lock:
+            self._refill()
+
+            if self.remaining is not None and self.remaining <= 0 and not self.reset_at:
+                # 重置时间未知，无法判断何时恢复：不再按额度等待，由下一次响应头校正
+                self.remaining = None
+
+            if self.remaining is not None and self.remaining <= 0:
+                wait = self.reset_at - time.time()
+                if wait > self.max_wait:
+                    raise RateLimitExceeded(
+                        f"GitHub API额度已耗尽，需等待 {int(wait)} 秒后重置"
+                    )
+                return max(wait, 0.01)
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                if self.remaining is not None:
+                    self.remaining -= 1
+                return 0
+
+            return max((1 - self._tokens) / self.rate, 0.01)
+
+    def acquire(self) -> None:
+        """获取一次请求许可，必要时阻塞等待"""
+        while True:
+            wait = self._reserve()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """acquire 的协程版本，等待时不阻塞事件循环"""
+        while True:
+            wait = self._reserve()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def update(self, remaining: Optional[int] = None, limit: Optional[int] = None,
+               reset: Optional[float] = None) -> None:
+        """根据服务端返回的额度信息校正本地状态"""
+        with self._lock:
+            if limit is not None and limit >= 0:
+                self.limit = limit
+            if remaining is not None and remaining >= 0:
+                self.remaining = remaining
+            if reset:
+                self.reset_at = float(reset)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """从 X-RateLimit-* 响应头更新额度"""
+        def _int_header(name: str) -> Optional[int]:
+            value = headers.get(name)
+            try:
+                return int(float(value)) if value is not None else None
+            except (TypeError, ValueError):
+                return None
+
+        self.update(
+            remaining=_int_header('X-RateLimit-Remaining'),
+            limit=_int_header('X-RateLimit-Limit'),
+            reset=_int_header('X-RateLimit-Reset')
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """返回当前额度快照"""
+        with self._lock:
+            self._refill()
+            return {
+                'limit': self.limit,
+                'remaining': self.remaining,
+                'reset': int(self.reset_at) if self.reset_at else None,
+                'tokens': int(self._tokens),
+                'known': self.limit is not None
+            }
@@ -0,0 +1,164 @@
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Mapping, Optional, Tuple, Type
+import requests
+from config import Config
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖
+    aiohttp = None
+
+
+class RetryableHTTPError(Exception):
+    """携带状态码和响应头的HTTP错误，供重试策略判断是否可重试"""
+
+    def __init__(self, message: str, status: int, headers: Optional[Mapping[str, str]] = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _connection_errors() -> Tuple[Type[BaseException], ...]:
+    errors = [ConnectionError, TimeoutError, asyncio.TimeoutError, requests.ConnectionError, requests.Timeout]
+    if aiohttp is not None:
+        errors.append(aiohttp.ClientConnectionError)
+    return tuple(errors)
+
+
+CONNECTION_ERRORS = _connection_errors()
+
+
+def _header(headers: Optional[Mapping[str, str]], name: str) -> Optional[str]:
+    """大小写无关地读取响应头"""
+    if not headers:
+        return None
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """从 Retry-After 或 X-RateLimit-Reset 响应头计算服务端要求的等待时间"""
+    retry_after = _header(headers, 'retry-after')
+    if retry_after is not None:
+        try:
+            return max(float(retry_after), 0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+            except (TypeError, ValueError):
+                return None
+
+    if _header(headers, 'x-ratelimit-remaining') == '0':
+        reset = _header(headers, 'x-ratelimit-reset')
+        try:
+            return max(float(reset) - time.time(), 0) if reset else None
+        except ValueError:
+            return None
+    return None
+
+
+class RetryBudget:
+    """单个任务可用的重试次数，所有线程共享，防止一次限流风暴耗尽整个任务的时间"""
+
+    def __init__(self, total: Optional[int] = None) -> None:
+        self.total = Config.TASK_RETRY_BUDGET if total is None else total
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def consume(self) -> bool:
+        """占用一次重试机会，预算耗尽时返回False"""
+        with self._lock:
+            if self.used >= self.total:
+                return False
+            self.used += 1
+            return True
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            return self.total - self.used
+
+
+class RetryPolicy:
+    """GitHub调用的统一重试策略
+
+    - 指数退避 + 完全抖动（full jitter），最多 MAX_RETRY_ATTEMPTS 次尝试
+    - 遵循 Retry-After 和主/次级速率限制响应头；要求等待超过 RETRY_MAX_DELAY 时直接放弃
+    - 可选的任务级重试预算（RetryBudget）
+    """
+
+    def __init__(self, max_attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, budget: Optional[RetryBudget] = None,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        self.max_attempts = max(1, max_attempts or Config.MAX_RETRY_ATTEMPTS)
+        self.base_delay = Config.RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = Config.RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.budget = budget
+        self._sleep = sleep
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        """判断异常是否值得重试"""
+        if isinstance(error, CONNECTION_ERRORS):
+            return True
+
+        status = getattr(error, 'status', None)
+        if not isinstance(status, int):
+            return False
+        if status == 429 or status >= 500:
+            return True
+        if status == 403:
+            headers = getattr(error, 'headers', None)
+            if retry_after_seconds(headers) is not None:
+                return True
+            message = str(getattr(error, 'data', '') or error).lower()
+            return 'rate limit' in message or 'abuse' in message
+        return False
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次重试（从0开始）的抖动退避时间"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def next_delay(self, error: BaseException, attempt: int) -> Optional[float]:
+        """计算下一次重试前的等待时间，返回None表示不再重试"""
+        if attempt + 1 >= self.max_attempts or not self.is_retryable(error):
+            return None
+
+        hint = retry_after_seconds(getattr(error, 'headers', None))
+        if hint is not None and hint > self.max_delay:
+            return None
+        if self.budget is not None and not self.budget.consume():
+            return None
+        return max(hint or 0, self.backoff(attempt))
+
+    def call(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """执行调用，失败时按策略重试，最终失败时抛出最后一次的异常"""
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                delay = self.next_delay(e, attempt)
+                if delay is None:
+                    raise
+                self._sleep(delay)
+                attempt += 1
+
+    async def call_async(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """call 的协程版本"""
+        attempt = 0
+        while True:
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = self.next_delay(e, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
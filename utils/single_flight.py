@@ -0,0 +1,78 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """一次进行中的获取"""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """进程级请求合并（single-flight）
+
+    同一键同时只执行一次获取：先到的线程执行，其余线程等待并共享其结果（或异常）。
+    获取结束后立即移除该键，之后的调用重新执行（结果的复用交给缓存）。
+    """
+
+    _instance: Optional['SingleFlight'] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'SingleFlight':
+        """获取进程级共享实例"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """丢弃共享实例（主要用于测试）"""
+        with cls._instance_lock:
+            cls._instance = None
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """执行 func 或等待同一键正在进行的获取，返回其结果"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        """执行次数、合并（等待共享结果）次数和进行中的键数量"""
+        with self._lock:
+            return {'executed': self.executed, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
@@ -0,0 +1,211 @@
+import os
+import mmap
+import subprocess
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Callable, Iterator, List, Optional
+from utils.file_processor import FileProcessor
+from utils import git_fetcher
+from utils.file_records import (
+    max_single_file_bytes, make_oversized_record, decode_file_record, make_error_record
+)
+
+
+class SourceError(Exception):
+    """本地源读取异常"""
+    pass
+
+
+class RepositorySource(ABC):
+    """仓库内容来源接口
+
+    导出流程只依赖这两个方法：先列出文件，经 FileProcessor 过滤和规划后再批量获取内容。
+    文件信息和文件记录的格式与 GitHubHandler 一致。
+    """
+
+    @abstractmethod
+    def list_repository_contents(self, owner: str, repo_name: str, branch: Optional[str] = None,
+                                 file_processor: Optional[FileProcessor] = None) -> List[Dict[str, Any]]:
+        """列出仓库中的所有文件"""
+
+    @abstractmethod
+    def get_file_content_batch(self, owner: str, repo_name: str, file_paths: List[str],
+                               branch: Optional[str] = None,
+                               progress_callback: Optional[Callable[[int, int], None]] = None,
+                               results: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """批量获取文件内容，追加到 results（如 ContentSpool 磁盘暂存区）后返回，未传入时返回新列表"""
+
+
+class LocalDirectorySource(RepositorySource):
+    """本地目录（如仓库的工作区）来源，完全离线
+
+    使用 os.scandir 遍历目录，跳过 .git 和被排除的目录；通过内存映射读取文件内容。
+    owner/repo_name/branch 参数仅为兼容接口，不参与读取。
+    """
+
+    def __init__(self, root: str) -> None:
+        if not os.path.isdir(root):
+            raise SourceError(f"目录不存在: {root}")
+        self.root = os.path.realpath(root)
+
+    def _iter_entries(self, file_processor: Optional[FileProcessor]) -> Iterator[os.DirEntry]:
+        pending = [self.root]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        rel_dir = os.path.relpath(entry.path, self.root).replace(os.sep, '/')
+                        if entry.name == '.git':
+                            continue
+                        if file_processor and not file_processor.should_include_dir(rel_dir):
+                            continue
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+
+    def list_repository_contents(self, owner: str = '', repo_name: str = '', branch: Optional[str] = None,
+                                 file_processor: Optional[FileProcessor] = None) -> List[Dict[str, Any]]:
+        files = []
+        for entry in self._iter_entries(file_processor):
+            files.append({
+                'path': os.path.relpath(entry.path, self.root).replace(os.sep, '/'),
+                'name': entry.name,
+                'size': entry.stat(follow_symlinks=False).st_size,
+                'type': 'file'
+            })
+        return files
+
+    def _resolve(self, file_path: str) -> str:
+        """将相对路径解析为根目录内的绝对路径，拒绝越出根目录的路径"""
+        full_path = os.path.realpath(os.path.join(self.root, file_path))
+        if os.path.commonpath([self.root, full_path]) != self.root:
+            raise SourceError(f"路径超出源目录: {file_path}")
+        return full_path
+
+    def _read_file(self, file_path: str) -> Dict[str, Any]:
+        try:
+            with open(self._resolve(file_path), 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size > max_single_file_bytes():
+                    return make_oversized_record(file_path, size)
+                if size == 0:
+                    return decode_file_record(file_path, b'', 0)
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                    return decode_file_record(file_path, view, size)
+        except (OSError, ValueError, SourceError) as e:
+            return make_error_record(file_path, f"[读取文件失败: {str(e)}]")
+
+    def get_file_content_batch(self, owner: str, repo_name: str, file_paths: List[str],
+                               branch: Optional[str] = None,
+                               progress_callback: Optional[Callable[[int, int], None]] = None,
+                               results: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        if results is None:
+            results = []
+        total_files = len(file_paths)
+        for processed_count, file_path in enumerate(file_paths, 1):
+            results.append(self._read_file(file_path))
+            if progress_callback:
+                progress_callback(processed_count, total_files)
+        return results
+
+
+class LocalBareRepoSource(RepositorySource):
+    """本地裸仓库（如镜像仓库）来源，完全离线
+
+    通过 git ls-tree 列出文件，git cat-file --batch 流式读取blob（git自身以内存映射读取pack）。
+    branch 为空时使用仓库的 HEAD。
+    """
+
+    def __init__(self, git_dir: str) -> None:
+        if not git_fetcher.is_available():
+            raise SourceError("读取裸仓库需要安装git")
+        if not os.path.isdir(git_dir):
+            raise SourceError(f"仓库不存在: {git_dir}")
+        self.git_dir = os.path.realpath(git_dir)
+
+    def _git(self, *args: str) -> bytes:
+        result = subprocess.run(['git', '--git-dir', self.git_dir, *args], capture_output=True)
+        if result.returncode != 0:
+            message = result.stderr.decode('utf-8', errors='replace').strip().splitlines()
+            raise SourceError(f"git {args[0]} 失败：{message[-1] if message else result.returncode}")
+        return result.stdout
+
+    def _tree(self, branch: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        """路径 -> 文件信息（含blob SHA和大小）"""
+        output = self._git('ls-tree', '-r', '-l', '-z', branch or 'HEAD')
+        files = {}
+        for line in output.split(b'\0'):
+            if not line:
+                continue
+            meta, raw_path = line.split(b'\t', 1)
+            mode, object_type, sha, size = meta.split()
+            # 只处理普通文件，跳过符号链接和子模块
+            if object_type != b'blob' or mode not in (b'100644', b'100755'):
+                continue
+            path = raw_path.decode('utf-8', errors='replace')
+            files[path] = {
+                'path': path,
+                'name': os.path.basename(path),
+                'size': int(size),
+                'sha': sha.decode(),
+                'type': 'file'
+            }
+        return files
+
+    def list_repository_contents(self, owner: str = '', repo_name: str = '', branch: Optional[str] = None,
+                                 file_processor: Optional[FileProcessor] = None) -> List[Dict[str, Any]]:
+        files = list(self._tree(branch).values())
+        if file_processor:
+            files = [f for f in files if file_processor.should_include_dir(os.path.dirname(f['path']))]
+        return files
+
+    def get_file_content_batch(self, owner: str, repo_name: str, file_paths: List[str],
+                               branch: Optional[str] = None,
+                               progress_callback: Optional[Callable[[int, int], None]] = None,
+                               results: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        tree = self._tree(branch)
+        max_size = max_single_file_bytes()
+        if results is None:
+            results = []
+        total_files = len(file_paths)
+        process = None
+        try:
+            # 按请求的顺序逐个读取，每条记录直接追加到 results，不在内存中汇总
+            for processed_count, file_path in enumerate(file_paths, 1):
+                info = tree.get(file_path)
+                if info is None:
+                    results.append(make_error_record(file_path, f"[读取文件失败: {file_path} 不存在]"))
+                elif info['size'] > max_size:
+                    results.append(make_oversized_record(file_path, info['size']))
+                else:
+                    if process is None:
+                        process = subprocess.Popen(['git', '--git-dir', self.git_dir, 'cat-file', '--batch'],
+                                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                                   stderr=subprocess.DEVNULL)
+                    results.append(self._read_blob(process, info))
+                if progress_callback:
+                    progress_callback(processed_count, total_files)
+        finally:
+            if process is not None:
+                process.stdin.close()
+                process.stdout.close()
+                process.wait()
+        return results
+
+    @staticmethod
+    def _read_blob(process: subprocess.Popen, info: Dict[str, Any]) -> Dict[str, Any]:
+        """通过 git cat-file --batch 读取一个blob；逐个请求并读取，避免输入输出管道互相阻塞"""
+        process.stdin.write(f"{info['sha']}\n".encode('ascii'))
+        process.stdin.flush()
+        header = process.stdout.readline().split()
+        if len(header) != 3:
+            return make_error_record(info['path'], "[读取文件失败: blob不存在]")
+        data = process.stdout.read(int(header[2]))
+        process.stdout.read(1)  # 内容后的换行
+        return decode_file_record(info['path'], data, info['size'])
+
+
+def open_local_source(path: str) -> RepositorySource:
+    """根据路径自动选择本地来源：包含 HEAD、objects 和 refs 的目录视为裸仓库，其余视为普通目录"""
+    if all(os.path.exists(os.path.join(path, name)) for name in ('HEAD', 'objects', 'refs')):
+        return LocalBareRepoSource(path)
+    return LocalDirectorySource(path)
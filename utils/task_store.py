@@ -0,0 +1,233 @@
+import os
+import copy
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from config import Config
+
+TERMINAL_STATUSES = ('success', 'error')
+
+# 结束的任务在本地保留的时间（秒），执行线程在写入结束状态后仍可能读取自己的任务
+LOCAL_GRACE_SECONDS = 60
+
+
+class TaskStore:
+    """导出任务状态存储（SQLite，同一主机上的多个工作进程共享）
+
+    执行任务的进程在本地持有任务状态字典，通过 update 在锁内修改；后台线程每隔 TASK_FLUSH_INTERVAL 秒
+    把有变化的任务批量写入数据库，进度回调不会每处理一个文件就写一次。
+    查询返回在锁内复制的快照，其他进程查询时从数据库读取。结束超过 FILE_RETENTION_MINUTES 的任务由 expire 删除。
+    状态推送通过 wait 等待变化：本进程的任务由 update 和每次写入唤醒（只唤醒等待该任务的推送），
+    其他进程的任务按写入间隔轮询。
+    """
+
+    _instances: Dict[str, 'TaskStore'] = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, path: Optional[str] = None) -> 'TaskStore':
+        """获取指定数据库文件对应的进程级共享实例"""
+        path = os.path.abspath(path or Config.TASK_STORE_PATH)
+        with cls._instances_lock:
+            store = cls._instances.get(path)
+            if store is None:
+                store = cls(path)
+                cls._instances[path] = store
+            return store
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """写入未保存的状态并关闭所有共享实例（主要用于测试）"""
+        with cls._instances_lock:
+            for store in cls._instances.values():
+                store.close()
+            cls._instances.clear()
+
+    def __init__(self, path: str, flush_interval: Optional[float] = None, ttl: Optional[float] = None) -> None:
+        self.path = path
+        self.flush_interval = Config.TASK_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.ttl = Config.FILE_RETENTION_MINUTES * 60 if ttl is None else ttl
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS tasks ('
+            'task_id TEXT PRIMARY KEY, state TEXT NOT NULL, status TEXT, '
+            'updated_at REAL NOT NULL, finished_at REAL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS tasks_updated_at ON tasks (updated_at)')
+
+        self._local: Dict[str, Dict[str, Any]] = {}
+        self._written: Dict[str, str] = {}
+        self._finished: Dict[str, float] = {}
+        # 按任务的变化版本号和等待条件，所有条件共用一把锁
+        self._notify_lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._conditions: Dict[str, threading.Condition] = {}
+        self._waiters: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __setitem__(self, task_id: str, state: Dict[str, Any]) -> None:
+        """创建（或替换）本进程执行的任务，立即写入数据库，之后通过 update 修改"""
+        with self._lock:
+            self._local[task_id] = state
+            self._finished.pop(task_id, None)
+            self._written.pop(task_id, None)
+            self._write_locked([(task_id, state)])
+            self._start_flusher()
+        self.notify(task_id)
+
+    def __getitem__(self, task_id: str) -> Dict[str, Any]:
+        """本进程执行的任务的状态字典（只供执行线程读取，修改通过 update）"""
+        return self._local[task_id]
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+
+    def update(self, task_id: str, **fields: Any) -> None:
+        """在锁内修改本进程执行的任务并唤醒等待该任务的推送"""
+        with self._lock:
+            self._local[task_id].update(fields)
+        self.notify(task_id)
+
+    def get(self, task_id: str, default: Any = None) -> Any:
+        """任务状态的快照：本进程执行的任务在锁内复制本地字典，其他任务从数据库读取"""
+        with self._lock:
+            state = self._local.get(task_id)
+            if state is not None:
+                return copy.deepcopy(state)
+            row = self._db.execute('SELECT state FROM tasks WHERE task_id = ?', (task_id,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def pop(self, task_id: str, default: Any = None) -> Any:
+        with self._lock:
+            state = self._local.pop(task_id, None)
+            self._written.pop(task_id, None)
+            self._finished.pop(task_id, None)
+            self._db.execute('DELETE FROM tasks WHERE task_id = ?', (task_id,))
+        self.notify(task_id)
+        self._forget_versions([task_id])
+        return default if state is None else state
+
+    def version(self, task_id: str) -> int:
+        """任务的变化版本号，读取状态前获取，传给 wait"""
+        with self._notify_lock:
+            return self._versions.get(task_id, 0)
+
+    def notify(self, task_id: str) -> None:
+        """递增任务的变化版本号，只唤醒等待该任务的推送"""
+        with self._notify_lock:
+            self._versions[task_id] = self._versions.get(task_id, 0) + 1
+            condition = self._conditions.get(task_id)
+            if condition is not None:
+                condition.notify_all()
+
+    def wait(self, task_id: str, version: int, timeout: float) -> None:
+        """等待任务的版本号不再是 version 或超时；其他进程执行的任务最多等待一个写入间隔"""
+        if task_id not in self._local:
+            timeout = min(timeout, self.flush_interval)
+        with self._notify_lock:
+            condition = self._conditions.get(task_id)
+            if condition is None:
+                condition = self._conditions[task_id] = threading.Condition(self._notify_lock)
+            self._waiters[task_id] = self._waiters.get(task_id, 0) + 1
+            try:
+                condition.wait_for(lambda: self._versions.get(task_id, 0) != version, timeout)
+            finally:
+                self._waiters[task_id] -= 1
+                if not self._waiters[task_id]:
+                    del self._waiters[task_id]
+                    del self._conditions[task_id]
+
+    def _forget_versions(self, task_ids: List[str]) -> None:
+        """移出本地的任务不再由本进程通知，删除其版本号"""
+        with self._notify_lock:
+            for task_id in task_ids:
+                self._versions.pop(task_id, None)
+
+    def _serialize(self, state: Dict[str, Any]) -> str:
+        return json.dumps(state, ensure_ascii=False, sort_keys=True, default=str)
+
+    def _write_locked(self, items: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """写入任务状态（持有锁，update 不会同时修改），跳过与上次写入相同的状态，返回写入的任务ID"""
+        now = time.time()
+        rows = []
+        for task_id, state in items:
+            data = self._serialize(state)
+            if data == self._written.get(task_id):
+                continue
+            status = state.get('status')
+            finished_at = now if status in TERMINAL_STATUSES else None
+            rows.append((task_id, data, status, now, finished_at))
+            self._written[task_id] = data
+        if rows:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO tasks (task_id, state, status, updated_at, finished_at) '
+                'VALUES (?, ?, ?, ?, ?)', rows)
+        return [row[0] for row in rows]
+
+    def flush(self) -> int:
+        """批量写入有变化的本地任务，返回写入数量"""
+        now = time.time()
+        dropped = []
+        with self._lock:
+            written = self._write_locked(list(self._local.items()))
+
+            # 未结束的任务即使没有变化也刷新更新时间，避免被当作遗留任务清理
+            running = [task_id for task_id, state in self._local.items()
+                       if state.get('status') not in TERMINAL_STATUSES]
+            if running:
+                self._db.executemany('UPDATE tasks SET updated_at = ? WHERE task_id = ?',
+                                     [(now, task_id) for task_id in running])
+
+            for task_id, state in list(self._local.items()):
+                if state.get('status') in TERMINAL_STATUSES and self._written.get(task_id) is not None:
+                    first_seen = self._finished.setdefault(task_id, now)
+                    if now - first_seen > LOCAL_GRACE_SECONDS:
+                        self._local.pop(task_id, None)
+                        self._written.pop(task_id, None)
+                        self._finished.pop(task_id, None)
+                        dropped.append(task_id)
+        for task_id in written:
+            self.notify(task_id)
+        self._forget_versions(dropped)
+        return len(written)
+
+    def expire(self) -> int:
+        """删除结束超过保留时间的任务，以及长时间没有更新的未结束任务（执行进程已退出）"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            cursor = self._db.execute(
+                'DELETE FROM tasks WHERE (finished_at IS NOT NULL AND finished_at < ?) '
+                'OR (finished_at IS NULL AND updated_at < ?)', (cutoff, cutoff))
+            return cursor.rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+
+    def _start_flusher(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_flusher, name='task-store-flush', daemon=True)
+            self._thread.start()
+
+    def _run_flusher(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,100 @@
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Mapping, Optional, Sequence, Tuple
+from config import Config
+from utils.rate_limiter import RateLimiter
+
+
+def mask_token(token: Optional[str]) -> str:
+    """脱敏显示token"""
+    if not token:
+        return '匿名访问'
+    if len(token) <= 12:
+        return token[:2] + '*' * max(len(token) - 2, 0)
+    return token[:8] + '*' * (len(token) - 12) + token[-4:]
+
+
+def is_budget_exhausted(status: Optional[int], headers: Optional[Mapping[str, str]]) -> bool:
+    """响应是否表示当前Token的主额度已耗尽（403/429 且 X-RateLimit-Remaining 为0）"""
+    if status not in (403, 429) or not headers:
+        return False
+    return any(key.lower() == 'x-ratelimit-remaining' and str(value) == '0' for key, value in headers.items())
+
+
+class TokenPool:
+    """多Token池，按剩余额度选择Token
+
+    - 每个Token的额度由其共享的 RateLimiter 根据响应头维护
+    - 每次请求选择剩余额度最多的Token；额度未知的Token优先使用以便尽快获得真实额度
+    - 额度耗尽的Token在重置时间之前被搁置，不参与选择
+    """
+
+    _shared: Dict[Tuple[Optional[str], ...], 'TokenPool'] = {}
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, tokens: Optional[Sequence[Optional[str]]] = None) -> 'TokenPool':
+        """获取进程内共享的Token池，默认使用配置中的全部Token"""
+        if tokens is None:
+            tokens = Config.get_github_tokens()
+        key = tuple(tokens) or (None,)
+        with cls._shared_lock:
+            pool = cls._shared.get(key)
+            if pool is None:
+                pool = cls(key)
+                cls._shared[key] = pool
+            return pool
+
+    @classmethod
+    def reset_all(cls) -> None:
+        """清空共享实例（主要用于测试）"""
+        with cls._shared_lock:
+            cls._shared.clear()
+
+    def __init__(self, tokens: Sequence[Optional[str]]) -> None:
+        self.tokens: List[Optional[str]] = list(tokens) or [None]
+
+    @staticmethod
+    def limiter(token: Optional[str]) -> RateLimiter:
+        return RateLimiter.for_token(token)
+
+    @staticmethod
+    def _is_parked(budget: Dict[str, Any]) -> bool:
+        return (budget['remaining'] is not None and budget['remaining'] <= 0
+                and bool(budget['reset']) and budget['reset'] > time.time())
+
+    def select(self, exclude: Sequence[Optional[str]] = ()) -> Optional[str]:
+        """选择剩余额度最多的可用Token；全部搁置时返回最早重置的Token"""
+        candidates = [t for t in self.tokens if t not in exclude] or self.tokens
+        budgets = [(token, self.limiter(token).snapshot()) for token in candidates]
+
+        available = [(token, budget) for token, budget in budgets if not self._is_parked(budget)]
+        if available:
+            def _headroom(item):
+                budget = item[1]
+                return float('inf') if budget['remaining'] is None else budget['remaining']
+            return max(available, key=_headroom)[0]
+
+        return min(budgets, key=lambda item: item[1]['reset'])[0]
+
+    def has_available(self, exclude: Sequence[Optional[str]] = ()) -> bool:
+        """除 exclude 外是否还有未被搁置的Token"""
+        return any(
+            not self._is_parked(self.limiter(token).snapshot())
+            for token in self.tokens if token not in exclude
+        )
+
+    def status(self) -> List[Dict[str, Any]]:
+        """各Token的额度状态，用于设置页和管理页展示"""
+        result = []
+        for token in self.tokens:
+            budget = self.limiter(token).snapshot()
+            result.append({
+                'token_masked': mask_token(token),
+                'limit': budget['limit'],
+                'remaining': budget['remaining'],
+                'reset_time': datetime.fromtimestamp(budget['reset']).strftime('%H:%M') if budget['reset'] else None,
+                'parked': self._is_parked(budget)
+            })
+        return result
@@ -159,6 +159,13 @@ class Validator:
         
         validated['output_mode'] = output_mode
 
+        # 校验 fetch_mode
+        fetch_mode = params.get('fetch_mode', 'api')
+        if fetch_mode not in Config.SUPPORTED_FETCH_MODES:
+            raise ValidationError(f"不支持的获取方式: {fetch_mode}")
+        
+        validated['fetch_mode'] = fetch_mode
+
         # 校验 use_default_filters
         use_default_filters = params.get('use_default_filters', False)
         if not isinstance(use_default_filters, bool):